@@ -0,0 +1,201 @@
+# analysis/feature_panel.py
+#
+# One calendar-aligned daily panel of every local source, for modelling and the
+# dashboard: the merged UKA price and each futures contract, the daily carbon
+# intensity rollup, allocation totals for the year each day falls in and news story
+# counts. It is written as a single uncompressed Arrow IPC file with one record batch
+# and no null bitmaps (gaps are NaN), so readers memory-map it and get zero-copy
+# numpy / pandas views instead of parsing CSV, Excel or SQLite again.
+#
+#   python analysis/feature_panel.py     # rebuild data/processed/feature_panel.arrow
+
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import add_bytes, annotate, span, traced
+
+FEATURE_PANEL_PATH = PROCESSED_DATA_PATH / "feature_panel.arrow"
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+def _daily(series, calendar):
+    """A date-indexed series on the panel calendar, NaN where it has no value."""
+    series = series.copy()
+    series.index = pd.to_datetime(series.index).normalize()
+    series = series[~series.index.duplicated(keep="last")]
+    return series.reindex(calendar).to_numpy(dtype="float64")
+
+
+def price_features(calendar):
+    from indicators.futures_curve import contract_series, front_december_series, load_curve
+    from indicators.price_store import load_merged_prices
+
+    merged = load_merged_prices().set_index("date")["uka_price"]
+    features = {"uka_price": _daily(merged, calendar)}
+
+    curve = load_curve()
+    priced = curve.dropna(subset=["last"])
+    if not priced.empty:
+        features["uka_front_december"] = _daily(front_december_series(curve)["last"], calendar)
+        for contract in sorted(priced["contract"].astype(str).unique()):
+            features[f"uka_{_slug(contract)}"] = _daily(contract_series(contract, priced), calendar)
+    return features
+
+
+def intensity_features(calendar):
+    from indicators.carbon_rollups import load_rollup
+
+    daily = load_rollup("daily")
+    if daily.empty:
+        return {}
+    daily.index = daily.index.tz_convert(None)
+    return {
+        "intensity_mean": _daily(daily["actual_mean"], calendar),
+        "intensity_min": _daily(daily["actual_min"], calendar),
+        "intensity_max": _daily(daily["actual_max"], calendar),
+        "intensity_forecast_mean": _daily(daily["forecast_mean"], calendar),
+        "intensity_periods": _daily(daily["actual_count"], calendar),
+    }
+
+
+def allocation_features(calendar):
+    """Free allocation for the compliance year of each day: the total and per industry."""
+    from indicators.production_index import load_full_allocation_timeseries
+
+    _, industries = load_full_allocation_timeseries()
+    by_year = industries.pivot_table(index="Year", columns="Industries", values="Allocation",
+                                     aggfunc="sum", observed=True)
+    years = calendar.year.to_numpy()
+
+    def per_day(values):
+        return pd.Series(values).reindex(years).to_numpy(dtype="float64")
+
+    features = {"allocation_total": per_day(by_year.sum(axis=1))}
+    for industry in by_year.columns:
+        features[f"allocation_{_slug(industry)}"] = per_day(by_year[industry])
+    return features
+
+
+def news_features(calendar):
+    """Stories published per day, overall and per tracked company / sector (0 when none)."""
+    from indicators.news_feed import NEWS_DB_PATH, load_news
+
+    if not NEWS_DB_PATH.exists():
+        return {}
+    news = load_news(db_path=NEWS_DB_PATH).dropna(subset=["published"])
+    if news.empty:
+        return {}
+
+    days = news["published"].dt.tz_convert(None).dt.normalize()
+    features = {"news_count": days.value_counts().reindex(calendar, fill_value=0).to_numpy(dtype="float64")}
+
+    labels = news.assign(day=days, query=news["queries"].str.split(", ")).explode("query")
+    counts = labels.groupby(["day", "query"]).size().unstack(fill_value=0)
+    for query in counts.columns:
+        features[f"news_{_slug(query)}"] = counts[query].reindex(calendar, fill_value=0).to_numpy(dtype="float64")
+    return features
+
+
+FEATURE_SOURCES = {
+    "prices": price_features,
+    "intensity": intensity_features,
+    "allocations": allocation_features,
+    "news": news_features,
+}
+
+
+def _calendar(start=None, end=None):
+    from indicators.price_store import load_merged_prices
+
+    if start is None:
+        dates = pd.to_datetime(load_merged_prices()["date"])
+        start = dates.min() if not dates.empty else pd.Timestamp.today()
+    end = end or pd.Timestamp.today()
+    return pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D", name="date")
+
+
+@traced("panel.build")
+def build_feature_panel(path=FEATURE_PANEL_PATH, start=None, end=None, sources=FEATURE_SOURCES):
+    """
+    Assemble every source on one daily calendar (first merged price date to today by
+    default) and write it as an Arrow IPC file. A source that fails is reported and
+    left out rather than failing the whole panel. Returns the number of columns.
+    """
+    calendar = _calendar(start, end)
+    columns = {"date": pa.array(calendar.to_numpy(dtype="datetime64[ns]"))}
+
+    for name, build in sources.items():
+        try:
+            with span(f"panel.{name}"):
+                features = build(calendar)
+        except Exception as e:
+            print(f"⚠️ Feature panel source '{name}' failed: {e}")
+            continue
+        # numpy arrays convert without a validity bitmap: NaN stays NaN, so readers can map zero-copy
+        columns.update({col: pa.array(values) for col, values in features.items()})
+
+    table = pa.table(columns)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".arrow.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=len(calendar) or None)
+    tmp_path.replace(path)
+
+    annotate(rows=table.num_rows, columns=table.num_columns)
+    add_bytes(path.stat().st_size)
+    print(f"🧱 Feature panel: {table.num_rows} days × {table.num_columns - 1} features → {path.name}")
+    return table.num_columns - 1
+
+
+def open_feature_panel(path=FEATURE_PANEL_PATH):
+    """
+    The panel as a pyarrow Table backed by a memory map of the file: nothing is read
+    or copied until a column is touched, and then only its pages are paged in.
+    Returns None when the panel hasn't been built.
+    """
+    if not Path(path).exists():
+        return None
+    with span("panel.open"):
+        source = pa.memory_map(str(path), "r")
+        return pa.ipc.open_file(source).read_all()
+
+
+def panel_column(table, name):
+    """One column as a read-only numpy view onto the mapped file (no copy)."""
+    return table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+
+
+def panel_frame(table, columns=None, start=None, end=None):
+    """
+    A pandas view of the panel (optionally some columns and a date range), indexed by
+    date. Slicing is zero-copy and each float column converts without copying.
+    """
+    dates = panel_column(table, "date")
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "ns")) if start is not None else 0
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "ns"), side="right") if end is not None else len(dates)
+
+    selected = table.slice(lo, hi - lo)
+    if columns is not None:
+        selected = selected.select(["date"] + [c for c in columns if c != "date"])
+    return selected.to_pandas(split_blocks=True).set_index("date")
+
+
+def feature_columns(table, prefix=None):
+    return [name for name in table.column_names if name != "date" and (prefix is None or name.startswith(prefix))]
+
+
+if __name__ == "__main__":
+    build_feature_panel()
+    panel = open_feature_panel()
+    print(panel_frame(panel).tail())
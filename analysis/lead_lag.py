@@ -0,0 +1,181 @@
+# analysis/lead_lag.py
+#
+# Joint analysis of UKA prices and national carbon intensity. Half-hourly intensity is
+# averaged per UTC day and aligned with the daily merged price series on common trading
+# days; both are turned into daily changes (log returns / log changes) so the
+# correlations aren't driven by shared trends. Cross-correlations over a lag range come
+# from one FFT, rolling correlations for every lag from cumulative sums, so a multi-year
+# half-hourly history runs in milliseconds. Results are cached by the dashboard
+# (st.cache_data keyed on the stores' mtimes), not here.
+#
+# Lag convention: lag k correlates price[t] with intensity[t - k] in trading days, so a
+# positive lag means intensity leads the price.
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import annotate, traced
+
+DEFAULT_WINDOW = 90
+DEFAULT_LAGS = (-10, 10)
+
+
+def daily_intensity(history, column="actual"):
+    """Mean of a half-hourly intensity column per UTC day (date index), ignoring nulls."""
+    days = pd.to_datetime(history["from"], utc=True).to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    values = pd.to_numeric(history[column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    unique_days, position = np.unique(days, return_inverse=True)
+    valid = ~np.isnan(values)
+    sums = np.bincount(position, weights=np.where(valid, values, 0.0), minlength=len(unique_days))
+    counts = np.bincount(position, weights=valid, minlength=len(unique_days))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    return pd.Series(means, index=pd.DatetimeIndex(unique_days, name="date"), name="intensity").dropna()
+
+
+def load_daily_intensity(start_date=None):
+    """Daily mean intensity from the stored daily rollup, or the raw store when it isn't built."""
+    from indicators.carbon_rollups import load_rollup
+    from indicators.carbon_store import load_carbon_history
+
+    daily = load_rollup("daily", start_date=start_date)
+    if not daily.empty:
+        series = daily["actual_mean"].astype("float64").dropna()
+        series.index = series.index.tz_convert(None).rename("date")
+        return series.rename("intensity")
+    return daily_intensity(load_carbon_history(start_date=start_date))
+
+
+def align(prices, intensity, transform="changes"):
+    """
+    Price and intensity on their common days. `transform` is "changes" (price log
+    returns vs log changes of intensity, the default) or "levels".
+    """
+    prices = prices.dropna().astype("float64")
+    prices.index = pd.to_datetime(prices.index)
+    intensity = intensity.dropna().astype("float64")
+    intensity.index = pd.to_datetime(intensity.index)
+
+    joined = pd.DataFrame({"price": prices, "intensity": intensity}).dropna().sort_index()
+    if transform == "changes":
+        joined = np.log(joined).diff().iloc[1:]
+    elif transform != "levels":
+        raise ValueError(f"Unknown transform: {transform}")
+    joined.index.name = "date"
+    return joined
+
+
+def cross_correlation(x, y, min_lag=DEFAULT_LAGS[0], max_lag=DEFAULT_LAGS[1]):
+    """
+    Pearson correlation of x[t] with y[t - k] for every lag k in [min_lag, max_lag],
+    computed over each lag's overlapping observations. The lagged cross products come
+    from a single FFT; overlap means and variances from cumulative sums.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    lags = np.arange(min_lag, max_lag + 1)
+    if n < 3 or np.abs(lags).max() >= n - 1:
+        raise ValueError(f"Need more than {np.abs(lags).max() + 2} aligned days for lags {min_lag}..{max_lag}.")
+
+    # Centre first: the overlap formulas below subtract large, nearly equal sums otherwise
+    x = x - x.mean()
+    y = y - y.mean()
+
+    size = 1 << (2 * n - 1).bit_length()
+    circular = np.fft.irfft(np.fft.rfft(x, size) * np.conj(np.fft.rfft(y, size)), size)
+    cross = circular[lags % size]  # negative lags wrap to the end of the circular result
+
+    cx, cxx = np.r_[0.0, np.cumsum(x)], np.r_[0.0, np.cumsum(x * x)]
+    cy, cyy = np.r_[0.0, np.cumsum(y)], np.r_[0.0, np.cumsum(y * y)]
+
+    # Overlap for lag k >= 0: x[k:] with y[:n-k]; for k < 0: x[:n+k] with y[-k:]
+    x_start, x_end = np.maximum(lags, 0), n + np.minimum(lags, 0)
+    y_start, y_end = np.maximum(-lags, 0), n - np.maximum(lags, 0)
+    m = (x_end - x_start).astype("float64")
+
+    sx, sxx = cx[x_end] - cx[x_start], cxx[x_end] - cxx[x_start]
+    sy, syy = cy[y_end] - cy[y_start], cyy[y_end] - cyy[y_start]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (m * cross - sx * sy) / np.sqrt((m * sxx - sx ** 2) * (m * syy - sy ** 2))
+    return pd.Series(r, index=pd.Index(lags, name="lag"), name="correlation")
+
+
+def rolling_correlation(x, y, window=DEFAULT_WINDOW, lags=(0,), index=None):
+    """
+    Rolling Pearson correlation of x[t] with y[t - k] over the trailing `window`
+    observations, for every lag at once (one column per lag). Windows with any
+    missing pair are NaN.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    lags = np.asarray(lags)
+
+    # y shifted by every lag: column j holds y[t - lags[j]], NaN where it runs off the sample
+    source = np.arange(n)[:, None] - lags[None, :]
+    inside = (source >= 0) & (source < n)
+    shifted = np.where(inside, y[np.clip(source, 0, n - 1)], np.nan)
+    xs = np.broadcast_to(x[:, None], shifted.shape)
+
+    valid = ~(np.isnan(xs) | np.isnan(shifted))
+    xs, ys = np.where(valid, xs, 0.0), np.where(valid, shifted, 0.0)
+    # Centre per column so the window sums stay well-conditioned
+    counts = np.maximum(valid.sum(axis=0), 1)
+    xs = np.where(valid, xs - xs.sum(axis=0) / counts, 0.0)
+    ys = np.where(valid, ys - ys.sum(axis=0) / counts, 0.0)
+
+    def window_sums(values):
+        cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+        return cumulative[window:] - cumulative[:-window]
+
+    m = window_sums(valid.astype("float64"))
+    sx, sy = window_sums(xs), window_sums(ys)
+    sxx, syy, sxy = window_sums(xs * xs), window_sums(ys * ys), window_sums(xs * ys)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = (m * sxy - sx * sy) / np.sqrt((m * sxx - sx ** 2) * (m * syy - sy ** 2))
+    r[m < window] = np.nan
+
+    out = np.full((n, len(lags)), np.nan)
+    out[window - 1:] = r
+    return pd.DataFrame(out, index=index, columns=pd.Index(lags, name="lag"))
+
+
+@traced("analysis.lead_lag")
+def lead_lag(prices, intensity, window=DEFAULT_WINDOW, min_lag=DEFAULT_LAGS[0], max_lag=DEFAULT_LAGS[1],
+             transform="changes"):
+    """
+    Lead-lag analysis of daily prices vs daily intensity. Returns a dict with
+    `aligned` (the transformed common-day frame), `xcorr` (full-sample correlation by
+    lag), `rolling` (rolling correlation per lag, one column each) and `best_lag` (lag
+    with the largest absolute correlation).
+    """
+    aligned = align(prices, intensity, transform)
+    annotate(rows=len(aligned))
+    x, y = aligned["price"].to_numpy(), aligned["intensity"].to_numpy()
+    xcorr = cross_correlation(x, y, min_lag, max_lag)
+    return {
+        "aligned": aligned,
+        "xcorr": xcorr,
+        "rolling": rolling_correlation(x, y, window, xcorr.index, index=aligned.index),
+        "best_lag": int(xcorr.abs().idxmax()) if xcorr.notna().any() else None,
+    }
+
+
+def price_intensity_lead_lag(window=DEFAULT_WINDOW, min_lag=DEFAULT_LAGS[0], max_lag=DEFAULT_LAGS[1],
+                             transform="changes"):
+    """Lead-lag of the merged UKA series against the stored daily national intensity."""
+    from indicators.price_store import load_merged_prices
+
+    prices = load_merged_prices().set_index("date")["uka_price"]
+    return lead_lag(prices, load_daily_intensity(), window, min_lag, max_lag, transform)
+
+
+if __name__ == "__main__":
+    result = price_intensity_lead_lag()
+    print(result["xcorr"].round(3).to_string())
+    print(f"Strongest lag: {result['best_lag']} trading days")
@@ -0,0 +1,176 @@
+# analysis/price_analytics.py
+#
+# Daily analytics over the merged UKA series and each futures contract: log returns,
+# moving averages, rolling and EWMA realised volatility, drawdowns and z-scores.
+# Results are stored per series (and per config) under data/processed/analytics/.
+# When days are appended, only the new rows are computed: rolling windows re-read
+# just enough history, and the recursive EWMA variance and running peak continue from
+# the last stored row. A revised historical price recomputes from that day onwards.
+
+import hashlib
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import annotate, traced
+
+ANALYTICS_PATH = PROCESSED_DATA_PATH / "analytics"
+TRADING_DAYS = 252
+
+DEFAULT_CONFIG = {
+    "ma_windows": [7, 30, 90],
+    "vol_windows": [20, 60],
+    "ewma_lambda": 0.94,  # RiskMetrics daily decay
+    "drawdown_window": 252,
+    "zscore_window": 30,
+}
+
+
+def _config(config):
+    return {**DEFAULT_CONFIG, **(config or {})}
+
+
+def _lookback(config):
+    # Rows of history a rolling metric needs before the first recomputed day
+    return max(config["ma_windows"] + config["vol_windows"] + [config["drawdown_window"], config["zscore_window"]])
+
+
+def _store_path(name, config, root):
+    digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:8]
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", name)
+    return root / f"{safe_name}-{digest}.parquet"
+
+
+def _compute(prices, start, previous, config):
+    """
+    Metrics for prices.iloc[start:], given the full price history and the stored
+    metric rows before `start` (`previous`, empty for a full computation).
+    """
+    # One extra row so the first recomputed return (and every full volatility window) has its previous price
+    first = max(start - _lookback(config) - 1, 0)
+    window = prices.iloc[first:]
+    offset = start - first
+    log_price = np.log(window.astype("float64"))
+    returns = log_price.diff()
+
+    out = pd.DataFrame({"price": window, "log_return": returns})
+    for n in config["ma_windows"]:
+        out[f"sma_{n}"] = window.rolling(n).mean()
+    for n in config["vol_windows"]:
+        out[f"vol_{n}"] = returns.rolling(n).std() * np.sqrt(TRADING_DAYS)
+
+    z = config["zscore_window"]
+    out[f"zscore_{z}"] = (window - window.rolling(z).mean()) / window.rolling(z).std()
+    out = out.iloc[offset:]
+
+    # Recursive state carried over from the last stored row: EWMA variance and running peak
+    squared = out["log_return"].pow(2)
+    if previous.empty:
+        ewma_var = squared.ewm(alpha=1 - config["ewma_lambda"], adjust=False, ignore_na=True).mean()
+        peak = np.maximum.accumulate(out["price"].to_numpy())
+        earlier_drawdowns = np.array([])
+    else:
+        seeded = pd.concat([previous["ewma_var"].iloc[-1:], squared])
+        ewma_var = seeded.ewm(alpha=1 - config["ewma_lambda"], adjust=False, ignore_na=True).mean().iloc[1:]
+        peak = np.maximum.accumulate(np.r_[previous["peak"].iloc[-1], out["price"].to_numpy()])[1:]
+        earlier_drawdowns = previous["drawdown"].iloc[-(config["drawdown_window"] - 1):].to_numpy()
+
+    out["ewma_var"] = ewma_var.to_numpy()
+    out["ewma_vol"] = np.sqrt(out["ewma_var"] * TRADING_DAYS)
+    out["peak"] = peak
+    out["drawdown"] = out["price"] / out["peak"] - 1
+
+    # Worst drawdown from the running peak over the trailing window
+    w = config["drawdown_window"]
+    drawdowns = pd.Series(np.r_[earlier_drawdowns, out["drawdown"].to_numpy()])
+    out[f"max_drawdown_{w}"] = drawdowns.rolling(w, min_periods=1).min().to_numpy()[len(earlier_drawdowns):]
+    return out
+
+
+def _clean(prices):
+    prices = prices.dropna().sort_index().astype("float64")
+    prices.index = pd.to_datetime(prices.index)
+    prices.index.name = "date"
+    return prices[~prices.index.duplicated(keep="last")]
+
+
+def compute_analytics(prices, config=None):
+    """All metrics for a daily price series (date index), computed from scratch."""
+    return _compute(_clean(prices), 0, pd.DataFrame(), _config(config))
+
+
+def _first_changed(prices, stored):
+    """Position in `prices` of the first day that is new or differs from what is stored."""
+    n = min(len(prices), len(stored))
+    same_dates = prices.index[:n] == stored.index[:n]
+    same_prices = np.isclose(prices.to_numpy()[:n], stored["price"].to_numpy()[:n], rtol=0, atol=1e-12)
+    mismatch = np.flatnonzero(~(same_dates & same_prices))
+    if mismatch.size:
+        return int(mismatch[0])
+    # Stored rows beyond the current series (days removed) also force a recompute from there
+    return n
+
+
+@traced("analytics.prices")
+def price_analytics(prices, name, config=None, root=ANALYTICS_PATH):
+    """
+    Metrics for `prices` (a daily series indexed by date), reusing what is stored for
+    `name` and computing only days that are new or whose price changed.
+    """
+    config = _config(config)
+    prices = _clean(prices)
+
+    path = _store_path(name, config, root)
+    stored = pd.read_parquet(path) if path.exists() else pd.DataFrame()
+    start = _first_changed(prices, stored) if not stored.empty else 0
+
+    if not stored.empty and start == len(prices) == len(stored):
+        annotate(cache="hit", rows=len(stored))
+        return stored
+
+    previous = stored.iloc[:start]
+    fresh = _compute(prices, start, previous, config)
+    result = pd.concat([previous, fresh]) if not previous.empty else fresh
+    annotate(cache="partial" if start else "miss", rows=len(fresh))
+
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    result.to_parquet(tmp_path)
+    tmp_path.replace(path)
+    return result
+
+
+def merged_price_analytics(config=None, root=ANALYTICS_PATH):
+    from indicators.price_store import load_merged_prices
+
+    prices = load_merged_prices().set_index("date")["uka_price"]
+    return price_analytics(prices, "merged", config, root)
+
+
+def contract_price_analytics(config=None, root=ANALYTICS_PATH, min_days=2):
+    """
+    {contract: metrics} for every futures contract with at least `min_days` prices,
+    plus "front_december" for the continuous front-December series.
+    """
+    from indicators.futures_curve import contract_series, front_december_series, load_curve
+
+    curve = load_curve()
+    priced = curve.dropna(subset=["last"])
+    if priced.empty:
+        return {}
+
+    series = {str(c): contract_series(c, priced) for c in priced["contract"].unique()}
+    series["front_december"] = front_december_series(curve)["last"]
+
+    return {
+        name: price_analytics(prices, f"contract_{name}", config, root)
+        for name, prices in series.items()
+        if prices.notna().sum() >= min_days
+    }
+
+
+if __name__ == "__main__":
+    print(merged_price_analytics().tail(10).T)
@@ -0,0 +1,262 @@
+# analysis/price_forecast.py
+#
+# Prophet forecasts of the merged UKA price. A model is fitted once per version of the
+# data: the fit, its forecast frame and a small metadata file are stored under
+# data/processed/forecasts/ keyed on a hash of the prices and model settings, so a new
+# trading day triggers one refit and everything else (dashboard reruns included) just
+# reads the stored forecast. Rolling-origin backtests fit each fold in a separate
+# process and record how long every fold took alongside its errors.
+#
+#   python analysis/price_forecast.py              # fit (if needed) and print the forecast
+#   python analysis/price_forecast.py --backtest   # also run the backtest
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import annotate, span, traced
+
+FORECAST_PATH = PROCESSED_DATA_PATH / "forecasts"
+HORIZON_DAYS = 30  # trading days ahead
+KEEP_FITS = 3
+
+MODEL_PARAMS = {
+    "yearly_seasonality": "auto",  # only once there are two years of history
+    "weekly_seasonality": False,
+    "daily_seasonality": False,
+    "changepoint_prior_scale": 0.05,
+    "interval_width": 0.8,
+}
+
+# Rolling-origin backtest: first fold trains on `initial` days, then the origin moves `step` days
+BACKTEST_INITIAL = 250
+BACKTEST_STEP = 20
+
+
+def _quiet():
+    # cmdstanpy logs every chain start / finish at INFO
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+
+
+def _clean(prices):
+    prices = prices.dropna().sort_index().astype("float64")
+    prices.index = pd.to_datetime(prices.index)
+    return prices[~prices.index.duplicated(keep="last")]
+
+
+def data_hash(prices, horizon=HORIZON_DAYS, params=MODEL_PARAMS):
+    """Hash of the dates, prices and model settings: a new day or a revised price changes it."""
+    digest = hashlib.sha1()
+    digest.update(prices.index.to_numpy(dtype="datetime64[ns]").tobytes())
+    digest.update(prices.to_numpy(dtype="float64").tobytes())
+    digest.update(json.dumps({"horizon": horizon, **params}, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _fit(prices, params=MODEL_PARAMS):
+    from prophet import Prophet  # Requires: pip install prophet
+
+    _quiet()
+    model = Prophet(**params)
+    model.fit(pd.DataFrame({"ds": prices.index, "y": prices.to_numpy()}))
+    return model
+
+
+def _predict(model, horizon):
+    future = model.make_future_dataframe(periods=horizon, freq="B")
+    forecast = model.predict(future)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+    return forecast.rename(columns={"ds": "date"})
+
+
+def _paths(digest, root):
+    return {
+        "model": root / f"{digest}.model.json",
+        "forecast": root / f"{digest}.forecast.parquet",
+        "meta": root / f"{digest}.meta.json",
+        "backtest": root / f"{digest}.backtest.parquet",
+    }
+
+
+def _prune(root, keep=KEEP_FITS):
+    """Drop all but the newest `keep` fits."""
+    metas = sorted(root.glob("*.meta.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in metas[keep:]:
+        digest = meta.name.split(".")[0]
+        for path in _paths(digest, root).values():
+            path.unlink(missing_ok=True)
+
+
+@traced("forecast.fit")
+def fit_forecast(prices, horizon=HORIZON_DAYS, root=FORECAST_PATH):
+    """
+    Forecast `prices` (daily series, date index) `horizon` trading days ahead, reusing
+    the stored fit when the data hash is unchanged. Returns (forecast, meta).
+    """
+    prices = _clean(prices)
+    digest = data_hash(prices, horizon)
+    paths = _paths(digest, root)
+
+    if paths["meta"].exists() and paths["forecast"].exists():
+        annotate(cache="hit", data_hash=digest)
+        return pd.read_parquet(paths["forecast"]), json.loads(paths["meta"].read_text())
+
+    annotate(cache="miss", data_hash=digest, rows=len(prices))
+    print(f"🔮 Fitting forecast model on {len(prices)} prices up to {prices.index[-1]:%Y-%m-%d}...")
+    start = time.perf_counter()
+    model = _fit(prices)
+    fit_seconds = time.perf_counter() - start
+    forecast = _predict(model, horizon)
+
+    from prophet.serialize import model_to_json
+
+    meta = {
+        "data_hash": digest,
+        "last_date": prices.index[-1].strftime("%Y-%m-%d"),
+        "rows": len(prices),
+        "horizon": horizon,
+        "fitted_at": datetime.now(timezone.utc).isoformat(),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+
+    root.mkdir(parents=True, exist_ok=True)
+    paths["model"].write_text(model_to_json(model))
+    forecast.to_parquet(paths["forecast"], index=False)
+    # Metadata last: a fit only counts as stored once its meta file exists
+    paths["meta"].write_text(json.dumps(meta, indent=2))
+    _prune(root)
+    return forecast, meta
+
+
+def load_model(digest, root=FORECAST_PATH):
+    """The stored Prophet model for a data hash (e.g. to predict another horizon)."""
+    from prophet.serialize import model_from_json
+
+    return model_from_json(_paths(digest, root)["model"].read_text())
+
+
+def latest_forecast(root=FORECAST_PATH):
+    """(forecast, meta) of the most recent stored fit, or (None, None) when there is none."""
+    metas = sorted(root.glob("*.meta.json"), key=lambda p: p.stat().st_mtime) if root.exists() else []
+    for meta_path in reversed(metas):
+        meta = json.loads(meta_path.read_text())
+        forecast_path = _paths(meta["data_hash"], root)["forecast"]
+        if forecast_path.exists():
+            return pd.read_parquet(forecast_path), meta
+    return None, None
+
+
+def backtest_origins(n, horizon=HORIZON_DAYS, initial=BACKTEST_INITIAL, step=BACKTEST_STEP):
+    """Training-set sizes for each fold: every `step` days from `initial` while a full horizon remains."""
+    return list(range(initial, n - horizon + 1, step))
+
+
+def _run_fold(prices, origin, horizon):
+    """Fit on the first `origin` prices and score the next `horizon` (runs in a worker process)."""
+    train, test = prices.iloc[:origin], prices.iloc[origin:origin + horizon]
+
+    start = time.perf_counter()
+    model = _fit(train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = model.predict(pd.DataFrame({"ds": test.index}))
+    predict_seconds = time.perf_counter() - start
+
+    actual = test.to_numpy()
+    error = predicted["yhat"].to_numpy() - actual
+    inside = (actual >= predicted["yhat_lower"].to_numpy()) & (actual <= predicted["yhat_upper"].to_numpy())
+    naive_error = train.iloc[-1] - actual
+
+    return {
+        "origin": train.index[-1],
+        "train_rows": len(train),
+        "test_rows": len(test),
+        "mae": np.abs(error).mean(),
+        "rmse": np.sqrt(np.mean(error ** 2)),
+        "mape": np.mean(np.abs(error) / actual),
+        "coverage": inside.mean(),
+        "naive_mae": np.abs(naive_error).mean(),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+    }
+
+
+@traced("forecast.backtest")
+def backtest(prices, horizon=HORIZON_DAYS, initial=BACKTEST_INITIAL, step=BACKTEST_STEP,
+             max_workers=None, root=FORECAST_PATH):
+    """
+    Rolling-origin backtest: one fold per origin, fitted in parallel (spawned) worker processes.
+    Returns one row per fold with its errors (MAE, RMSE, MAPE, band coverage, and the
+    MAE of a last-price baseline) and fit / predict timings. Results are stored next
+    to the fit and reused while the data hash is unchanged.
+    """
+    prices = _clean(prices)
+    digest = data_hash(prices, horizon)
+    path = _paths(digest, root)["backtest"]
+    if path.exists():
+        annotate(cache="hit", data_hash=digest)
+        return pd.read_parquet(path)
+
+    origins = backtest_origins(len(prices), horizon, initial, step)
+    annotate(cache="miss", folds=len(origins))
+    if not origins:
+        raise ValueError(f"Need at least {initial + horizon} prices for a backtest, have {len(prices)}.")
+
+    print(f"🧪 Backtesting {len(origins)} folds...")
+    # Spawned, not forked: the caller may be a multi-threaded process (pipeline, dashboard)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as pool:
+        folds = list(pool.map(_run_fold, [prices] * len(origins), origins, [horizon] * len(origins)))
+
+    results = pd.DataFrame(folds)
+    root.mkdir(parents=True, exist_ok=True)
+    results.to_parquet(path, index=False)
+    return results
+
+
+def load_backtest(meta, root=FORECAST_PATH):
+    """Stored backtest for a fit's metadata, or None if it hasn't been run for that data."""
+    path = _paths(meta["data_hash"], root)["backtest"]
+    return pd.read_parquet(path) if path.exists() else None
+
+
+def merged_prices():
+    from indicators.price_store import load_merged_prices
+
+    return load_merged_prices().set_index("date")["uka_price"]
+
+
+def update_forecast(run_backtest=True, root=FORECAST_PATH):
+    """Fit on the current merged series (if it changed) and, optionally, backtest it."""
+    prices = merged_prices()
+    with span("forecast.update", rows=len(prices)):
+        forecast, meta = fit_forecast(prices, root=root)
+        if run_backtest and len(backtest_origins(len(prices))):
+            backtest(prices, root=root)
+    return forecast, meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit and backtest the UKA price forecast.")
+    parser.add_argument("--backtest", action="store_true", help="also run the rolling-origin backtest")
+    args = parser.parse_args()
+
+    forecast, meta = update_forecast(run_backtest=args.backtest)
+    print(forecast.tail(HORIZON_DAYS).to_string(index=False))
+    if args.backtest:
+        results = load_backtest(meta)
+        if results is not None:
+            print(results.to_string(index=False))
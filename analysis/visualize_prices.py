@@ -1,23 +1,34 @@
 # analysis/visualize_prices.py
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
 from pathlib import Path
 
-# Load the data
-DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "raw" / "uka_prices.csv"
-df = pd.read_csv(DATA_PATH)
+import matplotlib.pyplot as plt
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from analysis.feature_panel import feature_columns, open_feature_panel, panel_frame
+
+# Memory-map the daily feature panel (built by `python pipeline.py feature_panel`)
+panel = open_feature_panel()
+if panel is None:
+    sys.exit("❌ No feature panel yet — build it with: python pipeline.py feature_panel")
 
-# Convert date column to datetime
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date")
+contracts = [c for c in feature_columns(panel, prefix="uka_") if c != "uka_front_december"]
+df = panel_frame(panel, contracts)
 
 # Plot
 plt.figure(figsize=(10, 5))
-plt.plot(df["date"], df["uka_price"], marker='o', linestyle='-')
+prices = df["uka_price"].dropna()  # the panel is calendar-daily; prices exist on trading days
+plt.plot(prices.index, prices, marker='o', linestyle='-', label="UKA price")
+for contract in contracts:
+    if contract != "uka_price":
+        series = df[contract].dropna()
+        plt.plot(series.index, series, linestyle='--', label=contract.removeprefix("uka_"))
 plt.title("UKA Prices Over Time")
 plt.xlabel("Date")
 plt.ylabel("Price (€)")
+plt.legend()
 plt.grid(True)
 plt.tight_layout()
 plt.show()
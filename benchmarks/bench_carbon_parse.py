@@ -0,0 +1,90 @@
+# benchmarks/bench_carbon_parse.py
+#
+# Compares the typed single-pass parser in indicators/carbon_intensity_api.py with
+# the previous DataFrame-of-dicts + three .apply() passes, on synthetic half-hourly
+# payloads shaped like the /intensity/{from}/{to} response.
+#
+#   python benchmarks/bench_carbon_parse.py [n_rows ...]
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from indicators.carbon_intensity_api import INDEX_LEVELS, intensity_records_to_frame
+
+
+def make_records(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    starts = pd.date_range("2020-01-01", periods=n_rows, freq="30min", tz="UTC")
+    froms = starts.strftime("%Y-%m-%dT%H:%MZ")
+    tos = (starts + pd.Timedelta("30min")).strftime("%Y-%m-%dT%H:%MZ")
+    actual = rng.integers(20, 350, n_rows)
+    forecast = rng.integers(20, 350, n_rows)
+    levels = rng.integers(0, len(INDEX_LEVELS), n_rows)
+    missing = rng.random(n_rows) < 0.01
+
+    return [
+        {
+            "from": f,
+            "to": t,
+            "intensity": {
+                "forecast": int(fc),
+                "actual": None if m else int(a),
+                "index": INDEX_LEVELS[lvl],
+            },
+        }
+        for f, t, a, fc, lvl, m in zip(froms, tos, actual, forecast, levels, missing)
+    ]
+
+
+def legacy_parse(records):
+    # The parsing path previously inlined in fetch_national_carbon_timeseries
+    df = pd.DataFrame(records)
+    df["from"] = pd.to_datetime(df["from"])
+    df["to"] = pd.to_datetime(df["to"])
+
+    intensity_df = df.dropna().assign(
+        actual=lambda d: d["intensity"].apply(lambda x: x.get("actual")),
+        forecast=lambda d: d["intensity"].apply(lambda x: x.get("forecast")),
+        index=lambda d: d["intensity"].apply(lambda x: x.get("index")),
+    )
+    return intensity_df[["from", "to", "actual", "forecast", "index"]]
+
+
+def measure(parse, records, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parse(records)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(records)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "parse_s": min(timings),
+        "peak_mb": peak / 1e6,
+        "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def main(sizes):
+    rows = []
+    for n_rows in sizes:
+        records = make_records(n_rows)
+        for name, parse in [("legacy", legacy_parse), ("typed", intensity_records_to_frame)]:
+            rows.append({"rows": n_rows, "parser": name, **measure(parse, records)})
+
+    report = pd.DataFrame(rows).set_index(["rows", "parser"])
+    print(report.round(3).to_string())
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,276 @@
+# benchmarks/run_benchmarks.py
+#
+# Regression benchmarks for ingestion, storage and dashboard data prep. Every
+# benchmark builds a synthetic dataset at 1x / 10x / 100x its base size (setup is not
+# timed), runs the code path a few times and keeps the best time. Results are compared
+# against benchmarks/baselines.json; anything slower than baseline * tolerance fails.
+#
+#   python benchmarks/run_benchmarks.py                    # compare against baselines
+#   python benchmarks/run_benchmarks.py --record           # re-record baselines
+#   python benchmarks/run_benchmarks.py carbon_parse --scales 1 10
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.append(str(BENCH_DIR.parent))
+sys.path.append(str(BENCH_DIR))
+
+BASELINE_PATH = BENCH_DIR / "baselines.json"
+SCALES = (1, 10, 100)
+DEFAULT_TOLERANCE = 1.5  # fail when more than 50% slower than the recorded baseline
+
+BENCHMARKS = {}
+
+
+def benchmark(name, base_size, unit):
+    """
+    Register a benchmark. The decorated function receives the dataset size
+    (base_size * scale) and a scratch directory, does its setup and returns the
+    zero-argument callable to time.
+    """
+    def register(func):
+        BENCHMARKS[name] = {"setup": func, "base_size": base_size, "unit": unit}
+        return func
+    return register
+
+
+@contextmanager
+def patched(module, **attrs):
+    original = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+
+# --- synthetic data --------------------------------------------------------------
+
+def make_history(n_periods, seed=0):
+    """Half-hourly national intensity shaped like the carbon store."""
+    from indicators.carbon_intensity_api import INDEX_LEVELS
+
+    rng = np.random.default_rng(seed)
+    froms = pd.date_range("2020-01-01", periods=n_periods, freq="30min", tz="UTC")
+    actual = pd.array(rng.integers(20, 350, n_periods), dtype="Int16")
+    actual[rng.random(n_periods) < 0.01] = pd.NA
+    return pd.DataFrame({
+        "from": froms,
+        "to": froms + pd.Timedelta("30min"),
+        "actual": actual,
+        "forecast": pd.array(rng.integers(20, 350, n_periods), dtype="Int16"),
+        "index": pd.Categorical.from_codes(rng.integers(0, len(INDEX_LEVELS), n_periods), INDEX_LEVELS, ordered=True),
+    })
+
+
+def make_allocation_sheets(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    years = [str(y) for y in range(2021, 2031)]
+
+    def sheet(name_col, prefix):
+        df = pd.DataFrame(rng.integers(0, 500_000, (n_rows, len(years))).astype("float64"), columns=years)
+        df.insert(0, name_col, [f"{prefix} {i}" for i in range(n_rows)])
+        return df
+
+    return sheet("Company", "Company"), sheet("Industries", "Industry")
+
+
+def make_market_update_docx(path, n_paragraphs, seed=0):
+    from docx import Document
+
+    rng = np.random.default_rng(seed)
+    labels = ["Summary", "Key UKA price drivers", "UKA price outlook", "Market commentary", "Auction supply"]
+    doc = Document()
+    for i in range(n_paragraphs):
+        kind = rng.integers(0, 4)
+        if kind == 0:
+            doc.add_paragraph(f"{labels[i % len(labels)]}: UKAs traded in a narrow range this week.")
+        elif kind == 1:
+            doc.add_paragraph(f"Auction {i} cleared above the secondary market.", style="List Bullet")
+        else:
+            doc.add_paragraph("Prices followed gas lower as wind output picked up across the week. " * 3)
+    doc.save(path)
+
+
+# --- benchmarks ------------------------------------------------------------------
+
+@benchmark("carbon_parse", base_size=1_440, unit="API records (1x = one 30-day request)")
+def bench_carbon_parse(size, scratch):
+    from bench_carbon_parse import make_records
+    from indicators.carbon_intensity_api import intensity_records_to_frame
+
+    records = make_records(size)
+    return lambda: intensity_records_to_frame(records)
+
+
+@benchmark("load_combined_uka_prices", base_size=1_000, unit="price rows across two sources")
+def bench_load_combined_uka_prices(size, scratch):
+    # Same query as dashboard/data_access.load_combined_uka_prices, without Streamlit's cache
+    from indicators.price_store import load_merged_prices, upsert
+
+    db_path = scratch / "uka_prices.sqlite"
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("1900-01-01", periods=size // 2, freq="D")
+    for source in ("ice_chart", "ice_front_december"):
+        prices = pd.DataFrame({"date": dates, "uka_price": rng.uniform(30, 90, len(dates))})
+        upsert(prices, source, db_path=db_path)
+
+    return lambda: load_merged_prices(db_path=db_path)[["date", "uka_price"]]
+
+
+@benchmark("reshape_allocation_timeseries", base_size=500, unit="installations per sheet")
+def bench_reshape_allocation_timeseries(size, scratch):
+    import indicators.production_index as production_index
+
+    company_df, industry_df = make_allocation_sheets(size)
+    paths = {
+        production_index.COMPANY_SHEET: str(scratch / "company.parquet"),
+        production_index.INDUSTRY_SHEET: str(scratch / "industry.parquet"),
+    }
+    company_df.to_parquet(paths[production_index.COMPANY_SHEET], index=False)
+    industry_df.to_parquet(paths[production_index.INDUSTRY_SHEET], index=False)
+
+    def run():
+        with patched(production_index, ALLOCATIONS_PARQUET=paths, _parquet_cache_is_fresh=lambda *a: True):
+            return production_index.reshape_allocation_timeseries()
+    return run
+
+
+@benchmark("load_market_update_markdown", base_size=60, unit="paragraphs (1x = one newsletter)")
+def bench_load_market_update_markdown(size, scratch):
+    from indicators.market_updates import load_market_update_markdown
+
+    path = scratch / "market_update.docx"
+    make_market_update_docx(path, size)
+    return lambda: load_market_update_markdown(path)
+
+
+@benchmark("carbon_rolling", base_size=17_520, unit="half-hour periods (1x = one year)")
+def bench_carbon_rolling(size, scratch):
+    # The rolling means and daily aggregate the carbon tab reads, as computed at sync time
+    from indicators.carbon_rollups import aggregate, rolling_averages
+
+    history = make_history(size)
+    return lambda: (rolling_averages(history), aggregate(history, "daily"))
+
+
+@benchmark("lead_lag", base_size=17_520, unit="half-hour periods (1x = one year)")
+def bench_lead_lag(size, scratch):
+    # Daily aggregation of the half-hourly history plus cross / rolling correlations over ±10 lags
+    from analysis import lead_lag
+
+    history = make_history(size)
+    days = pd.date_range("2020-01-01", periods=size // 48, freq="D")
+    rng = np.random.default_rng(1)
+    prices = pd.Series(60 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))), index=days)
+
+    return lambda: lead_lag.lead_lag(prices, lead_lag.daily_intensity(history), window=90)
+
+
+# --- runner ----------------------------------------------------------------------
+
+def time_callable(func, repeat):
+    func()  # warm-up: imports, caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(names, scales, repeat):
+    results = {}
+    for name in names:
+        spec = BENCHMARKS[name]
+        print(f"{name} — size in {spec['unit']}")
+        for scale in scales:
+            size = spec["base_size"] * scale
+            with tempfile.TemporaryDirectory() as scratch:
+                func = spec["setup"](size, Path(scratch))
+                seconds = time_callable(func, repeat)
+            key = f"{name}@{scale}x"
+            results[key] = round(seconds, 6)
+            print(f"⏱️ {key:<40}{size:>12,} {seconds * 1000:>10.1f} ms")
+    return results
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get("results", {})
+
+
+def record_baselines(results, path=BASELINE_PATH):
+    baselines = load_baselines(path)
+    baselines.update(results)
+    path.write_text(json.dumps({
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "results": dict(sorted(baselines.items())),
+    }, indent=2) + "\n")
+    print(f"📝 Baselines written to {path}")
+
+
+def compare(results, baselines, tolerance):
+    """Print the ratio to baseline per benchmark; return the keys that regressed."""
+    regressions = []
+    print(f"\n{'benchmark':<40}{'baseline ms':>12}{'now ms':>10}{'ratio':>8}")
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline is None:
+            print(f"{key:<40}{'—':>12}{seconds * 1000:>10.1f}{'new':>8}")
+            continue
+        ratio = seconds / baseline if baseline else float("inf")
+        flag = " ❌" if ratio > tolerance else ""
+        print(f"{key:<40}{baseline * 1000:>12.1f}{seconds * 1000:>10.1f}{ratio:>8.2f}{flag}")
+        if ratio > tolerance:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the data-prep benchmarks.")
+    parser.add_argument("benchmarks", nargs="*", help=f"subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--record", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baselines", type=Path, default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = run(args.benchmarks or list(BENCHMARKS), args.scales, args.repeat)
+
+    if args.record:
+        record_baselines(results, args.baselines)
+        return 0
+
+    regressions = compare(results, load_baselines(args.baselines), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than {args.tolerance:.1f}x baseline")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# dashboard/data_access.py
+#
+# Cached loaders for the Streamlit dashboard. File-backed sources are keyed on the
+# source files' mtimes, so an edit on disk is picked up on the next rerun, and every
+# source also has its own TTL. Widget interactions re-use the cached frames instead
+# of re-reading CSV / Excel / DOCX files. Network fetches happen only in the
+# background refresh worker (refresh_worker.py); these getters just read its stores.
+# Each getter opens a "cache.*" span marked as a hit unless the cached body ran.
+
+import sys
+from pathlib import Path
+
+import streamlit as st
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from instrumentation import annotate, span
+from analysis.price_analytics import contract_price_analytics, merged_price_analytics
+from analysis.feature_panel import FEATURE_PANEL_PATH, open_feature_panel
+from analysis.lead_lag import price_intensity_lead_lag
+from analysis.price_forecast import FORECAST_PATH, latest_forecast, load_backtest
+from indicators.carbon_rollups import ROLLUP_PATH, load_rollup
+from indicators.carbon_store import latest_reading, list_partitions
+from indicators.event_study import price_panel
+from indicators.futures_curve import CURVE_PATH
+from indicators.market_update_corpus import build_corpus, discover_documents
+from indicators.news_feed import NEWS_DB_PATH, load_news
+from indicators.price_store import PRICE_FILES, load_merged_prices
+from indicators.production_index import ALLOCATIONS_WORKBOOK, reshape_allocation_timeseries
+from refresh_worker import load_refresh_state
+
+# Seconds each source may be served from cache before it is reloaded regardless of mtime
+CACHE_TTLS = {
+    "prices": 60 * 60,
+    "carbon_live": 15 * 60,
+    "carbon_rollups": 30 * 60,
+    "allocations": 24 * 60 * 60,
+    "market_updates": 24 * 60 * 60,
+    "news": 60 * 60,
+}
+
+
+def _mtimes(paths):
+    return tuple(Path(p).stat().st_mtime if Path(p).exists() else None for p in paths)
+
+
+def load_combined_uka_prices():
+    # The store already holds one deduplicated price per date, sorted by date
+    return load_merged_prices()[["date", "uka_price"]]
+
+
+@st.cache_data(ttl=CACHE_TTLS["prices"], show_spinner=False)
+def _cached_uka_prices(mtimes_key):
+    annotate(cache="miss")
+    return load_combined_uka_prices()
+
+
+def get_uka_prices():
+    with span("cache.prices", cache="hit"):
+        return _cached_uka_prices(_mtimes(PRICE_FILES))
+
+
+@st.cache_data(ttl=CACHE_TTLS["prices"], show_spinner=False)
+def _cached_price_panel(mtimes_key):
+    annotate(cache="miss")
+    return price_panel()
+
+
+def get_price_panel():
+    """Wide daily prices (merged series plus one column per source) for the event study."""
+    with span("cache.price_panel", cache="hit"):
+        return _cached_price_panel(_mtimes(PRICE_FILES))
+
+
+@st.cache_data(ttl=CACHE_TTLS["prices"], show_spinner=False)
+def _cached_price_analytics(mtimes_key):
+    # Only days appended (or revised) since the stored analytics are computed
+    annotate(cache="miss")
+    return merged_price_analytics()
+
+
+def get_price_analytics():
+    """Returns, moving averages, volatility, drawdowns and z-scores of the merged series."""
+    with span("cache.price_analytics", cache="hit"):
+        return _cached_price_analytics(_mtimes(PRICE_FILES))
+
+
+@st.cache_data(ttl=CACHE_TTLS["prices"], show_spinner=False)
+def _cached_contract_analytics(mtimes_key):
+    annotate(cache="miss")
+    return contract_price_analytics()
+
+
+def get_contract_analytics():
+    """{contract: analytics} for each futures contract in the scraped curve."""
+    with span("cache.contract_analytics", cache="hit"):
+        return _cached_contract_analytics(_mtimes([CURVE_PATH]))
+
+
+@st.cache_data(ttl=CACHE_TTLS["prices"], show_spinner=False)
+def _cached_price_forecast(mtimes_key):
+    annotate(cache="miss")
+    forecast, meta = latest_forecast()
+    backtest = load_backtest(meta) if meta else None
+    return forecast, meta, backtest
+
+
+def get_price_forecast():
+    """
+    (forecast, meta, backtest) from the latest stored fit; the refresh worker refits
+    when the prices change, so reruns never fit a model. All None before the first fit.
+    """
+    with span("cache.price_forecast", cache="hit"):
+        return _cached_price_forecast(_mtimes([FORECAST_PATH]))
+
+
+@st.cache_data(ttl=CACHE_TTLS["carbon_rollups"], show_spinner=False, max_entries=32)
+def _cached_lead_lag(window, min_lag, max_lag, transform, mtimes_key):
+    annotate(cache="miss")
+    return price_intensity_lead_lag(window, min_lag, max_lag, transform)
+
+
+def get_lead_lag(window, min_lag, max_lag, transform="changes"):
+    """Cross / rolling correlations of UKA prices vs daily intensity, cached per window and lag range."""
+    with span("cache.lead_lag", cache="hit"):
+        return _cached_lead_lag(
+            window, min_lag, max_lag, transform, _mtimes([*PRICE_FILES, ROLLUP_PATH / "daily.parquet"])
+        )
+
+
+@st.cache_data(ttl=CACHE_TTLS["carbon_live"], show_spinner=False)
+def _cached_latest_carbon_reading(mtimes_key):
+    annotate(cache="miss")
+    return latest_reading()
+
+
+def get_live_carbon_intensity():
+    """Latest stored national reading; the refresh worker keeps the store current."""
+    with span("cache.carbon_live", cache="hit"):
+        return _cached_latest_carbon_reading(_mtimes(list_partitions()[-1:]))
+
+
+@st.cache_data(ttl=CACHE_TTLS["carbon_rollups"], show_spinner=False)
+def _cached_carbon_rollup(name, start_date, mtimes_key):
+    annotate(cache="miss")
+    return load_rollup(name, start_date=start_date)
+
+
+def get_carbon_rollup(name, start_date=None):
+    """A pre-computed rollup ("hourly", "daily", "weekly", "monthly", "rolling")."""
+    with span(f"cache.carbon_rollup.{name}", cache="hit"):
+        return _cached_carbon_rollup(name, start_date, _mtimes([ROLLUP_PATH / f"{name}.parquet"]))
+
+
+@st.cache_data(ttl=CACHE_TTLS["allocations"], show_spinner=False)
+def _cached_allocation_timeseries(mtimes_key):
+    annotate(cache="miss")
+    return reshape_allocation_timeseries()
+
+
+def get_allocation_timeseries():
+    with span("cache.allocations", cache="hit"):
+        return _cached_allocation_timeseries(_mtimes([ALLOCATIONS_WORKBOOK]))
+
+
+@st.cache_data(ttl=CACHE_TTLS["market_updates"], show_spinner=False)
+def _cached_market_update_corpus(mtimes_key):
+    # Only new or changed documents are converted; the rest come from the stored corpus
+    annotate(cache="miss")
+    return build_corpus()
+
+
+def get_market_update_corpus():
+    """Markdown, sections and search index of every DOCX in data/market_updates/."""
+    with span("cache.market_updates", cache="hit"):
+        documents = discover_documents()
+        return _cached_market_update_corpus((tuple(p.name for p in documents), _mtimes(documents)))
+
+
+@st.cache_data(ttl=CACHE_TTLS["news"], show_spinner=False)
+def _cached_news(mtimes_key):
+    annotate(cache="miss")
+    return load_news()
+
+
+def get_news():
+    """Every stored story, newest first; the refresh worker ingests new ones."""
+    with span("cache.news", cache="hit"):
+        return _cached_news(_mtimes([NEWS_DB_PATH]))
+
+
+# cache_resource hands every session the same memory-mapped table; cache_data would pickle a copy
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _cached_feature_panel(mtimes_key):
+    annotate(cache="miss")
+    return open_feature_panel()
+
+
+def get_feature_panel():
+    """The daily feature panel as a memory-mapped pyarrow Table, or None before the first build."""
+    with span("cache.feature_panel", cache="hit"):
+        return _cached_feature_panel(_mtimes([FEATURE_PANEL_PATH]))
+
+
+def get_refresh_state():
+    """Per-task outcome of the worker's last runs (cheap JSON read, not cached)."""
+    return load_refresh_state()
+
+
+def invalidate_prices():
+    """Drop cached price frames (otherwise refreshed when the store's mtime changes or the TTL expires)."""
+    _cached_uka_prices.clear()
+    _cached_price_panel.clear()
+    _cached_price_analytics.clear()
+    _cached_contract_analytics.clear()
+    _cached_price_forecast.clear()
+
+
+def invalidate_carbon():
+    _cached_latest_carbon_reading.clear()
+    _cached_carbon_rollup.clear()
+    _cached_lead_lag.clear()
+
+
+# Cached getters made stale by each task the in-app refresh worker runs
+REFRESH_INVALIDATES = {
+    "ice_curve": invalidate_prices,
+    "ice_prices": invalidate_prices,
+    "carbon_intensity": invalidate_carbon,
+    "carbon_rollups": invalidate_carbon,
+    "news": _cached_news.clear,
+    "allocations": _cached_allocation_timeseries.clear,
+}
+
+
+def invalidate_after_refresh(report):
+    """
+    The in-app worker's on_report hook: drop the caches of every task that just
+    succeeded, so the next rerun shows the new data without waiting for the TTL.
+    (Runs of the standalone worker are picked up through the mtime cache keys.)
+    """
+    stale = {REFRESH_INVALIDATES[r["task"]] for r in report["tasks"]
+             if r["status"] == "ok" and r["task"] in REFRESH_INVALIDATES}
+    for invalidate in stale:
+        invalidate()
@@ -0,0 +1,129 @@
+# dashboard/downsample.py
+#
+# Server-side downsampling for long time-series charts. Each series is reduced to a
+# fixed point budget before it is handed to Plotly, so the payload sent to the
+# browser (and the chart's redraw cost) stays the same however long the history gets.
+
+import numpy as np
+import pandas as pd
+
+# ~2 points per horizontal pixel of a full-width chart
+DEFAULT_POINT_BUDGET = 2000
+
+# Visible-range choices offered above long charts; None means the full history
+RANGE_OPTIONS = {
+    "1w": pd.DateOffset(weeks=1),
+    "2w": pd.DateOffset(weeks=2),
+    "1m": pd.DateOffset(months=1),
+    "6m": pd.DateOffset(months=6),
+    "1yr": pd.DateOffset(years=1),
+    "3yr": pd.DateOffset(years=3),
+    "All": None,
+}
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of the `n_out` points that best preserve
+    the visual shape of y(x). The first and last points are always kept.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        # Twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax(x, y, n_out):
+    """
+    Min/max bucketing: the lowest and highest point of each of n_out / 2 equal-count
+    buckets, fully vectorised. Keeps every spike; cheaper than LTTB on huge inputs.
+    """
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    # Pad to a (n_buckets, width) grid so each row is one bucket; padding never wins
+    width = -(-n // n_buckets)
+    padded_low = np.full(n_buckets * width, np.inf)
+    padded_high = np.full(n_buckets * width, -np.inf)
+    padded_low[:n] = y
+    padded_high[:n] = y
+
+    offsets = np.arange(n_buckets) * width
+    lows = offsets + padded_low.reshape(n_buckets, width).argmin(axis=1)
+    highs = offsets + padded_high.reshape(n_buckets, width).argmax(axis=1)
+
+    selected = np.concatenate([lows, highs, [0, n - 1]])
+    return np.unique(selected[selected < n])
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def downsample_frame(df, x_col, y_cols, n_out=DEFAULT_POINT_BUDGET, method="lttb", x_range=None):
+    """
+    Downsample each of `y_cols` independently to at most `n_out` points within the
+    visible `x_range` (start, end), returning long-format rows: x_col, series, value.
+    """
+    if x_range is not None:
+        start, end = x_range
+        mask = pd.Series(True, index=df.index)
+        if start is not None:
+            mask &= df[x_col] >= start
+        if end is not None:
+            mask &= df[x_col] <= end
+        df = df[mask]
+
+    pick = METHODS[method]
+    frames = []
+    for col in y_cols:
+        series = df[[x_col, col]].dropna()
+        if series.empty:
+            continue
+
+        x = series[x_col]
+        x_numeric = (x - x.iloc[0]).dt.total_seconds() if pd.api.types.is_datetime64_any_dtype(x) else x
+        keep = pick(x_numeric.to_numpy(), series[col].to_numpy(), n_out)
+
+        # iloc keeps tz-aware timestamps native instead of materialising Timestamp objects
+        frames.append(pd.DataFrame({
+            x_col: x.iloc[keep].reset_index(drop=True),
+            "series": col,
+            "value": series[col].iloc[keep].to_numpy(),
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=[x_col, "series", "value"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def visible_range(df, x_col, label):
+    """(start, end) for one of RANGE_OPTIONS, anchored at the latest timestamp in `df`."""
+    offset = RANGE_OPTIONS[label]
+    if offset is None or df.empty:
+        return None
+    end = df[x_col].max()
+    return end - offset, end
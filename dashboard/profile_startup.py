@@ -0,0 +1,77 @@
+# dashboard/profile_startup.py
+#
+# Reports how long importing the dashboard (or any module) takes, broken down by
+# top-level package, using the interpreter's own `-X importtime` output. Run it in a
+# fresh process so nothing is already cached:
+#
+#   python dashboard/profile_startup.py                 # import cost of tabs.py
+#   python dashboard/profile_startup.py plotly.express  # any other module
+#   python dashboard/profile_startup.py --budget-ms 1500  # exit 1 if slower
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+DASHBOARD_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = DASHBOARD_DIR.parent
+
+
+def profile_imports(module):
+    """
+    Import `module` in a clean interpreter with -X importtime and return
+    (total_us, {top_level_package: self_us}).
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(DASHBOARD_DIR), str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+
+    per_package = defaultdict(int)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        package = name.split(".")[0]
+
+        per_package[package] += int(self_us)
+        # The module's own top-level entry carries the cumulative time of everything it pulled in
+        if depth == 1 and name == module:
+            total_us = int(cumulative_us)
+
+    return total_us, dict(per_package)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time per package.")
+    parser.add_argument("module", nargs="?", default="tabs")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    total_us, per_package = profile_imports(args.module)
+
+    print(f"⏱️ import {args.module}: {total_us / 1000:.1f} ms\n")
+    print(f"{'package':<30}{'self ms':>10}")
+    ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+    for package, self_us in ranked[: args.top]:
+        print(f"{package:<30}{self_us / 1000:>10.1f}")
+
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"\n❌ Over budget ({args.budget_ms:.0f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
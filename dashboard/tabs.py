@@ -1,55 +1,70 @@
 import sys
-import pandas as pd
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 import streamlit as st
-import matplotlib.pyplot as plt
-import pandas as pd
-from pathlib import Path
-import altair as alt
-import plotly.express as px
-import plotly.graph_objects as go
-
 
-from indicators.carbon_intensity_api import fetch_carbon_intensity, fetch_national_carbon_timeseries, fetch_national_carbon_timeseries_2020
-from indicators.scrape_uka_prices import scrape_and_update_uka_timeseries
-from indicators.production_index import reshape_allocation_timeseries
-from indicators.market_updates import load_market_update_markdown
+# Charting libraries (altair, plotly), python-docx and the data layer
+# (dashboard.data_access, which pulls in pandas, pyarrow and the stores) are imported
+# inside the render function that needs them. The dashboard only runs the selected
+# section, so a page load pays for that section alone. Check with:
+# python dashboard/profile_startup.py
+# Sections only read the local stores; refresh_worker.py does all network fetching.
+from instrumentation import span, traced
 from indicators.policy_data import get_policies
 
 
-def load_combined_uka_prices():
-    # Load your data (replace with your actual logic)
-    df1 = pd.read_csv("data/raw/uka_prices.csv")
-    df2 = pd.read_csv("data/raw/uka_timeseries.csv")
+def _age(timestamp):
+    from datetime import datetime, timezone
+
+    minutes = int((datetime.now(timezone.utc) - datetime.fromisoformat(timestamp)).total_seconds() // 60)
+    if minutes < 60:
+        return f"{minutes} min ago"
+    if minutes < 48 * 60:
+        return f"{minutes // 60} h ago"
+    return f"{minutes // (24 * 60)} days ago"
 
-    combined = pd.concat([df1, df2], ignore_index=True)
 
-    # 🔑 Ensure all dates are consistent datetime type
-    combined["date"] = pd.to_datetime(combined["date"], errors="coerce").dt.date
+def render_freshness(*tasks):
+    """One caption per refresh task: when it last succeeded, and whether the last attempt failed."""
+    from dashboard.data_access import get_refresh_state
 
-    # Now you can safely sort
-    combined = combined.sort_values("date", ascending=True).reset_index(drop=True)
-    return combined
+    state = get_refresh_state()
+    for task in tasks:
+        entry = state.get(task)
+        if not entry:
+            st.caption(f"🕒 {task}: waiting for the first background refresh")
+            continue
 
+        caption = f"🕒 {task}: updated {_age(entry['last_success'])}" if entry.get("last_success") else f"🕒 {task}: never succeeded"
+        if entry.get("status") != "ok":
+            caption += f" · ⚠️ last attempt {_age(entry['last_attempt'])} failed: {entry.get('error')}"
+        st.caption(caption)
+
+
+@traced("tab.prices")
+def render_uka_prices_tab():
+    import altair as alt
+    import pandas as pd
+    from dashboard.data_access import get_price_analytics, get_uka_prices
+    from refresh_worker import request_refresh
 
-def render_uka_prices_tab(_):
     st.header("📈 Historical UKA Prices")
 
-    df = load_combined_uka_prices()
+    df = get_uka_prices()
+    render_freshness("ice_curve", "ice_prices")
 
+    # The scrape runs in the background worker; the chart picks it up on a later rerun
     if st.button("🔄 Fetch Latest UKA Price"):
-        try:
-            scrape_and_update_uka_timeseries()
-            df = load_combined_uka_prices()
-            st.success("✅ Data updated successfully.")
-        except Exception as e:
-            st.error(f"❌ Update failed: {e}")
+        request_refresh("ice_curve")
+        st.info("⏳ Refresh queued — the latest price appears once the background scrape finishes.")
+
+    analytics = get_price_analytics()
 
-    df["SMA_7"] = df["uka_price"].rolling(window=7).mean()
+    with span("chart.prices", rows=len(df)):
+        df["SMA_7"] = pd.to_datetime(df["date"]).map(analytics["sma_7"]).to_numpy()
 
-    # Melt for Altair
-    plot_df = df[["date", "uka_price", "SMA_7"]].melt("date", var_name="Series", value_name="Price")
+        # Melt for Altair
+        plot_df = df[["date", "uka_price", "SMA_7"]].melt("date", var_name="Series", value_name="Price")
 
     color_scale = alt.Scale(domain=["uka_price", "SMA_7"], range=["#1f77b4", "orange"])
 
@@ -77,7 +92,8 @@ def render_uka_prices_tab(_):
 
     chart = (line + points).properties(height=320)
 
-    st.altair_chart(chart, use_container_width=True)
+    with span("render.prices"):
+        st.altair_chart(chart, use_container_width=True)
 
     # ✅ Latest price section
     latest = df.iloc[-1]
@@ -87,40 +103,145 @@ def render_uka_prices_tab(_):
     st.markdown("### Latest Price")
     st.metric(label=f"{latest['date']}", value=f"€{latest['uka_price']:.2f}", delta=f"{delta:.2f}")
 
+    render_price_risk(analytics)
+    render_price_forecast(df)
+
+
+def render_price_risk(analytics):
+    """Volatility, drawdown and z-score of the merged series or a single futures contract."""
+    import altair as alt
+    import pandas as pd
+    from dashboard.data_access import get_contract_analytics
+
+    st.markdown("### Risk & Volatility")
+
+    contracts = get_contract_analytics()
+    choice = st.selectbox("Series", ["Merged UKA price"] + sorted(contracts), key="risk_series")
+    if choice != "Merged UKA price":
+        analytics = contracts[choice]
+
+    if len(analytics) < 2:
+        st.info("Not enough prices yet for volatility and drawdowns.")
+        return
+
+    latest = analytics.iloc[-1]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("EWMA Vol (ann.)", f"{latest['ewma_vol']:.1%}")
+    col2.metric("20d Realised Vol", f"{latest['vol_20']:.1%}" if pd.notna(latest["vol_20"]) else "–")
+    col3.metric("Drawdown", f"{latest['drawdown']:.1%}")
+    col4.metric("30d Z-score", f"{latest['zscore_30']:.2f}" if pd.notna(latest["zscore_30"]) else "–")
+
+    with span("chart.price_risk", rows=len(analytics)):
+        frame = analytics.reset_index()
+        vol_df = frame[["date", "ewma_vol", "vol_20", "vol_60"]].melt("date", var_name="Measure", value_name="Volatility")
+        vol_chart = alt.Chart(vol_df.dropna()).mark_line().encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("Volatility:Q", title="Annualised volatility", axis=alt.Axis(format="%")),
+            color=alt.Color("Measure:N", title="Measure"),
+            tooltip=[alt.Tooltip("date:T", title="Date"), alt.Tooltip("Volatility:Q", format=".1%"), "Measure:N"],
+        ).properties(height=220)
+
+        drawdown_chart = alt.Chart(frame).mark_area(opacity=0.4, color="crimson").encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("drawdown:Q", title="Drawdown from peak", axis=alt.Axis(format="%")),
+            tooltip=[alt.Tooltip("date:T", title="Date"), alt.Tooltip("drawdown:Q", title="Drawdown", format=".1%")],
+        ).properties(height=160)
+
+    with span("render.price_risk"):
+        st.altair_chart(vol_chart, use_container_width=True)
+        st.altair_chart(drawdown_chart, use_container_width=True)
+
+
+def render_price_forecast(prices):
+    """Forecast band from the latest stored fit (fitted by the refresh worker, never here)."""
+    import altair as alt
+    import pandas as pd
+    from dashboard.data_access import get_price_forecast
+
+    st.markdown("### 🔮 Price Forecast")
+    forecast, meta, backtest = get_price_forecast()
+    render_freshness("price_forecast")
+
+    if forecast is None:
+        st.info("No forecast fitted yet — the background refresh fits one after the next price update.")
+        return
+
+    st.caption(
+        f"Prophet fit on {meta['rows']} prices up to {meta['last_date']} "
+        f"({meta['fit_seconds']:.1f}s), {meta['horizon']} trading days ahead"
+    )
+
+    with span("chart.price_forecast", rows=len(forecast)):
+        history = prices.assign(date=pd.to_datetime(prices["date"])).tail(180)
+        future = forecast[forecast["date"] >= history["date"].iloc[0]]
+
+        band = alt.Chart(future).mark_area(opacity=0.25, color="orange").encode(
+            x=alt.X("date:T", title="Date"),
+            y=alt.Y("yhat_lower:Q", title="€ Price"),
+            y2="yhat_upper:Q",
+        )
+        fitted = alt.Chart(future).mark_line(color="orange", strokeDash=[4, 3]).encode(
+            x="date:T",
+            y="yhat:Q",
+            tooltip=[
+                alt.Tooltip("date:T", title="Date", format="%m/%d/%Y"),
+                alt.Tooltip("yhat:Q", title="Forecast", format=".2f"),
+                alt.Tooltip("yhat_lower:Q", title="Low", format=".2f"),
+                alt.Tooltip("yhat_upper:Q", title="High", format=".2f"),
+            ],
+        )
+        actual = alt.Chart(history).mark_line(color="#1f77b4").encode(x="date:T", y="uka_price:Q")
+
+    with span("render.price_forecast"):
+        st.altair_chart((band + fitted + actual).properties(height=320), use_container_width=True)
+
+    if backtest is not None:
+        with st.expander(f"Backtest: {len(backtest)} rolling-origin folds"):
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Mean MAE", f"€{backtest['mae'].mean():.2f}")
+            col2.metric("Last-price MAE", f"€{backtest['naive_mae'].mean():.2f}")
+            col3.metric("Band coverage", f"{backtest['coverage'].mean():.0%}")
+            st.dataframe(backtest, use_container_width=True, hide_index=True)
+
 
 # Carbon Intensity tab
+@traced("tab.carbon")
 def render_carbon_tab():
-    import pandas as pd
     import plotly.express as px
+    from dashboard.data_access import get_carbon_rollup, get_live_carbon_intensity
+    from dashboard.downsample import downsample_frame, visible_range
 
     st.subheader("🌍 UK Carbon Intensity")
 
-    # 🔹 LIVE SNAPSHOT
-    intensity = fetch_carbon_intensity()
+    # 🔹 LATEST STORED READING (kept current by the background refresh worker)
+    intensity = get_live_carbon_intensity()
     if intensity["actual"] is not None:
         st.metric("Actual Intensity (gCO₂/kWh)", intensity["actual"])
         st.metric("Forecast Intensity (gCO₂/kWh)", intensity["forecast"])
         st.text(f"Intensity Index: {intensity['index']}")
+        st.caption(f"Half hour from {intensity['from']:%Y-%m-%d %H:%M} UTC")
     else:
-        st.warning("Could not fetch carbon intensity data at this time.")
+        st.warning("No carbon intensity readings stored yet.")
+    render_freshness("carbon_intensity", "carbon_rollups")
 
     st.markdown("---")
 
     # 🔹 HISTORICAL NATIONAL TIME SERIES
     st.subheader("📈 Historical Carbon Intensity Since Jan 1, 2025")
-    with st.spinner("Fetching time series..."):
-        df = fetch_national_carbon_timeseries()
+    # 12h & 30d smoothing, pre-computed at sync time
+    df = get_carbon_rollup("rolling", "2025-01-01")
 
     if not df.empty:
-        df["from"] = pd.to_datetime(df["from"])
-        df = df.set_index("from").sort_index()
-
-        # 12h & 30d smoothing
-        df["12h_avg"] = df["actual"].rolling("12h").mean()
-        df["30d_avg"] = df["actual"].rolling("30d").mean()
-
         df_plot = df[["12h_avg", "30d_avg"]].dropna().reset_index()
-        df_melted = df_plot.melt(id_vars="from", var_name="Smoothing", value_name="Intensity")
+
+        # The visible range is chosen here and each series is downsampled to a fixed
+        # point budget for it, so the chart payload doesn't grow with the history
+        range_label = st.radio("Range", ["1w", "2w", "1m", "All"], index=3, horizontal=True, key="carbon_2025_range")
+        with span("chart.carbon_2025.downsample", rows=len(df_plot)):
+            df_melted = downsample_frame(
+                df_plot, "from", ["12h_avg", "30d_avg"],
+                x_range=visible_range(df_plot, "from", range_label)
+            ).rename(columns={"series": "Smoothing", "value": "Intensity"})
 
         fig = px.line(
             df_melted,
@@ -138,45 +259,36 @@ def render_carbon_tab():
             margin=dict(l=40, r=40, t=40, b=20),
             legend_title_text="Rolling Avg",
             template="plotly_white",
-            xaxis=dict(
-                rangeselector=dict(
-                    buttons=[
-                        dict(count=7, label="1w", step="day", stepmode="backward"),
-                        dict(count=14, label="2w", step="day", stepmode="backward"),
-                        dict(count=1, label="1m", step="month", stepmode="backward"),
-                        dict(step="all")
-                    ]
-                ),
-                rangeslider=dict(visible=True),  # 👈 this enables the horizontal slider!
-                type="date"
-            )
+            xaxis=dict(type="date")
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        with span("render.carbon_2025", rows=len(df_melted)):
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("No historical data could be loaded.")
 
     # SECOND - LONGER HISTORICAL GRAPH
     st.subheader("📈 Historical Carbon Intensity Since Jan 1, 2020")
-    with st.spinner("Fetching time series..."):
-        df = fetch_national_carbon_timeseries_2020()
+    # 48h & 30d rolling averages, pre-computed at sync time
+    df = get_carbon_rollup("rolling", "2020-01-01")
 
     if not df.empty:
-        df["from"] = pd.to_datetime(df["from"])
-        df = df.set_index("from").sort_index()
-
-        # Create rolling averages
-        df["48h_avg"] = df["actual"].rolling("48h").mean()
-        df["30d_avg"] = df["actual"].rolling("30D").mean()
-
         # Drop NaNs introduced by rolling
         df_plot = df[["48h_avg", "30d_avg"]].dropna().reset_index()
 
+        range_label = st.radio("Range", ["6m", "1yr", "3yr", "All"], index=3, horizontal=True, key="carbon_2020_range")
+        with span("chart.carbon_2020.downsample", rows=len(df_plot)):
+            df_plot = downsample_frame(
+                df_plot, "from", ["48h_avg", "30d_avg"],
+                x_range=visible_range(df_plot, "from", range_label)
+            ).rename(columns={"series": "variable"})
+
         # Plot with both lines
         fig = px.line(
             df_plot,
             x="from",
-            y=["48h_avg", "30d_avg"],
+            y="value",
+            color="variable",
             title="📉 Historical Carbon Intensity (48h & 30d Avg) – Since Jan 1, 2020",
             labels={
                 "from": "Date",
@@ -191,28 +303,21 @@ def render_carbon_tab():
             yaxis_title="Carbon Intensity (gCO₂/kWh)",
             margin=dict(l=40, r=40, t=40, b=20),
             template="plotly_white",
-            xaxis=dict(
-                rangeselector=dict(
-                    buttons=[
-                        dict(count=6, label="6m", step="month", stepmode="backward"),
-                        dict(count=1, label="1yr", step="year", stepmode="backward"),
-                        dict(count=3, label="3yr", step="year", stepmode="backward"),
-                        dict(step="all")
-                    ]
-                ),
-                rangeslider=dict(visible=True),
-                type="date"
-            )
+            xaxis=dict(type="date")
         )
 
-        st.plotly_chart(fig, use_container_width=True)
+        with span("render.carbon_2020", rows=len(df_plot)):
+            st.plotly_chart(fig, use_container_width=True)
     else:
         st.warning("No historical data could be loaded.")
 
 
 # News tab (consolidated version)
 
+@traced("tab.news")
 def render_news_tab():
+    from dashboard.data_access import get_market_update_corpus, get_news
+
     st.subheader("📲 Policy & Market News")
 
     news_tabs = st.tabs([
@@ -231,7 +336,7 @@ def render_news_tab():
             st.write(policy["description"])
             st.write(f"**Status:** {policy.get('status', 'N/A')} | **Last Updated:** {policy.get('last_updated', 'N/A')}")
 
-            excluded_keys = {"title", "description", "status", "last_updated", "search_url"}
+            excluded_keys = {"title", "description", "status", "last_updated", "search_url", "events"}
             for key, value in policy.items():
                 if key not in excluded_keys:
                     if isinstance(value, str) and value.startswith("http"):
@@ -248,92 +353,310 @@ def render_news_tab():
     with news_tabs[1]:
         st.markdown("### 🗞️ UKA Monthly Market Updates")
 
-        newsletter_files = {
-            "February 2025": "data/market_updates/UKA_Market_Update_February_2025.docx",
-            "March 2025": "data/market_updates/UKA Market Update - March 2025.docx"
-        }
+        from indicators.market_update_corpus import list_documents, search
 
-        selected_month = st.selectbox("Select a month:", list(newsletter_files.keys()))
-
-        if selected_month:
-            doc_path = newsletter_files[selected_month]
-            try:
-                markdown_content = load_market_update_markdown(doc_path)
-                st.markdown(markdown_content)
-            except Exception as e:
-                st.error(f"Could not load market update: {e}")
+        try:
+            corpus = get_market_update_corpus()
+        except Exception as e:
+            st.error(f"Could not load market updates: {e}")
+            corpus = None
+
+        if corpus is not None and corpus["documents"]:
+            query = st.text_input("🔍 Search all updates", placeholder='e.g. "auction supply"')
+
+            if query.strip():
+                results = search(corpus, query)
+                st.caption(f"{len(results)} matching paragraphs")
+                for result in results:
+                    st.markdown(f"**{result['title']}** · {result['section'] or 'Introduction'}")
+                    st.markdown(f"> {result['text']}")
+            else:
+                # Every DOCX in data/market_updates/, newest month first
+                documents = dict(list_documents(corpus))
+                selected_doc = st.selectbox("Select a month:", list(documents), format_func=documents.get)
+                if selected_doc:
+                    st.markdown(corpus["documents"][selected_doc]["markdown"])
+        elif corpus is not None:
+            st.info("No market updates found in data/market_updates/.")
 
     # Tab 3 – UKA Players + Google Search Links
     with news_tabs[2]:
+        import pandas as pd
+        from indicators.news_feed import NEWS_QUERIES, google_search_url
+
         st.markdown("### 🏭 News on Major UKA Buyers & Industries")
+        render_freshness("news")
+
+        news = get_news()
+        if news.empty:
+            st.info("No stories stored yet — the background refresh fetches them hourly.")
+        else:
+            tracked = st.multiselect("Companies / sectors", list(NEWS_QUERIES), default=list(NEWS_QUERIES))
+            days = st.slider("Days of history", 7, 365, 30)
+
+            cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(days=days)
+            mask = news["published"] >= cutoff
+            if tracked:
+                mask &= news["queries"].str.split(", ").apply(lambda qs: bool(set(qs) & set(tracked)))
+            shown = news[mask]
+
+            st.caption(f"{len(shown)} stories (of {len(news)} stored)")
+            for story in shown.head(100).itertuples():
+                published = story.published.strftime("%d %b %Y") if pd.notna(story.published) else "Unknown Date"
+                st.markdown(f"**[{story.title}]({story.link})**  \n{story.source} · {published} · _{story.queries}_")
 
         st.markdown("---")
         st.markdown("### 🔎 Live Google Search Links")
         st.info("RSS Feed often lags considerably. The below open Google with live news results for top companies and emitting sectors.")
 
-        search_links = {
-            "Tata Steel UK Limited": "https://www.google.com/search?q=Tata+Steel+UK+news",
-            "British Steel Limited": "https://www.google.com/search?q=British+Steel+news",
-            "Phillips 66 Limited": "https://www.google.com/search?q=Phillips+66+news",
-            "Oil Refining News": "https://www.google.com/search?q=UK+oil+refining+industry+news",
-            "Cement Industry News": "https://www.google.com/search?q=UK+cement+industry+news",
-            "Combustion of Fuels News": "https://www.google.com/search?q=UK+combustion+of+fuels+industry+news"
-        }
+        # Same companies / sectors the news ingestion tracks
+        search_links = {label: google_search_url(query) for label, query in NEWS_QUERIES.items()}
 
         for label, url in search_links.items():
             st.markdown(f"🔗 [**{label}**]({url})")
 
 
 #Overlay tab 
-def overlays_tab(df):
+@traced("tab.overlays")
+def overlays_tab():
+    from dashboard.data_access import get_uka_prices
+    from indicators.event_study import add_user_event, build_event_table
+
     st.subheader("🧩 Overlays")
 
+    # Policy-tracker events plus any the user has added
+    events = build_event_table()
+
     overlay_options = [
-        "UKA vs EU Linkage Announcement" 
+        "UKA vs Policy Events",
+        "Event Study: Abnormal Returns",
+        "UKA vs Carbon Intensity: Lead-Lag",
+        "Feature Panel",
     ]
     selected_overlay = st.selectbox("Choose an overlay", overlay_options)
 
-    if selected_overlay == "UKA vs EU Linkage Announcement":
-        render_uka_vs_policy_overlay(df)
+    if selected_overlay == "UKA vs Policy Events":
+        render_uka_vs_policy_overlay(get_uka_prices(), events)
+    elif selected_overlay == "Event Study: Abnormal Returns":
+        render_event_study(events)
+    elif selected_overlay == "UKA vs Carbon Intensity: Lead-Lag":
+        render_lead_lag()
+    elif selected_overlay == "Feature Panel":
+        render_feature_panel()
 
+    with st.expander("➕ Add an event"):
+        with st.form("add_event", clear_on_submit=True):
+            event_date = st.date_input("Date")
+            event_label = st.text_input("Event")
+            if st.form_submit_button("Add") and event_label.strip():
+                add_user_event(event_date, event_label.strip())
+                st.rerun()
 
-    plt.style.use("ggplot")
+    st.dataframe(events, use_container_width=True, hide_index=True)
 
-def render_uka_vs_policy_overlay(df):
-    import matplotlib.pyplot as plt
-    import matplotlib.dates as mdates
-    import pandas as pd
-
-    eu_linkage_announcement = pd.to_datetime("2025-01-28") #Source: https://www.reuters.com/sustainability/climate-energy/uk-carbon-prices-close-135-higher-eu-linking-talks-report-2025-01-28/
-    eu_linkage_update = pd.to_datetime("2025-03-20") #Source: https://carbon-pulse.com/380168/
-
-    fig, ax = plt.subplots(figsize=(6, 2.5), dpi=150)
-    ax.plot(df["date"], df["uka_price"], label="UKA Price", color="steelblue", linewidth=1.5)
-    ax.axvline(eu_linkage_announcement, color="green", linestyle="--", linewidth=2, label="Possible Linkage Announced")
-    ax.axvline(eu_linkage_update, color="orange", linestyle="--", linewidth=2, label="EU Linkage Update")
 
-    ax.set_xlabel("Date", fontsize=9)
-    ax.set_ylabel("UKA Price (€)", fontsize=9)
-    ax.set_title("UKA Prices vs Policy Events", fontsize=11)
-    ax.legend(fontsize=8)
-    ax.tick_params(axis="both", labelsize=8)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
-    ax.tick_params(axis="x", rotation=45)
-
-    fig.tight_layout(pad=2)
-    st.pyplot(fig, use_container_width=True)
+def render_uka_vs_policy_overlay(df, events):
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    prices = df.assign(date=pd.to_datetime(df["date"]))
+    low, high = prices["uka_price"].min(), prices["uka_price"].max()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=prices["date"], y=prices["uka_price"], name="UKA Price", line=dict(color="steelblue", width=1.5)))
+
+    # All event markers as one trace of vertical segments separated by gaps
+    n_events = len(events)
+    fig.add_trace(go.Scatter(
+        x=events["date"].repeat(3).to_numpy(),
+        y=[low, high, None] * n_events,
+        text=events["event"].repeat(3).to_numpy(),
+        mode="lines",
+        name="Policy events",
+        line=dict(color="orange", dash="dash", width=2),
+        hovertemplate="%{x|%b %d, %Y}<br>%{text}<extra></extra>",
+    ))
+
+    fig.update_layout(
+        title="UKA Prices vs Policy Events",
+        xaxis_title="Date",
+        yaxis_title="UKA Price (€)",
+        height=400,
+        margin=dict(l=40, r=40, t=40, b=20),
+        template="plotly_white",
+    )
+    with span("render.overlay", rows=n_events):
+        st.plotly_chart(fig, use_container_width=True)
 
     st.markdown(
         "📝 *This chart visualizes how UKA prices moved in response to policy announcements. "
-        "The dashed lines mark policy updates."
+        "The dashed lines mark policy updates; hover over a line for the event."
         "Update on March 20, 2025: The UK government formally confirmed it is considering the case for linking the country's carbon market to the EU ETS in an update published late on Thursday.*"""
         "However, the UK government cautioned that this does not anticipate any outcome of key talks in May with the block.*"
     )
 
+
+def render_event_study(events):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from dashboard.data_access import get_price_panel
+    from indicators.event_study import average_car, event_study
+
+    panel = get_price_panel()
+    if panel.empty or events.empty:
+        st.info("Need stored prices and at least one event for an event study.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    pre = col1.slider("Days before", 1, 60, 10)
+    post = col2.slider("Days after", 1, 60, 10)
+    estimation = col3.slider("Estimation window (days)", 10, 250, 60)
+
+    series = st.multiselect("Price series", list(panel.columns), default=["merged"])
+    labels = events["date"].dt.strftime("%Y-%m-%d") + " · " + events["event"]
+    chosen = st.multiselect("Events", list(labels), default=list(labels))
+    if not series or not chosen:
+        return
+
+    selected = events[labels.isin(chosen)].reset_index(drop=True)
+    paths, summary = event_study(panel[series], selected["date"], pre=pre, post=post, estimation=estimation)
+
+    # Average cumulative abnormal return across events, ± 2 standard errors
+    mean_car = average_car(paths)
+    fig = go.Figure()
+    for name, group in mean_car.groupby("series"):
+        band = 2 * group["stderr"].fillna(0)
+        fig.add_trace(go.Scatter(
+            x=list(group["offset"]) + list(group["offset"][::-1]),
+            y=list(group["mean"] + band) + list((group["mean"] - band)[::-1]),
+            fill="toself", opacity=0.2, line=dict(width=0), showlegend=False, hoverinfo="skip", name=name,
+        ))
+        fig.add_trace(go.Scatter(x=group["offset"], y=group["mean"], name=name, mode="lines+markers"))
+    fig.add_vline(x=0, line_dash="dash", line_color="orange")
+    fig.update_layout(
+        title=f"Average CAR across {len(selected)} events",
+        xaxis_title="Trading days relative to event",
+        yaxis_title="Cumulative abnormal log return",
+        height=400,
+        template="plotly_white",
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    summary = summary.merge(selected[["event"]], left_on="event_id", right_index=True)
+    bars = px.bar(
+        summary, x="car", y="event", color="series", barmode="group", orientation="h",
+        title="CAR per event", labels={"car": "CAR (log return)", "event": ""},
+        height=max(300, 30 * len(selected)),
+    )
+    st.plotly_chart(bars, use_container_width=True)
+
+    st.dataframe(
+        summary[["event_day", "event", "series", "car_pre", "car_post", "car", "t_stat", "vol_pre", "vol_post", "vol_ratio"]],
+        use_container_width=True, hide_index=True,
+    )
+
+
+def render_lead_lag():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from dashboard.data_access import get_lead_lag
+
+    col1, col2, col3 = st.columns(3)
+    window = col1.slider("Rolling window (trading days)", 20, 250, 90)
+    max_lag = col2.slider("Max lag (trading days)", 1, 30, 10)
+    transform = col3.radio("Compare", ["changes", "levels"], horizontal=True,
+                           help="Daily log changes (default) or raw levels, which share trends")
+
+    try:
+        result = get_lead_lag(window, -max_lag, max_lag, transform)
+    except ValueError as e:
+        st.info(f"Not enough overlapping price and intensity history yet: {e}")
+        return
+
+    best = result["best_lag"]
+    if best is None:
+        st.info("Prices or intensity don't vary over the overlapping days, so there is nothing to correlate.")
+        return
+
+    xcorr = result["xcorr"].reset_index()
+    st.caption(
+        f"{len(result['aligned'])} common days. Positive lags: intensity leads the price. "
+        f"Strongest correlation at lag {best} ({result['xcorr'][best]:+.2f})."
+    )
+
+    with span("chart.lead_lag", rows=len(result["aligned"])):
+        bars = px.bar(
+            xcorr, x="lag", y="correlation", title="Cross-correlation by lag",
+            labels={"lag": "Lag (trading days)", "correlation": "Correlation"}, height=320,
+        )
+
+        rolling = result["rolling"]
+        fig = go.Figure()
+        for lag in sorted({0, best}):
+            fig.add_trace(go.Scatter(x=rolling.index, y=rolling[lag], name=f"lag {lag}", mode="lines"))
+        fig.add_hline(y=0, line_color="grey", line_width=1)
+        fig.update_layout(
+            title=f"{window}-day rolling correlation",
+            xaxis_title="Date",
+            yaxis_title="Correlation",
+            height=350,
+            template="plotly_white",
+        )
+
+    with span("render.lead_lag"):
+        st.plotly_chart(bars, use_container_width=True)
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def render_feature_panel():
+    import plotly.graph_objects as go
+    from analysis.feature_panel import feature_columns, panel_frame
+    from dashboard.data_access import get_feature_panel
+
+    panel = get_feature_panel()
+    render_freshness("feature_panel")
+    if panel is None:
+        st.info("The feature panel hasn't been built yet — the background refresh builds it every few hours.")
+        return
+
+    columns = feature_columns(panel)
+    defaults = [c for c in ("uka_price", "intensity_mean") if c in columns]
+    selected = st.multiselect("Features", columns, default=defaults)
+    normalise = st.checkbox("Rebase to 100 at first value", value=len(selected) > 1)
+    if not selected:
+        return
+
+    # Zero-copy view of the memory-mapped columns; only the selected ones are paged in
+    frame = panel_frame(panel, selected)
+
+    with span("chart.feature_panel", rows=len(frame)):
+        fig = go.Figure()
+        for name in selected:
+            series = frame[name].dropna()
+            if normalise and not series.empty and series.iloc[0] != 0:
+                series = 100 * series / series.iloc[0]
+            fig.add_trace(go.Scatter(x=series.index, y=series, name=name, mode="lines"))
+        fig.update_layout(
+            title="Daily feature panel",
+            xaxis_title="Date",
+            yaxis_title="Rebased (first value = 100)" if normalise else "Value",
+            height=420,
+            template="plotly_white",
+        )
+
+    with span("render.feature_panel"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{panel.num_rows} days × {len(columns)} features")
+
+
+@traced("tab.industrial_output")
 def render_industrial_output_tab():
+    import plotly.express as px
+    from dashboard.data_access import get_allocation_timeseries
+
     st.subheader("🏭 UK ETS Allocation Time Series")
 
-    companies_long, industries_long = reshape_allocation_timeseries()
+    companies_long, industries_long = get_allocation_timeseries()
 
     company_tab, industry_tab = st.tabs(["🏢 Top 10 Companies", "🏗️ Top 10 Industries"])
 
@@ -409,4 +732,39 @@ def render_industrial_output_tab():
             markers=True,
             title="ETS Allocation Over Time – Top 3 Industries"
         )
-        st.plotly_chart(fig4, use_container_width=True)
\ No newline at end of file
+        st.plotly_chart(fig4, use_container_width=True)
+
+
+def render_diagnostics_tab(run_id):
+    import pandas as pd
+    from instrumentation import SPAN_LOG_PATH, disable_export, enable_export, export_path, recent_spans
+
+    st.subheader("🩺 Diagnostics")
+
+    spans = pd.DataFrame(recent_spans(run_id))
+    if spans.empty:
+        st.info("No spans recorded for this rerun yet.")
+        return
+
+    # Spans are stored as they finish (children first); show them in call order
+    spans = spans.sort_values("started_at", kind="stable").reset_index(drop=True)
+    st.markdown(f"**Rerun** `{run_id}` — {len(spans)} spans")
+
+    # Top-level spans are the tabs; their durations add up to the rerun
+    top = spans[spans["depth"] == 0]
+    st.bar_chart(top.set_index("name")["seconds"])
+
+    columns = [c for c in ["name", "depth", "seconds", "rows", "bytes", "cache", "status", "error", "thread"] if c in spans]
+    table = spans[columns].copy()
+    table["name"] = ["  " * d + n for d, n in zip(spans["depth"], spans["name"])]
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+    if "cache" in spans:
+        cached = spans.dropna(subset=["cache"])
+        st.markdown(f"**Cache:** {(cached['cache'] == 'hit').sum()} hits, {(cached['cache'] == 'miss').sum()} misses")
+
+    exporting = st.checkbox(f"Append spans to {SPAN_LOG_PATH.name}", value=export_path() is not None, key="diagnostics_export")
+    if exporting and export_path() is None:
+        enable_export()
+    elif not exporting and export_path() is not None:
+        disable_export()
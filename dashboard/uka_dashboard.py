@@ -1,3 +1,4 @@
+import os
 import sys
 from pathlib import Path
 import streamlit as st
@@ -10,27 +11,47 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 # ✅ Now import tabs after sys.path is set
 from tabs import (
-    load_combined_uka_prices,  # ✅ newly added function
     render_uka_prices_tab,
     render_carbon_tab,
     render_news_tab,
     render_industrial_output_tab,
-    overlays_tab
+    overlays_tab,
+    render_diagnostics_tab,
 )
-# Load UKA price data
-DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "raw" / "uka_prices.csv"
-df = load_combined_uka_prices()
-
-tabs = st.tabs([
-    "📈 UKA Prices",
-    " Live UK Carbon Intensity Data",
-    " Policy & Market News",
-    " Industrial Output",
-    " Overlays"
-])
-
-with tabs[0]: render_uka_prices_tab(df)
-with tabs[1]: render_carbon_tab()
-with tabs[2]: render_news_tab()
-with tabs[3]: render_industrial_output_tab()
-with tabs[4]: overlays_tab(df)
\ No newline at end of file
+from instrumentation import start_run
+from refresh_worker import start_background_worker
+
+
+def _invalidate_after_refresh(report):
+    # Imported on the worker thread, so a page load doesn't pull in the data layer
+    from dashboard.data_access import invalidate_after_refresh
+
+    invalidate_after_refresh(report)
+
+
+# Sources are refreshed on a background thread (one per process); page loads only read the local stores
+start_background_worker(on_report=_invalidate_after_refresh)
+
+# Every rerun gets its own id so the Diagnostics panel can show just this rerun's spans
+run_id = start_run("rerun")
+
+# Hidden unless opened with ?diagnostics=1 or UKA_DIAGNOSTICS=1
+show_diagnostics = st.query_params.get("diagnostics") == "1" or os.environ.get("UKA_DIAGNOSTICS") == "1"
+
+# Only the selected section runs (st.tabs would run every tab body on each rerun), so a
+# page load only imports and reads what that section shows
+sections = {
+    "📈 UKA Prices": render_uka_prices_tab,
+    " Live UK Carbon Intensity Data": render_carbon_tab,
+    " Policy & Market News": render_news_tab,
+    " Industrial Output": render_industrial_output_tab,
+    " Overlays": overlays_tab,
+}
+
+section = st.radio("Section", list(sections), horizontal=True, label_visibility="collapsed", key="section")
+sections[section]()
+
+# Rendered last so it sees every span of this rerun
+if show_diagnostics:
+    with st.expander("🩺 Diagnostics"):
+        render_diagnostics_tab(run_id)
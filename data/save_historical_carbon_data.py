@@ -1,13 +1,9 @@
-import pandas as pd
-from indicators.carbon_intensity_api import fetch_national_carbon_timeseries_2020
+from indicators.carbon_store import CARBON_STORE_PATH, sync_carbon_history
 
-print("📥 Fetching carbon intensity data from 2020 to today...")
-df = fetch_national_carbon_timeseries_2020(start_date="2020-01-01")
+# Seeds (or resumes) the partitioned carbon intensity store under data/processed/.
+# Safe to re-run: only periods newer than the last stored one are fetched.
+print("📥 Syncing carbon intensity data from 2020 to today...")
+rows = sync_carbon_history()
 
-print("📥 Fetching carbon intensity data from 2020 to today...")
-df = fetch_national_carbon_timeseries_2020(start_date="2020-01-01")
-
-print("💾 Saving to file: data/carbon_intensity_2020_to_latest.parquet")
-df.to_parquet("data/carbon_intensity_2020_to_latest.parquet")
-
-print("✅ Done! Historical carbon intensity saved.")
+print(f"💾 Store location: {CARBON_STORE_PATH}")
+print(f"✅ Done! {rows} new half-hourly periods saved.")
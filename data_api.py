@@ -0,0 +1,473 @@
+# data_api.py
+#
+# Read-only HTTP API over the local stores, for other desks that want the series
+# without going through Streamlit. It only reads what the pipeline / refresh worker
+# has stored, so any number of clients can poll without touching ICE or the carbon
+# API. Every response carries an ETag derived from the backing files' size and mtime,
+# so a conditional GET for unchanged data is answered with 304 before anything is
+# read; rendered bodies are also kept in a small in-memory cache.
+#
+#   python data_api.py                    # serve on http://127.0.0.1:8765
+#   curl 'http://127.0.0.1:8765/api/prices?start=2025-01-01&resolution=weekly'
+#   curl -H 'Accept: text/csv' 'http://127.0.0.1:8765/api/intensity?resolution=daily'
+#
+# Endpoints (all GET / HEAD; `start` inclusive and `end` exclusive, YYYY-MM-DD):
+#   /api                 list of datasets and their parameters
+#   /api/prices          merged UKA price, or one source (?source=ice_chart); resolution daily|weekly|monthly
+#   /api/curve           futures curve (?contract=Dec-26); resolution daily|weekly|monthly
+#   /api/intensity       national intensity; resolution halfhour|hourly|daily|weekly|monthly
+#   /api/regional        regional intensity and mix (?region=London, repeatable); half-hourly
+#   /api/generation      national generation mix; half-hourly
+#
+# Formats: JSON (default), CSV or Arrow IPC stream, chosen from the Accept header or
+# ?format=json|csv|arrow. Responses are gzipped when the client accepts it.
+
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from instrumentation import annotate, span
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_AGE_SECONDS = 60
+GZIP_MIN_BYTES = 1024
+# Response cache budget (bodies plus their gzipped forms). Larger bodies, e.g. the
+# full half-hourly history, are rendered per request rather than cached.
+MAX_CACHED_BYTES = 64 * 1024 * 1024
+MAX_CACHED_BODY_BYTES = 8 * 1024 * 1024
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+ACCEPT_TO_FORMAT = {
+    "application/json": "json",
+    "text/csv": "csv",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+# Price / curve resolutions, labelled like the carbon rollups (weeks start on Monday)
+PRICE_RESOLUTIONS = {
+    "weekly": dict(freq="W-MON", label="left", closed="left"),
+    "monthly": dict(freq="MS"),
+}
+INTENSITY_RESOLUTIONS = ["halfhour", "hourly", "daily", "weekly", "monthly"]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _date(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return pd.Timestamp(value).strftime("%Y-%m-%d")
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a date (YYYY-MM-DD), got '{value}'")
+
+
+def _choice(params, name, options, default):
+    value = params.get(name, default)
+    if value not in options:
+        raise BadRequest(f"'{name}' must be one of {', '.join(options)}, got '{value}'")
+    return value
+
+
+def _ohlc(df, date_col, value_col, resolution, by=None):
+    """Open / high / low / close / mean per bucket (optionally per group)."""
+    if resolution == "daily" or df.empty:
+        return df
+
+    df = df.assign(**{date_col: pd.to_datetime(df[date_col])})
+    keys = [pd.Grouper(key=date_col, **PRICE_RESOLUTIONS[resolution])] + ([by] if by else [])
+    grouped = df.groupby(keys, observed=True)[value_col]
+    out = grouped.agg(open="first", high="max", low="min", close="last", mean="mean", count="count")
+    return out[out["count"] > 0].reset_index()
+
+
+# --- datasets ----------------------------------------------------------------------
+# Each dataset declares its query parameters, the files its answer depends on (for the
+# ETag) and a loader returning a DataFrame.
+
+def _partition_files(root):
+    from indicators.carbon_store import list_partitions
+
+    return list_partitions(root)
+
+
+def prices_files(params):
+    from indicators.price_store import PRICE_DB_PATH, PRICE_FILES
+
+    return [*PRICE_FILES, PRICE_DB_PATH.with_name(PRICE_DB_PATH.name + "-wal")]
+
+
+def load_prices(params):
+    from indicators.price_store import SOURCE_PRECEDENCE, load_merged_prices, query
+
+    source = _choice(params, "source", ["merged"] + list(SOURCE_PRECEDENCE), "merged")
+    resolution = _choice(params, "resolution", ["daily"] + list(PRICE_RESOLUTIONS), "daily")
+    start, end = _date(params, "start"), _date(params, "end")
+    # The price store's end date is inclusive
+    inclusive_end = (pd.Timestamp(end) - pd.Timedelta(days=1)).strftime("%Y-%m-%d") if end else None
+
+    if source == "merged":
+        df = load_merged_prices(start, inclusive_end)
+    else:
+        df = query(source, start, inclusive_end)
+    return _ohlc(df, "date", "uka_price", resolution)
+
+
+def curve_files(params):
+    from indicators.futures_curve import CURVE_PATH
+
+    return [CURVE_PATH]
+
+
+def load_curve_series(params):
+    from indicators.futures_curve import load_curve
+
+    resolution = _choice(params, "resolution", ["daily"] + list(PRICE_RESOLUTIONS), "daily")
+    start, end = _date(params, "start"), _date(params, "end")
+
+    curve = load_curve()
+    curve["contract"] = curve["contract"].astype(str)
+    if start:
+        curve = curve[curve["date"] >= start]
+    if end:
+        curve = curve[curve["date"] < end]
+    if params.get("contract"):
+        curve = curve[curve["contract"].isin(params.get_all("contract"))]
+
+    if resolution == "daily":
+        return curve.reset_index(drop=True)
+    return _ohlc(curve.dropna(subset=["last"]), "date", "last", resolution, by="contract")
+
+
+def intensity_files(params):
+    from indicators.carbon_rollups import ROLLUP_PATH
+    from indicators.carbon_store import CARBON_STORE_PATH
+
+    resolution = _choice(params, "resolution", INTENSITY_RESOLUTIONS, "halfhour")
+    if resolution == "halfhour":
+        return _partition_files(CARBON_STORE_PATH)
+    return [ROLLUP_PATH / f"{resolution}.parquet"]
+
+
+def load_intensity(params):
+    from indicators.carbon_rollups import load_rollup
+    from indicators.carbon_store import load_carbon_history
+
+    resolution = _choice(params, "resolution", INTENSITY_RESOLUTIONS, "halfhour")
+    start, end = _date(params, "start"), _date(params, "end")
+    if resolution == "halfhour":
+        return load_carbon_history(start, end)
+    return load_rollup(resolution, start, end).reset_index()
+
+
+def regional_files(params):
+    from indicators.carbon_mix_store import REGIONAL_STORE_PATH
+
+    return _partition_files(REGIONAL_STORE_PATH)
+
+
+def load_regional(params):
+    from indicators.carbon_mix_store import load_regional_history
+
+    return load_regional_history(_date(params, "start"), _date(params, "end"), regions=params.get_all("region") or None)
+
+
+def generation_files(params):
+    from indicators.carbon_mix_store import GENERATION_STORE_PATH
+
+    return _partition_files(GENERATION_STORE_PATH)
+
+
+def load_generation(params):
+    from indicators.carbon_mix_store import load_generation_mix
+
+    return load_generation_mix(_date(params, "start"), _date(params, "end"))
+
+
+DATASETS = {
+    "prices": dict(
+        files=prices_files, load=load_prices,
+        params={"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "source": "merged|ice_chart|ice_front_december",
+                "resolution": "daily|weekly|monthly"},
+    ),
+    "curve": dict(
+        files=curve_files, load=load_curve_series,
+        params={"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "contract": "e.g. Dec-26 (repeatable)",
+                "resolution": "daily|weekly|monthly"},
+    ),
+    "intensity": dict(
+        files=intensity_files, load=load_intensity,
+        params={"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "resolution": "|".join(INTENSITY_RESOLUTIONS)},
+    ),
+    "regional": dict(
+        files=regional_files, load=load_regional,
+        params={"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "region": "short name (repeatable)"},
+    ),
+    "generation": dict(
+        files=generation_files, load=load_generation,
+        params={"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"},
+    ),
+}
+
+
+# --- encoding ----------------------------------------------------------------------
+
+class QueryParams(dict):
+    """First value per parameter, with get_all() for repeatable ones."""
+
+    def __init__(self, query):
+        self._all = parse_qs(query, keep_blank_values=False)
+        super().__init__({name: values[0] for name, values in self._all.items()})
+
+    def get_all(self, name):
+        return self._all.get(name, [])
+
+    def canonical(self):
+        return "&".join(f"{name}={','.join(sorted(values))}" for name, values in sorted(self._all.items()))
+
+
+def negotiate_format(accept, requested=None):
+    """The response format: ?format= wins, then the first Accept type we can produce, else JSON."""
+    if requested:
+        if requested not in MEDIA_TYPES:
+            raise BadRequest(f"'format' must be one of {', '.join(MEDIA_TYPES)}, got '{requested}'")
+        return requested
+
+    ranked = []
+    for position, part in enumerate((accept or "").split(",")):
+        media, *options = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for option in options:
+            if option.startswith("q="):
+                try:
+                    quality = float(option[2:])
+                except ValueError:
+                    quality = 0.0
+        if media in ACCEPT_TO_FORMAT and quality > 0:
+            ranked.append((-quality, position, ACCEPT_TO_FORMAT[media]))
+    return min(ranked)[2] if ranked else "json"
+
+
+def encode(df, fmt):
+    if fmt == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return df.to_json(orient="records", date_format="iso", date_unit="s").encode("utf-8")
+
+
+def source_state(paths):
+    """(etag seed, last modified epoch seconds) from the size and mtime of each existing file."""
+    state, latest = [], 0.0
+    for path in paths:
+        path = Path(path)
+        if path.exists():
+            stat = path.stat()
+            state.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+            latest = max(latest, stat.st_mtime)
+    return "|".join(state), latest
+
+
+# --- server ------------------------------------------------------------------------
+
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+_responses_bytes = 0
+
+
+def _evict():
+    # Caller holds _responses_lock
+    global _responses_bytes
+    while _responses and _responses_bytes > MAX_CACHED_BYTES:
+        _, entry = _responses.popitem(last=False)
+        entry["cached"] = False
+        _responses_bytes -= len(entry["body"]) + len(entry["gzip"] or b"")
+
+
+def _cached_response(etag, build):
+    """Body for an ETag, rendering it once; the cache is LRU, bounded by total bytes."""
+    global _responses_bytes
+    with _responses_lock:
+        if etag in _responses:
+            _responses.move_to_end(etag)
+            return _responses[etag]
+
+    body = build()
+    entry = {"body": body, "gzip": None, "cached": False}
+    if len(body) > MAX_CACHED_BODY_BYTES:
+        return entry
+
+    with _responses_lock:
+        if etag in _responses:  # rendered concurrently by another request
+            return _responses[etag]
+        entry["cached"] = True
+        _responses[etag] = entry
+        _responses_bytes += len(body)
+        _evict()
+    return entry
+
+
+def _add_gzip(entry, compressed):
+    """Keep the gzipped body with its entry, counting it against the cache budget."""
+    global _responses_bytes
+    with _responses_lock:
+        if entry["gzip"] is None:
+            entry["gzip"] = compressed
+            if entry["cached"]:
+                _responses_bytes += len(compressed)
+                _evict()
+    return entry["gzip"]
+
+
+class DataAPIHandler(BaseHTTPRequestHandler):
+    server_version = "UKADataAPI/1.0"
+
+    def do_HEAD(self):
+        self.do_GET(head_only=True)
+
+    def do_GET(self, head_only=False):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+
+        with span("api.request", path=url.path):
+            try:
+                if parts == ["api"] or parts == []:
+                    body = json.dumps({
+                        "datasets": {name: {"path": f"/api/{name}", "params": spec["params"]}
+                                     for name, spec in DATASETS.items()},
+                        "formats": MEDIA_TYPES,
+                    }, indent=2).encode("utf-8")
+                    return self._send(200, body, "application/json", head_only=head_only)
+
+                if len(parts) != 2 or parts[0] != "api" or parts[1] not in DATASETS:
+                    return self._error(404, f"Unknown endpoint: {url.path}", head_only)
+
+                self._serve_dataset(parts[1], QueryParams(url.query), head_only)
+            except BadRequest as e:
+                self._error(400, str(e), head_only)
+            except Exception as e:
+                self._error(500, f"{type(e).__name__}: {e}", head_only)
+
+    def _serve_dataset(self, name, params, head_only):
+        spec = DATASETS[name]
+        fmt = negotiate_format(self.headers.get("Accept"), params.get("format"))
+        seed, last_modified = source_state(spec["files"](params))
+        if not seed:
+            return self._error(404, f"No stored data for '{name}' yet.", head_only)
+
+        etag = '"' + hashlib.sha1(f"{name}?{params.canonical()}#{fmt}#{seed}".encode()).hexdigest()[:20] + '"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            "Cache-Control": f"max-age={MAX_AGE_SECONDS}",
+            "Vary": "Accept, Accept-Encoding",
+        }
+
+        if self._not_modified(etag, last_modified):
+            annotate(status=304)
+            return self._send(304, b"", None, headers, head_only=True)
+
+        entry = _cached_response(etag, lambda: encode(spec["load"](params), fmt))
+        self._send(200, entry, MEDIA_TYPES[fmt], headers, head_only=head_only)
+
+    def _not_modified(self, etag, last_modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return etag in candidates or "*" in candidates
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send(self, status, body, content_type, headers=None, head_only=False):
+        # `body` is raw bytes, or a response-cache entry whose gzipped form is kept alongside
+        entry = body if isinstance(body, dict) else {"body": body, "gzip": None, "cached": False}
+        payload = entry["body"]
+
+        accepts_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        if status == 200 and accepts_gzip and len(payload) >= GZIP_MIN_BYTES:
+            payload = entry["gzip"] or _add_gzip(entry, gzip.compress(payload, compresslevel=6))
+            headers = {**(headers or {}), "Content-Encoding": "gzip"}
+
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+
+        annotate(status=status, bytes=len(payload))
+        if not head_only and status != 304:
+            self.wfile.write(payload)
+
+    def _error(self, status, message, head_only=False):
+        body = json.dumps({"error": message}).encode("utf-8")
+        self._send(status, body, "application/json", head_only=head_only)
+
+    def do_POST(self):
+        self._error(405, "This API is read-only.")
+
+    do_PUT = do_PATCH = do_DELETE = do_POST
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}")
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), DataAPIHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the stored UKA and carbon series over HTTP (read-only).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port)
+    print(f"🚀 UKA data API on http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# indicators/carbon_gaps.py
+#
+# Finds holes in the half-hourly carbon stores and refetches only those. The stored
+# `from` index is scanned with vectorised diffs for missing half hours, and periods
+# whose readings are null (or, for the regional store, periods missing some regions)
+# are reported too. The gaps are then coalesced into the fewest API ranges the
+# endpoint's maximum window allows, so a few missing days cost a few requests
+# rather than a full backfill. Half hours the API still has no data for after a
+# refetch are recorded (with the time of the check) in checked_gaps.json next to the
+# store and left out of plans for RECHECK_AFTER, so a permanent hole isn't refetched on
+# every run but one the API fills late is still picked up:
+#
+#   python indicators/carbon_gaps.py --dry-run   # report gaps and the planned requests
+#   python indicators/carbon_gaps.py             # repair every store
+#   python indicators/carbon_gaps.py --recheck   # also retry half hours checked recently
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import annotate, traced
+from indicators.carbon_intensity_api import (
+    FUELS,
+    MIX_SEGMENT_DAYS,
+    SEGMENT_DAYS,
+    intensity_records_to_frame,
+    iter_intensity_windows,
+    plan_windows,
+)
+from indicators.carbon_mix_store import MIX_STORES
+from indicators.carbon_store import CARBON_STORE_PATH, HISTORY_START, load_partitions, write_partitions
+
+HALF_HOUR_MINUTES = 30
+# Recent periods still waiting for their readings aren't gaps yet; sync picks them up
+SETTLE = timedelta(hours=2)
+GAP_COLUMNS = ["start", "end", "periods", "kind"]
+CHECKED_FILE = "checked_gaps.json"
+# How long a half hour the API had nothing for is left out before it's tried again
+RECHECK_AFTER = timedelta(days=7)
+
+# name -> store location, endpoint, parser, columns whose all-null marks a period as empty
+GAP_STORES = {
+    "national": dict(
+        root=CARBON_STORE_PATH,
+        endpoint="intensity",
+        parse=intensity_records_to_frame,
+        values=["actual"],
+        segment_days=SEGMENT_DAYS,
+    ),
+    "regional": dict(
+        **MIX_STORES["regional"],
+        values=["forecast"],
+        segment_days=MIX_SEGMENT_DAYS,
+    ),
+    "generation": dict(
+        **MIX_STORES["generation"],
+        values=FUELS,
+        segment_days=MIX_SEGMENT_DAYS,
+    ),
+}
+
+
+def _to_timestamps(minutes):
+    return pd.to_datetime(np.asarray(minutes, dtype="int64"), unit="m", utc=True)
+
+
+def _runs(periods, flagged):
+    """Contiguous runs of flagged half hours as (start, end) minute arrays, end exclusive."""
+    times = periods[flagged]
+    if times.size == 0:
+        return times, times
+    breaks = np.flatnonzero(np.diff(times) != HALF_HOUR_MINUTES)
+    starts = times[np.r_[0, breaks + 1]]
+    ends = times[np.r_[breaks, times.size - 1]] + HALF_HOUR_MINUTES
+    return starts, ends
+
+
+def _without(starts, ends, checked):
+    """Gap runs with the `checked` half hours (minutes since the epoch) taken out."""
+    if not len(checked) or not len(starts):
+        return starts, ends
+    times = np.concatenate([np.arange(s, e, HALF_HOUR_MINUTES) for s, e in zip(starts, ends)])
+    return _runs(times, ~np.isin(times, checked))
+
+
+def _read_checked(root):
+    """{epoch minute: when it was last refetched in vain} from the store's checked file."""
+    path = root / CHECKED_FILE
+    if not path.exists():
+        return {}
+    return {int(minute): datetime.fromisoformat(checked_at)
+            for minute, checked_at in json.loads(path.read_text()).items()}
+
+
+def load_checked(root, now=None):
+    """Half hours (epoch minutes) refetched without the API filling them within RECHECK_AFTER."""
+    cutoff = (now or datetime.now(timezone.utc)) - RECHECK_AFTER
+    recent = [minute for minute, checked_at in _read_checked(root).items() if checked_at > cutoff]
+    return np.asarray(sorted(recent), dtype="int64")
+
+
+def _record_checked(root, gaps, ranges, now=None):
+    # Whatever is still a gap inside the ranges just refetched, the API doesn't have (yet)
+    now = now or datetime.now(timezone.utc)
+    checked = _read_checked(root)
+    for start, end in zip(gaps["start"], gaps["end"]):
+        times = np.arange(start.value // 60_000_000_000, end.value // 60_000_000_000, HALF_HOUR_MINUTES)
+        stamps = _to_timestamps(times)
+        covered = np.zeros(times.size, dtype=bool)
+        for lo, hi in ranges:
+            covered |= (stamps >= lo) & (stamps < hi)
+        checked.update(dict.fromkeys(times[covered].tolist(), now))
+
+    tmp_path = root / (CHECKED_FILE + ".tmp")
+    tmp_path.write_text(json.dumps({str(minute): checked_at.isoformat()
+                                    for minute, checked_at in sorted(checked.items())}))
+    tmp_path.replace(root / CHECKED_FILE)
+    return len(checked)
+
+
+def _gap_frame(starts, ends, kind):
+    return pd.DataFrame({
+        "start": _to_timestamps(starts),
+        "end": _to_timestamps(ends),
+        "periods": (np.asarray(ends) - np.asarray(starts)) // HALF_HOUR_MINUTES,
+        "kind": kind,
+    })
+
+
+@traced("carbon.find_gaps")
+def find_gaps(name="national", start_date=None, end_date=None, root=None, include_nulls=True,
+              skip_checked=True):
+    """
+    Gaps in one store between `start_date` (default HISTORY_START) and `end_date`
+    (default: the last stored period, less the settle time for null readings), as a
+    frame of start, end (exclusive, UTC), periods (half hours) and kind:
+    "missing" for half hours with no row, "null" for rows without readings or, in the
+    regional store, with fewer regions than a full period. Half hours a repair
+    refetched in vain within RECHECK_AFTER are left out unless skip_checked=False.
+    """
+    store = GAP_STORES[name]
+    root = root or store["root"]
+    start_date = start_date or HISTORY_START
+    lo = pd.Timestamp(start_date, tz="UTC").ceil("30min")
+    checked = load_checked(root) if skip_checked else np.array([], dtype="int64")
+
+    df = load_partitions(root, start_date, end_date, columns=["from"] + store["values"])
+    if df is None or df.empty:
+        if end_date is None:
+            # Nothing stored at all: that's a backfill for sync, not a gap to plan
+            return pd.DataFrame(columns=GAP_COLUMNS)
+        hi = pd.Timestamp(end_date, tz="UTC")
+        bounds = np.array([lo.value // 60_000_000_000]), np.array([hi.value // 60_000_000_000])
+        return _gap_frame(*_without(*bounds, checked), "missing")
+
+    minutes = pd.to_datetime(df["from"], utc=True).to_numpy(dtype="datetime64[m]").astype("int64")
+    periods, counts = np.unique(minutes, return_counts=True)
+    lo_minute = lo.value // 60_000_000_000
+    if end_date is not None:
+        hi_minute = pd.Timestamp(end_date, tz="UTC").value // 60_000_000_000
+    else:
+        hi_minute = int(periods[-1]) + HALF_HOUR_MINUTES
+
+    # Missing: any step between consecutive stored periods (or the range bounds) wider than 30 min
+    edges = np.r_[lo_minute - HALF_HOUR_MINUTES, periods, hi_minute]
+    steps = np.diff(edges)
+    wide = np.flatnonzero(steps > HALF_HOUR_MINUTES)
+    gaps = [_gap_frame(*_without(edges[wide] + HALF_HOUR_MINUTES, edges[wide + 1], checked), "missing")]
+
+    if include_nulls:
+        empty_rows = df[store["values"]].isna().all(axis=1).to_numpy()
+        empty_per_period = np.bincount(np.searchsorted(periods, minutes[empty_rows]), minlength=periods.size)
+        flagged = (empty_per_period > 0) | (counts < counts.max())
+        if end_date is None:
+            flagged &= periods < hi_minute - SETTLE // timedelta(minutes=1)
+        flagged &= ~np.isin(periods, checked)
+        gaps.append(_gap_frame(*_runs(periods, flagged), "null"))
+
+    gaps = pd.concat([g for g in gaps if not g.empty] or [_gap_frame([], [], "missing")], ignore_index=True)
+    gaps = gaps.sort_values("start").reset_index(drop=True)
+    annotate(store=name, gaps=len(gaps), periods=int(gaps["periods"].sum()))
+    return gaps
+
+
+def plan_ranges(gaps, days=SEGMENT_DAYS):
+    """
+    The fewest request windows of at most `days` days covering every gap. Gaps close
+    enough to share a window are fetched together (the stored rows in between are
+    simply rewritten); a gap longer than one window is split across several.
+    """
+    max_span = timedelta(days=days)
+    ranges = []
+    current = None
+
+    gaps = gaps.sort_values("start")
+    for start, end in zip(gaps["start"].dt.to_pydatetime(), gaps["end"].dt.to_pydatetime()):
+        if current is not None and end - current[0] <= max_span:
+            current[1] = max(current[1], end)
+            continue
+        if current is not None:
+            ranges.append(tuple(current))
+        windows = plan_windows(start, end, days=days)
+        ranges.extend(windows[:-1])
+        current = list(windows[-1])
+
+    if current is not None:
+        ranges.append(tuple(current))
+    return ranges
+
+
+@traced("carbon.repair_gaps")
+def repair_gaps(name="national", start_date=None, end_date=None, root=None, dry_run=False, base_url=None,
+                skip_checked=True, gaps=None):
+    """
+    Find the gaps in one store (or take `gaps` from find_gaps) and refetch only the
+    planned ranges. Half hours still empty afterwards are recorded as checked;
+    skip_checked=False retries the recently checked ones too. Returns a dict with the number of gaps,
+    missing half hours, requests made, rows written and half hours left unfillable.
+    """
+    store = GAP_STORES[name]
+    root = root or store["root"]
+    if gaps is None:
+        gaps = find_gaps(name, start_date, end_date, root, skip_checked=skip_checked)
+    ranges = plan_ranges(gaps, store["segment_days"])
+
+    report = {"gaps": len(gaps), "periods": int(gaps["periods"].sum()), "requests": len(ranges), "rows": 0,
+              "unfillable": 0}
+    print(f"🩹 {name}: {report['gaps']} gaps ({report['periods']} half hours) → {report['requests']} requests")
+    if dry_run or not ranges:
+        return report
+
+    write_kwargs = {k: store[k] for k in ("normalise", "key") if k in store}
+    for _, batch in iter_intensity_windows(ranges, endpoint=store["endpoint"], base_url=base_url):
+        df = store["parse"](batch)
+        write_partitions(df, root, **write_kwargs)
+        report["rows"] += len(df)
+
+    remaining = find_gaps(name, start_date, end_date, root, skip_checked=skip_checked)
+    if not remaining.empty:
+        report["unfillable"] = int(remaining["periods"].sum())
+        _record_checked(root, remaining, ranges)
+
+    annotate(store=name, requests=report["requests"], rows=report["rows"], unfillable=report["unfillable"])
+    print(f"✅ Refetched {report['rows']} {name} rows ({report['unfillable']} half hours the API doesn't have).")
+    return report
+
+
+def repair_all(dry_run=False, skip_checked=True):
+    """Repair every store; returns {store: report}."""
+    return {name: repair_gaps(name, dry_run=dry_run, skip_checked=skip_checked) for name in GAP_STORES}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find and refetch gaps in the carbon intensity stores.")
+    parser.add_argument("stores", nargs="*", choices=list(GAP_STORES), help="Stores to repair (default: all)")
+    parser.add_argument("--start", help="First day to scan (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Day to stop scanning at (YYYY-MM-DD, exclusive)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report gaps and planned requests")
+    parser.add_argument("--recheck", action="store_true",
+                        help="Also refetch half hours the API had nothing for within the last week")
+    args = parser.parse_args()
+
+    for store_name in args.stores or GAP_STORES:
+        gaps = None
+        if args.dry_run:
+            gaps = find_gaps(store_name, args.start, args.end, skip_checked=not args.recheck)
+            if not gaps.empty:
+                print(gaps.to_string(index=False))
+        repair_gaps(store_name, args.start, args.end, dry_run=args.dry_run, skip_checked=not args.recheck,
+                    gaps=gaps)
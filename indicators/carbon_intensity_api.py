@@ -1,14 +1,59 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from instrumentation import add_bytes, annotate, propagate, traced
+
+CARBON_API_URL = "https://api.carbonintensity.org.uk"
+API_TIME_FORMAT = "%Y-%m-%dT%H:%MZ"
+INTENSITY_COLUMNS = ["from", "to", "actual", "forecast", "index"]
+INDEX_LEVELS = ["very low", "low", "moderate", "high", "very high"]
+FUELS = ["biomass", "coal", "imports", "gas", "nuclear", "other", "hydro", "solar", "wind"]
+REGIONAL_COLUMNS = ["from", "to", "regionid", "region", "forecast", "index"] + FUELS
+GENERATION_COLUMNS = ["from", "to"] + FUELS
+
+SEGMENT_DAYS = 30  # the API rejects ranges longer than this
+MIX_SEGMENT_DAYS = 14  # the regional and generation-mix endpoints cap ranges at 14 days
+MAX_WORKERS = 8
+REQUEST_TIMEOUT = 30
+
+_session = None
+
+
+def get_session():
+    """
+    Shared session for the carbon intensity API: one connection pool sized for the
+    fetch workers, with retries and exponential backoff on transient failures.
+    """
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+@traced("carbon.live")
 def fetch_carbon_intensity():
     """
     Fetch current national carbon intensity data.
     Returns a dictionary with actual, forecast, and index values.
     """
     try:
-        url = "https://api.carbonintensity.org.uk/intensity"
-        response = requests.get(url)
+        url = f"{CARBON_API_URL}/intensity"
+        response = get_session().get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
+        add_bytes(len(response.content))
         data = response.json()
 
         # The response has data["data"] as a list
@@ -26,80 +71,179 @@ def fetch_carbon_intensity():
             "forecast": None,
             "index": None
         }
-def fetch_national_carbon_timeseries(start_date="2025-01-01", end_date=None):
-    import requests
-    import pandas as pd
-    from datetime import datetime, timedelta
 
-    if end_date is None:
-        end_date = datetime.utcnow().strftime("%Y-%m-%d")
-
-    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    all_data = []
 
+def plan_windows(start_dt, end_dt, days=SEGMENT_DAYS):
+    """Split [start_dt, end_dt) into consecutive request windows of at most `days` days."""
+    windows = []
     while start_dt < end_dt:
-        segment_start = start_dt.strftime("%Y-%m-%dT%H:%MZ")
-        segment_end = (start_dt + timedelta(days=30)).strftime("%Y-%m-%dT%H:%MZ")
-        url = f"https://api.carbonintensity.org.uk/intensity/{segment_start}/{segment_end}"
-
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"❌ Failed segment: {segment_start} to {segment_end}")
-            break
-
-        batch = response.json()["data"]
-        all_data.extend(batch)
-        start_dt += timedelta(days=30)
-
-    df = pd.DataFrame(all_data)
-    df["from"] = pd.to_datetime(df["from"])
-    df["to"] = pd.to_datetime(df["to"])
-
-    intensity_df = df.dropna().assign(
-        actual=lambda d: d["intensity"].apply(lambda x: x.get("actual")),
-        forecast=lambda d: d["intensity"].apply(lambda x: x.get("forecast")),
-        index=lambda d: d["intensity"].apply(lambda x: x.get("index")),
+        window_end = min(start_dt + timedelta(days=days), end_dt)
+        windows.append((start_dt, window_end))
+        start_dt = window_end
+    return windows
+
+
+@traced("carbon.api_segment")
+def fetch_intensity_segment(start_dt, end_dt, session=None, base_url=None, endpoint="intensity"):
+    """
+    Fetch the raw half-hourly records of one endpoint ("intensity",
+    "regional/intensity" or "generation") between two datetimes (UTC).
+    The national endpoint accepts at most 30 days per request, the others 14.
+    """
+    session = session or get_session()
+    segment_start = start_dt.strftime(API_TIME_FORMAT)
+    segment_end = end_dt.strftime(API_TIME_FORMAT)
+    url = f"{base_url or CARBON_API_URL}/{endpoint}/{segment_start}/{segment_end}"
+
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    annotate(endpoint=endpoint)
+    add_bytes(len(response.content))
+    return response.json()["data"]
+
+
+def iter_intensity_windows(windows, max_workers=MAX_WORKERS, session=None, base_url=None, endpoint="intensity"):
+    """
+    Fetch every window through a bounded thread pool sharing one pooled session and
+    yield `(window, records)` in window order, as soon as each one (and all earlier
+    ones) are done. A segment that still fails after retries raises instead of
+    silently truncating the history.
+    """
+    session = session or get_session()
+    # propagate(): each segment's span keeps the caller's run id and nests under its span
+    fetch = propagate(
+        lambda window: fetch_intensity_segment(*window, session=session, base_url=base_url, endpoint=endpoint)
     )
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        batches = pool.map(fetch, windows)
+        for window, batch in zip(windows, batches):
+            yield window, batch
 
-    return intensity_df[["from", "to", "actual", "forecast", "index"]]
 
-def fetch_national_carbon_timeseries_2020(start_date="2020-01-01", end_date=None):
-    import requests
+def fetch_intensity_range(start_dt, end_dt, max_workers=MAX_WORKERS, session=None, base_url=None):
+    """Fetch all raw records between two datetimes, concurrently, in chronological order."""
+    records = []
+    windows = plan_windows(start_dt, end_dt)
+    for _, batch in iter_intensity_windows(windows, max_workers, session, base_url):
+        records.extend(batch)
+    return records
+
+
+@traced("carbon.parse")
+def intensity_records_to_frame(records):
+    """
+    Flatten raw API records into a typed columnar frame in a single pass:
+    tz-aware UTC timestamps for from/to, nullable Int16 for actual/forecast and an
+    ordered categorical for the intensity index. Records without an intensity
+    block are skipped.
+    """
     import pandas as pd
-    from datetime import datetime, timedelta
+
+    froms, tos, actual, forecast, index = [], [], [], [], []
+    for record in records:
+        intensity = record.get("intensity")
+        if not intensity:
+            continue
+        # Timestamps are always "YYYY-MM-DDTHH:MMZ"; numpy parses the naive form far
+        # faster than pd.to_datetime, and the zone is applied once per column below
+        froms.append(record["from"].rstrip("Z"))
+        tos.append(record["to"].rstrip("Z"))
+        actual.append(intensity.get("actual"))
+        forecast.append(intensity.get("forecast"))
+        index.append(intensity.get("index"))
+
+    return pd.DataFrame({
+        "from": _utc_column(froms),
+        "to": _utc_column(tos),
+        "actual": pd.array(actual, dtype="Int16"),
+        "forecast": pd.array(forecast, dtype="Int16"),
+        "index": pd.Categorical(index, categories=INDEX_LEVELS, ordered=True),
+    })
+
+
+def _utc_column(values):
+    import numpy as np
+    import pandas as pd
+
+    return pd.DatetimeIndex(np.array(values, dtype="datetime64[m]").astype("datetime64[ns]")).tz_localize("UTC")
+
+
+def _fuel_shares(mixes):
+    """One float32 column per fuel from a list of `generationmix` blocks (NaN when missing)."""
+    import numpy as np
+
+    position = {fuel: i for i, fuel in enumerate(FUELS)}
+    shares = np.full((len(mixes), len(FUELS)), np.nan, dtype="float32")
+    for row, mix in enumerate(mixes):
+        for entry in mix or ():
+            col = position.get(entry.get("fuel"))
+            if col is not None and entry.get("perc") is not None:
+                shares[row, col] = entry["perc"]
+    return {fuel: shares[:, i] for i, fuel in enumerate(FUELS)}
+
+
+@traced("carbon.parse_regional")
+def regional_records_to_frame(records):
+    """
+    Flatten raw regional records (one per half hour, each listing every region) into
+    a long frame with one row per (period, region): forecast intensity, index and the
+    percentage share of each fuel. Region names are categorical, shares float32.
+    """
+    import pandas as pd
+
+    froms, tos, region_ids, regions, forecast, index, mixes = [], [], [], [], [], [], []
+    for record in records:
+        start, end = record["from"].rstrip("Z"), record["to"].rstrip("Z")
+        for region in record.get("regions") or ():
+            intensity = region.get("intensity") or {}
+            froms.append(start)
+            tos.append(end)
+            region_ids.append(region.get("regionid"))
+            regions.append(region.get("shortname"))
+            forecast.append(intensity.get("forecast"))
+            index.append(intensity.get("index"))
+            mixes.append(region.get("generationmix"))
+
+    return pd.DataFrame({
+        "from": _utc_column(froms),
+        "to": _utc_column(tos),
+        "regionid": pd.array(region_ids, dtype="Int8"),
+        "region": pd.Categorical(regions),
+        "forecast": pd.array(forecast, dtype="Int16"),
+        "index": pd.Categorical(index, categories=INDEX_LEVELS, ordered=True),
+        **_fuel_shares(mixes),
+    })
+
+
+@traced("carbon.parse_generation")
+def generation_records_to_frame(records):
+    """National generation mix: one row per half hour with a float32 share per fuel."""
+    import pandas as pd
+
+    froms, tos, mixes = [], [], []
+    for record in records:
+        froms.append(record["from"].rstrip("Z"))
+        tos.append(record["to"].rstrip("Z"))
+        mixes.append(record.get("generationmix"))
+
+    return pd.DataFrame({
+        "from": _utc_column(froms),
+        "to": _utc_column(tos),
+        **_fuel_shares(mixes),
+    })
+
+
+def fetch_national_carbon_timeseries(start_date="2025-01-01", end_date=None):
+    from datetime import datetime
 
     if end_date is None:
         end_date = datetime.utcnow().strftime("%Y-%m-%d")
 
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    all_data = []
-
-    while start_dt < end_dt:
-        segment_start = start_dt.strftime("%Y-%m-%dT%H:%MZ")
-        segment_end = (start_dt + timedelta(days=30)).strftime("%Y-%m-%dT%H:%MZ")
-        url = f"https://api.carbonintensity.org.uk/intensity/{segment_start}/{segment_end}"
-
-        response = requests.get(url)
-        if response.status_code != 200:
-            print(f"❌ Failed segment: {segment_start} to {segment_end}")
-            break
-
-        batch = response.json()["data"]
-        all_data.extend(batch)
-        start_dt += timedelta(days=30)
-
-    df = pd.DataFrame(all_data)
-    df["from"] = pd.to_datetime(df["from"])
-    df["to"] = pd.to_datetime(df["to"])
-
-    intensity_df = df.dropna().assign(
-        actual=lambda d: d["intensity"].apply(lambda x: x.get("actual")),
-        forecast=lambda d: d["intensity"].apply(lambda x: x.get("forecast")),
-        index=lambda d: d["intensity"].apply(lambda x: x.get("index")),
-    )
 
-    return intensity_df[["from", "to", "actual", "forecast", "index"]]
+    return intensity_records_to_frame(fetch_intensity_range(start_dt, end_dt))
 
 
+def fetch_national_carbon_timeseries_2020(start_date="2020-01-01", end_date=None):
+    return fetch_national_carbon_timeseries(start_date=start_date, end_date=end_date)
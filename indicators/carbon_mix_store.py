@@ -0,0 +1,148 @@
+# indicators/carbon_mix_store.py
+#
+# Regional intensity and national generation mix, stored next to the national series
+# in the same monthly Parquet layout (carbon_intensity/regional/, .../generation/).
+# Both share one columnar schema: UTC from/to, categorical region, float32 fuel shares.
+
+import pandas as pd
+from datetime import datetime, timezone
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import annotate, traced
+from indicators.carbon_intensity_api import (
+    FUELS,
+    GENERATION_COLUMNS,
+    INDEX_LEVELS,
+    MIX_SEGMENT_DAYS,
+    REGIONAL_COLUMNS,
+    generation_records_to_frame,
+    iter_intensity_windows,
+    plan_windows,
+    regional_records_to_frame,
+)
+from indicators.carbon_store import (
+    HALF_HOUR,
+    HISTORY_START,
+    last_stored_timestamp,
+    load_partitions,
+    write_partitions,
+)
+
+REGIONAL_STORE_PATH = PROCESSED_DATA_PATH / "carbon_intensity" / "regional"
+GENERATION_STORE_PATH = PROCESSED_DATA_PATH / "carbon_intensity" / "generation"
+
+
+def _normalise_times_and_fuels(df, columns):
+    df = df[columns].copy()
+    df["from"] = pd.to_datetime(df["from"], utc=True)
+    df["to"] = pd.to_datetime(df["to"], utc=True)
+    for fuel in FUELS:
+        df[fuel] = pd.to_numeric(df[fuel], errors="coerce").astype("float32")
+    return df
+
+
+def _normalise_regional(df):
+    df = _normalise_times_and_fuels(df, REGIONAL_COLUMNS)
+    df["regionid"] = pd.to_numeric(df["regionid"], errors="coerce").astype("Int8")
+    # Categories come back from Parquet per file; re-derive them so partitions concat as one category
+    df["region"] = df["region"].astype("string").astype("category")
+    df["forecast"] = pd.to_numeric(df["forecast"], errors="coerce").astype("Int16")
+    df["index"] = pd.Categorical(df["index"], categories=INDEX_LEVELS, ordered=True)
+    return df
+
+
+def _normalise_generation(df):
+    return _normalise_times_and_fuels(df, GENERATION_COLUMNS)
+
+
+# name -> where it lives, which endpoint feeds it, how to parse / type it and its row key
+MIX_STORES = {
+    "regional": dict(
+        root=REGIONAL_STORE_PATH,
+        endpoint="regional/intensity",
+        parse=regional_records_to_frame,
+        normalise=_normalise_regional,
+        key=("from", "regionid"),
+    ),
+    "generation": dict(
+        root=GENERATION_STORE_PATH,
+        endpoint="generation",
+        parse=generation_records_to_frame,
+        normalise=_normalise_generation,
+        key=("from",),
+    ),
+}
+
+
+@traced("carbon.sync_mix")
+def sync_mix_store(name, root=None, now=None, backfill=True):
+    """
+    Fetch everything after the last stored period of one store ("regional" or
+    "generation"), backfilling from HISTORY_START when it is empty (unless
+    backfill=False). Windows are fetched concurrently and written in order, like
+    sync_carbon_history. Returns the number of rows written.
+    """
+    store = MIX_STORES[name]
+    annotate(store=name)
+    root = root or store["root"]
+    now = now or datetime.now(timezone.utc)
+    start_dt = last_stored_timestamp(root)
+
+    if start_dt is None and not backfill:
+        print(f"⏸️ {name.capitalize()} carbon store is empty — skipping; backfill it with python pipeline.py")
+        return 0
+    if start_dt is None:
+        start_dt = datetime.strptime(HISTORY_START, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        print(f"📥 {name.capitalize()} carbon store is empty — backfilling from {HISTORY_START}...")
+
+    if now - start_dt < HALF_HOUR:
+        print(f"⏸️ {name.capitalize()} carbon store already up to date.")
+        return 0
+
+    rows_written = 0
+    windows = plan_windows(start_dt, now, days=MIX_SEGMENT_DAYS)
+    for _, batch in iter_intensity_windows(windows, endpoint=store["endpoint"]):
+        df = store["parse"](batch)
+        write_partitions(df, root, normalise=store["normalise"], key=store["key"])
+        rows_written += len(df)
+
+    print(f"✅ Synced {rows_written} {name} carbon rows.")
+    return rows_written
+
+
+def sync_regional_history(root=REGIONAL_STORE_PATH, now=None, backfill=True):
+    return sync_mix_store("regional", root, now, backfill)
+
+
+def sync_generation_mix(root=GENERATION_STORE_PATH, now=None, backfill=True):
+    return sync_mix_store("generation", root, now, backfill)
+
+
+def load_regional_history(start_date=None, end_date=None, regions=None, columns=None,
+                          root=REGIONAL_STORE_PATH):
+    """
+    Regional rows between two dates, optionally for a subset of region short names
+    and columns; both are pushed down to the Parquet reader.
+    """
+    filters = [("region", "in", list(regions))] if regions else None
+    df = load_partitions(root, start_date, end_date, columns=columns, filters=filters)
+    if df is None:
+        df = regional_records_to_frame([])
+        return df[columns] if columns else df
+    if "region" in df.columns:
+        df["region"] = df["region"].astype("string").astype("category")
+    return df
+
+
+def load_generation_mix(start_date=None, end_date=None, columns=None, root=GENERATION_STORE_PATH):
+    """National generation mix between two dates (percent share per fuel)."""
+    df = load_partitions(root, start_date, end_date, columns=columns)
+    if df is None:
+        df = generation_records_to_frame([])
+        return df[columns] if columns else df
+    return df
+
+
+if __name__ == "__main__":
+    sync_regional_history()
+    sync_generation_mix()
@@ -0,0 +1,143 @@
+# indicators/carbon_rollups.py
+#
+# Pre-computed views of the national carbon intensity store: hourly / daily /
+# weekly / monthly aggregates and the rolling averages the dashboard plots. They are
+# materialised at sync time and only the tail touched by new periods is recomputed,
+# so the dashboard just reads the resolution it needs.
+
+import pandas as pd
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import traced
+from indicators.carbon_store import load_carbon_history
+
+ROLLUP_PATH = PROCESSED_DATA_PATH / "carbon_intensity" / "rollups"
+
+RESOLUTIONS = {
+    "hourly": dict(rule="1h"),
+    "daily": dict(rule="1D"),
+    "weekly": dict(rule="W-MON", label="left", closed="left"),  # weeks starting Monday
+    "monthly": dict(rule="MS"),
+}
+
+# Start of the bucket containing a timestamp, per resolution
+BUCKET_START = {
+    "hourly": lambda ts: ts.floor("h"),
+    "daily": lambda ts: ts.normalize(),
+    "weekly": lambda ts: ts.normalize() - pd.Timedelta(days=ts.weekday()),
+    "monthly": lambda ts: ts.normalize().replace(day=1),
+}
+
+# Rolling means of `actual` on the half-hourly grid
+ROLLING_WINDOWS = {"12h_avg": "12h", "48h_avg": "48h", "30d_avg": "30D"}
+LONGEST_WINDOW = pd.Timedelta("30D")
+
+# Periods whose `actual` can still arrive late; re-rolled on every update
+LATE_DATA_MARGIN = pd.Timedelta("1D")
+
+
+def _rollup_path(name, root):
+    return root / f"{name}.parquet"
+
+
+def _half_hourly(history):
+    df = history.set_index("from").sort_index()
+    return pd.DataFrame({
+        "actual": df["actual"].astype("float64"),
+        "forecast": df["forecast"].astype("float64"),
+    })
+
+
+def aggregate(history, resolution):
+    """mean / min / max / count of `actual` (plus mean forecast) per bucket."""
+    hh = _half_hourly(history)
+    resampled = hh.resample(**RESOLUTIONS[resolution])
+
+    out = resampled["actual"].agg(["mean", "min", "max", "count"]).add_prefix("actual_")
+    out["forecast_mean"] = resampled["forecast"].mean()
+    out["actual_count"] = out["actual_count"].astype("int32")
+    return out.astype({c: "float32" for c in out.columns if c != "actual_count"})
+
+
+def rolling_averages(history):
+    hh = _half_hourly(history)
+    return pd.DataFrame(
+        {name: hh["actual"].rolling(window).mean() for name, window in ROLLING_WINDOWS.items()},
+        index=hh.index,
+    ).astype("float32")
+
+
+def _default_since(root):
+    path = _rollup_path("hourly", root)
+    if not path.exists():
+        return None
+    stored = pd.read_parquet(path, columns=["actual_count"])
+    return stored.index.max() - LATE_DATA_MARGIN if not stored.empty else None
+
+
+def _merge(name, new_rows, rebuild_from, root):
+    path = _rollup_path(name, root)
+    if path.exists():
+        existing = pd.read_parquet(path)
+        new_rows = pd.concat([existing[existing.index < rebuild_from], new_rows])
+
+    tmp_path = path.with_suffix(".parquet.tmp")
+    new_rows.to_parquet(tmp_path)
+    tmp_path.replace(path)
+
+
+@traced("carbon.update_rollups")
+def update_rollups(since=None, root=ROLLUP_PATH):
+    """
+    Recompute the rollups for every period from `since` onwards (by default: the
+    last rolled-up hour, minus a day for late actuals) and splice them onto what is
+    already stored. An empty rollup directory is built from the whole history.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    since = since if since is not None else _default_since(root)
+
+    if since is None:
+        history = load_carbon_history()
+        if history.empty:
+            return 0
+        since = history["from"].min()
+    else:
+        since = pd.Timestamp(since)
+        # Whole buckets are replaced, and the 30-day rolling window needs history before them
+        earliest = min(BUCKET_START[r](since) for r in RESOLUTIONS) - LONGEST_WINDOW
+        history = load_carbon_history(start_date=earliest.strftime("%Y-%m-%d"))
+        if history.empty:
+            return 0
+
+    for resolution in RESOLUTIONS:
+        bucket_from = BUCKET_START[resolution](since)
+        fresh = history[history["from"] >= bucket_from]
+        _merge(resolution, aggregate(fresh, resolution), bucket_from, root)
+
+    rolling = rolling_averages(history)
+    _merge("rolling", rolling[rolling.index >= since], since, root)
+
+    print(f"📊 Carbon intensity rollups updated from {since:%Y-%m-%d %H:%M}")
+    return int((history["from"] >= since).sum())
+
+
+@traced("carbon.load_rollup")
+def load_rollup(name, start_date=None, end_date=None, root=ROLLUP_PATH):
+    """
+    Read one rollup ("hourly", "daily", "weekly", "monthly" or "rolling"), indexed
+    by the bucket's UTC start time.
+    """
+    path = _rollup_path(name, root)
+    if not path.exists():
+        return pd.DataFrame()
+
+    filters = []
+    if start_date is not None:
+        filters.append(("from", ">=", pd.Timestamp(start_date, tz="UTC")))
+    if end_date is not None:
+        filters.append(("from", "<", pd.Timestamp(end_date, tz="UTC")))
+    return pd.read_parquet(path, filters=filters or None)
+
+
+if __name__ == "__main__":
+    update_rollups()
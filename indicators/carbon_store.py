@@ -0,0 +1,206 @@
+# indicators/carbon_store.py
+
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import annotate, traced
+from indicators.carbon_intensity_api import (
+    INDEX_LEVELS,
+    INTENSITY_COLUMNS,
+    intensity_records_to_frame,
+    iter_intensity_windows,
+    plan_windows,
+)
+
+CARBON_STORE_PATH = PROCESSED_DATA_PATH / "carbon_intensity" / "national"
+HISTORY_START = "2020-01-01"
+HALF_HOUR = timedelta(minutes=30)
+
+
+def _partition_path(period, root):
+    # One Parquet file per calendar month, e.g. national/2024-03.parquet
+    return root / f"{period}.parquet"
+
+
+def _normalise(df):
+    # Same schema as intensity_records_to_frame, so old and new partitions concat cleanly
+    df = df[INTENSITY_COLUMNS].copy()
+    df["from"] = pd.to_datetime(df["from"], utc=True)
+    df["to"] = pd.to_datetime(df["to"], utc=True)
+    df["actual"] = pd.to_numeric(df["actual"], errors="coerce").astype("Int16")
+    df["forecast"] = pd.to_numeric(df["forecast"], errors="coerce").astype("Int16")
+    df["index"] = pd.Categorical(df["index"], categories=INDEX_LEVELS, ordered=True)
+    return df
+
+
+@traced("carbon.write_partitions")
+def write_partitions(df, root=CARBON_STORE_PATH, normalise=_normalise, key=("from",)):
+    """
+    Merge half-hourly rows into the monthly partitions they belong to.
+    Only the months touched by `df` are rewritten; later rows win on duplicate `key`.
+    """
+    if df.empty:
+        return []
+
+    root.mkdir(parents=True, exist_ok=True)
+    df = normalise(df)
+    written = []
+
+    for period, chunk in df.groupby(df["from"].dt.strftime("%Y-%m")):
+        path = _partition_path(period, root)
+        if path.exists():
+            chunk = pd.concat([normalise(pd.read_parquet(path)), chunk], ignore_index=True)
+
+        chunk = (
+            chunk.drop_duplicates(subset=list(key), keep="last")
+            .sort_values(list(key))
+            .reset_index(drop=True)
+        )
+
+        # Write to a temp file first so an interrupted sync never leaves a half-written partition
+        tmp_path = path.with_suffix(".parquet.tmp")
+        chunk.to_parquet(tmp_path, index=False)
+        tmp_path.replace(path)
+        written.append(path)
+
+    annotate(rows=len(df), partitions=len(written))
+    return written
+
+
+def list_partitions(root=CARBON_STORE_PATH):
+    if not root.exists():
+        return []
+    return sorted(root.glob("*.parquet"))
+
+
+@traced("carbon.read_partitions")
+def load_partitions(root, start_date=None, end_date=None, columns=None, filters=None):
+    """
+    Read rows between two dates ("YYYY-MM-DD", inclusive start, exclusive end).
+    Only the monthly partitions overlapping the range are opened, and `columns` /
+    pyarrow `filters` are pushed down so unused columns and rows are never loaded.
+    Returns None when no partition matches.
+    """
+    paths = list_partitions(root)
+    if start_date is not None:
+        paths = [p for p in paths if p.stem >= start_date[:7]]
+    if end_date is not None:
+        paths = [p for p in paths if p.stem <= end_date[:7]]
+
+    annotate(partitions=len(paths), store=root.name)
+    if not paths:
+        return None
+
+    filters = list(filters or [])
+    if start_date is not None:
+        filters.append(("from", ">=", pd.Timestamp(start_date, tz="UTC")))
+    if end_date is not None:
+        filters.append(("from", "<", pd.Timestamp(end_date, tz="UTC")))
+
+    df = pd.concat(
+        [pd.read_parquet(p, columns=columns, filters=filters or None) for p in paths],
+        ignore_index=True,
+    )
+    return df
+
+
+def load_carbon_history(start_date=None, end_date=None, root=CARBON_STORE_PATH):
+    """
+    Read stored national intensity between two dates ("YYYY-MM-DD", inclusive start,
+    exclusive end). Only the monthly partitions overlapping the range are opened.
+    """
+    df = load_partitions(root, start_date, end_date)
+    if df is None:
+        return intensity_records_to_frame([])
+    return df
+
+
+def last_stored_timestamp(root=CARBON_STORE_PATH):
+    """Return the latest stored `to` timestamp, or None when the store is empty."""
+    paths = list_partitions(root)
+    if not paths:
+        return None
+
+    latest = pd.read_parquet(paths[-1], columns=["to"])
+    if latest.empty:
+        return None
+    return pd.to_datetime(latest["to"], utc=True).max().to_pydatetime()
+
+
+def latest_reading(root=CARBON_STORE_PATH):
+    """
+    The most recent stored period that has an `actual` reading, as a dict shaped like
+    fetch_carbon_intensity() plus its `from` time; values are None for an empty store.
+    """
+    reading = {"actual": None, "forecast": None, "index": None, "from": None}
+    for path in reversed(list_partitions(root)):
+        latest = pd.read_parquet(path, columns=["from", "actual", "forecast", "index"]).dropna(subset=["actual"])
+        if not latest.empty:
+            row = latest.iloc[-1]
+            reading["actual"] = int(row["actual"])
+            reading["forecast"] = None if pd.isna(row["forecast"]) else int(row["forecast"])
+            reading["index"] = row["index"]
+            reading["from"] = row["from"].to_pydatetime()
+            break
+    return reading
+
+
+def _resume_point(root):
+    """
+    Where the next sync should start: the last stored `to`, pulled back to the first
+    trailing period still waiting for its `actual` reading (the API publishes actuals
+    ~30 minutes after the forecast).
+    """
+    paths = list_partitions(root)
+    if not paths:
+        return None
+
+    latest = pd.read_parquet(paths[-1], columns=["from", "to", "actual"])
+    if latest.empty:
+        return None
+
+    resume = pd.to_datetime(latest["to"], utc=True).max()
+    has_actual = latest["actual"].notna().to_numpy()
+    if has_actual.any():
+        last_actual = has_actual.nonzero()[0][-1]
+        if last_actual < len(latest) - 1:
+            resume = pd.to_datetime(latest["from"], utc=True).iloc[last_actual + 1]
+    return resume.to_pydatetime()
+
+
+@traced("carbon.sync")
+def sync_carbon_history(root=CARBON_STORE_PATH, now=None, backfill=True):
+    """
+    Bring the store up to date by fetching only the half-hour periods after the last
+    stored `to`. An empty store is backfilled from HISTORY_START with the windows
+    fetched concurrently; they are written in order as they complete, so an
+    interrupted backfill resumes where it stopped. With backfill=False an empty store
+    is left alone. Returns the number of rows written.
+    """
+    now = now or datetime.now(timezone.utc)
+    start_dt = _resume_point(root)
+
+    if start_dt is None and not backfill:
+        print("⏸️ Carbon intensity store is empty — skipping; backfill it with python pipeline.py")
+        return 0
+    if start_dt is None:
+        start_dt = datetime.strptime(HISTORY_START, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        print(f"📥 Carbon intensity store is empty — backfilling from {HISTORY_START}...")
+
+    if now - start_dt < HALF_HOUR:
+        print("⏸️ Carbon intensity store already up to date.")
+        return 0
+
+    rows_written = 0
+    for _, batch in iter_intensity_windows(plan_windows(start_dt, now)):
+        df = intensity_records_to_frame(batch)
+        write_partitions(df, root)
+        rows_written += len(df)
+
+    print(f"✅ Synced {rows_written} carbon intensity periods.")
+    return rows_written
+
+
+if __name__ == "__main__":
+    sync_carbon_history()
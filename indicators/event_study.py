@@ -0,0 +1,182 @@
+# indicators/event_study.py
+#
+# Event studies of UKA prices around policy announcements. Events come from the
+# policy tracker (each policy's "events" list) plus user-added events saved in
+# data/raw/user_events.csv. All events and price series are processed at once: each
+# event's estimation and event windows are gathered from the return matrix with one
+# fancy-indexing step, so the cost doesn't grow with a Python loop per event.
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from config import RAW_DATA_PATH
+from indicators.policy_data import get_policies
+from instrumentation import traced
+
+USER_EVENTS_PATH = RAW_DATA_PATH / "user_events.csv"
+EVENT_COLUMNS = ["date", "event", "source"]
+TRADING_DAYS = 252
+
+
+def policy_events(policies=None):
+    """One row per dated event listed under a policy's "events" key."""
+    rows = [
+        {"date": event["date"], "event": event["label"], "source": policy["title"]}
+        for policy in (policies if policies is not None else get_policies())
+        for event in policy.get("events", [])
+    ]
+    return pd.DataFrame(rows, columns=EVENT_COLUMNS)
+
+
+def load_user_events(path=USER_EVENTS_PATH):
+    if not path.exists():
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.read_csv(path)
+
+
+def add_user_event(date, event, path=USER_EVENTS_PATH):
+    """Append a user-defined event (kept across sessions)."""
+    row = pd.DataFrame([{"date": pd.Timestamp(date).strftime("%Y-%m-%d"), "event": event, "source": "user"}])
+    row.to_csv(path, mode="a", header=not path.exists(), index=False)
+
+
+def build_event_table(user_events=None, policies=None):
+    """Policy and user events, one row per (date, event), sorted by date."""
+    if user_events is None:
+        user_events = load_user_events()
+    events = pd.concat([policy_events(policies), pd.DataFrame(user_events, columns=EVENT_COLUMNS)], ignore_index=True)
+    events["date"] = pd.to_datetime(events["date"], errors="coerce")
+    events = events.dropna(subset=["date", "event"]).drop_duplicates(subset=["date", "event"])
+    return events.sort_values("date").reset_index(drop=True)
+
+
+def log_returns(prices):
+    """Daily log returns of a wide price frame (one column per series, date index)."""
+    prices = prices.sort_index().astype("float64")
+    return np.log(prices).diff().iloc[1:]
+
+
+def _gather(values, positions, offsets):
+    """
+    values[positions + offsets] as an (events, offsets, series) array, NaN where the
+    window runs off either end of the sample.
+    """
+    index = positions[:, None] + offsets[None, :]
+    inside = (index >= 0) & (index < len(values))
+    gathered = values[np.clip(index, 0, len(values) - 1)]
+    gathered[~inside] = np.nan
+    return gathered
+
+
+@traced("events.study")
+def event_study(prices, event_dates, pre=10, post=10, estimation=60, benchmark=None):
+    """
+    Abnormal returns around every event for every price series at once.
+
+    `prices` is a wide frame (date index, one column per series). Day 0 is the first
+    trading day on or after each event date. Normal returns are the mean daily log
+    return over the `estimation` days before the event window (mean-adjusted model);
+    with `benchmark` (a column of `prices`), returns are taken in excess of it first.
+
+    Returns (paths, summary):
+      paths   – long frame: event_id, series, offset, ar, car (CAR cumulated from -pre)
+      summary – one row per (event_id, series): car_pre, car_post, car, t_stat,
+                vol_pre, vol_post (annualised) and vol_ratio
+    """
+    returns = log_returns(prices)
+    if benchmark is not None:
+        returns = returns.drop(columns=benchmark).sub(returns[benchmark], axis=0)
+
+    if returns.empty:
+        raise ValueError("Need at least two prices for an event study.")
+
+    series = list(returns.columns)
+    values = returns.to_numpy()
+    dates = returns.index.to_numpy(dtype="datetime64[ns]")
+    event_dates = pd.to_datetime(pd.Series(event_dates)).to_numpy(dtype="datetime64[ns]")
+    positions = np.searchsorted(dates, event_dates)
+
+    window = np.arange(-pre, post + 1)
+    window_returns = _gather(values, positions, window)                               # E x W x S
+    estimation_returns = _gather(values, positions, np.arange(-pre - estimation, -pre))  # E x L x S
+
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        # Events without a usable estimation window (e.g. at the start of the sample) give NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        normal = np.nanmean(estimation_returns, axis=1)                               # E x S
+        sigma = np.nanstd(estimation_returns, axis=1, ddof=1)                         # E x S
+
+        abnormal = window_returns - normal[:, None, :]
+        car = np.nancumsum(abnormal, axis=1)
+        car[np.isnan(abnormal)] = np.nan
+
+        pre_mask, post_mask = window < 0, window >= 0
+        car_pre = np.nansum(abnormal[:, pre_mask], axis=1)
+        car_post = np.nansum(abnormal[:, post_mask], axis=1)
+        car_pre[np.isnan(abnormal[:, pre_mask]).all(axis=1)] = np.nan
+        car_post[np.isnan(abnormal[:, post_mask]).all(axis=1)] = np.nan
+        n_obs = np.sum(~np.isnan(abnormal), axis=1)
+        t_stat = (car_pre + car_post) / (sigma * np.sqrt(n_obs))
+
+        vol_pre = np.nanstd(window_returns[:, pre_mask], axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+        vol_post = np.nanstd(window_returns[:, post_mask], axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+
+    n_events, n_window, n_series = abnormal.shape
+    paths = pd.DataFrame({
+        "event_id": np.repeat(np.arange(n_events), n_window * n_series),
+        "offset": np.tile(np.repeat(window, n_series), n_events),
+        "series": np.tile(series, n_events * n_window),
+        "ar": abnormal.reshape(-1),
+        "car": car.reshape(-1),
+    })
+
+    # Day 0 of each event; NaT when the event falls outside the price sample
+    in_sample = (positions < len(dates)) & (event_dates >= dates[0])
+    event_day = np.where(in_sample, dates[np.minimum(positions, len(dates) - 1)], np.datetime64("NaT"))
+    summary = pd.DataFrame({
+        "event_id": np.repeat(np.arange(n_events), n_series),
+        "series": np.tile(series, n_events),
+        "event_day": np.repeat(event_day, n_series),
+        "car_pre": car_pre.reshape(-1),
+        "car_post": car_post.reshape(-1),
+        "car": (car_pre + car_post).reshape(-1),
+        "t_stat": t_stat.reshape(-1),
+        "vol_pre": vol_pre.reshape(-1),
+        "vol_post": vol_post.reshape(-1),
+        "vol_ratio": (vol_post / vol_pre).reshape(-1),
+    })
+    # Events with no prices at all (outside the sample) are dropped from both frames
+    summary = summary[summary["event_day"].notna()].reset_index(drop=True)
+    paths = paths[paths["event_id"].isin(summary["event_id"])].reset_index(drop=True)
+    return paths, summary
+
+
+def average_car(paths):
+    """
+    Mean CAR path across events per series, with its cross-sectional standard error.
+    Only events with a CAR at every offset count, so each point averages the same
+    events (one cut short by the end of the sample would otherwise drop out part-way).
+    """
+    incomplete = paths["car"].isna().groupby([paths["event_id"], paths["series"]]).transform("any")
+    grouped = paths[~incomplete].groupby(["series", "offset"])["car"]
+    out = grouped.agg(["mean", "std", "count"]).reset_index()
+    out["stderr"] = out["std"] / np.sqrt(out["count"])
+    return out
+
+
+def price_panel(start_date=None, end_date=None):
+    """Wide daily price frame from the price store: the merged series plus each source."""
+    from indicators.price_store import SOURCE_PRECEDENCE, load_merged_prices, query
+
+    merged = load_merged_prices(start_date, end_date)
+    panel = {"merged": merged.set_index("date")["uka_price"]}
+    for source in SOURCE_PRECEDENCE:
+        rows = query(source, start_date, end_date)
+        if not rows.empty:
+            panel[source] = rows.set_index("date")["uka_price"]
+
+    panel = pd.DataFrame(panel)
+    panel.index = pd.to_datetime(panel.index)
+    return panel.sort_index()
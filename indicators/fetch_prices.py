@@ -1,8 +1,13 @@
+import sys
+from pathlib import Path
 import requests
-import os
 import pandas as pd
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from instrumentation import add_bytes, traced
+
+@traced("ice.chart_prices")
 def get_real_uka_prices():
     url = "https://www.ice.com/marketdata/DelayedMarkets.shtml?getHistoricalChartDataAsJson=&marketId=6994206&historicalSpan=1"
     headers = {
@@ -12,6 +17,7 @@ def get_real_uka_prices():
     }
 
     response = requests.get(url, headers=headers)
+    add_bytes(len(response.content))
     if response.status_code != 200:
         raise ConnectionError(f"Failed to fetch data. Status code: {response.status_code}")
 
@@ -43,17 +49,10 @@ def get_real_uka_prices():
     return df
 
 if __name__ == "__main__":
+    from indicators.price_store import load_merged_prices, upsert
+
     df_new = get_real_uka_prices()
 
-    csv_path = "data/raw/uka_prices.csv"
-    if os.path.exists(csv_path):
-        df_existing = pd.read_csv(csv_path, parse_dates=["date"])
-        combined = pd.concat([df_existing, df_new])
-        combined = combined.drop_duplicates(subset="date")
-        combined = combined.sort_values("date")
-    else:
-        combined = df_new
-
-    combined.to_csv(csv_path, index=False)
-    print("📌 Appended new data to data/raw/uka_prices.csv")
-    print(combined.tail(10))
+    written = upsert(df_new, "ice_chart")
+    print(f"📌 Upserted {written} days into the price store")
+    print(load_merged_prices().tail(10))
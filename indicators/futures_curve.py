@@ -0,0 +1,100 @@
+# indicators/futures_curve.py
+#
+# Long-format store of every ICE UKA futures contract seen by the scraper: one row
+# per (date, contract). Kept as an append-only CSV next to uka_timeseries.csv so the
+# daily GitHub Action can commit it with a readable diff.
+
+import os
+import pandas as pd
+from datetime import date
+
+from config import RAW_DATA_PATH
+from instrumentation import traced
+
+CURVE_PATH = RAW_DATA_PATH / "uka_futures_curve.csv"
+CURVE_COLUMNS = ["date", "contract", "last", "change", "volume", "time"]
+
+
+def contract_month(contract):
+    """'Dec25' -> Timestamp('2025-12-01'); None for anything that isn't a MonYY code."""
+    try:
+        return pd.to_datetime(contract, format="%b%y")
+    except (TypeError, ValueError):
+        return None
+
+
+def front_december(contracts, as_of=None):
+    """
+    The nearest December contract still trading on `as_of`. Expired contracts drop
+    out of ICE's table, so once Dec25 is gone the series rolls to Dec26 on its own.
+    """
+    as_of = pd.Timestamp(as_of or date.today())
+    decembers = sorted(
+        (month, contract)
+        for contract in contracts
+        if (month := contract_month(contract)) is not None
+        and month.month == 12
+        and month.year >= as_of.year
+    )
+    return decembers[0][1] if decembers else None
+
+
+@traced("ice.append_curve")
+def append_curve_rows(rows, as_of=None, path=CURVE_PATH):
+    """
+    Append today's contract rows. Only the (date, contract) keys of the existing file
+    are read for dedup; new rows are written with a plain append, never a rewrite.
+    Returns the number of rows appended.
+    """
+    as_of = as_of or date.today()
+    new_rows = pd.DataFrame(rows, columns=CURVE_COLUMNS[1:])
+    new_rows = new_rows.dropna(subset=["contract"]).drop_duplicates(subset="contract", keep="last")
+    new_rows.insert(0, "date", pd.Timestamp(as_of).date().isoformat())
+
+    file_exists = os.path.exists(path)
+    if file_exists:
+        existing_keys = pd.read_csv(path, usecols=["date", "contract"], dtype=str)
+        seen = set(zip(existing_keys["date"], existing_keys["contract"]))
+        new_rows = new_rows[[(d, c) not in seen for d, c in zip(new_rows["date"], new_rows["contract"])]]
+
+    if new_rows.empty:
+        print("⏸️ Curve already recorded for today.")
+        return 0
+
+    new_rows[CURVE_COLUMNS].to_csv(path, mode="a", header=not file_exists, index=False)
+    print(f"📈 Appended {len(new_rows)} contracts to the futures curve store")
+    return len(new_rows)
+
+
+def load_curve(path=CURVE_PATH):
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=CURVE_COLUMNS)
+
+    curve = pd.read_csv(path, parse_dates=["date"])
+    curve = curve.drop_duplicates(subset=["date", "contract"], keep="last")
+    curve["contract"] = curve["contract"].astype("category")
+    curve["volume"] = curve["volume"].astype("Int64")
+    return curve.sort_values(["date", "contract"]).reset_index(drop=True)
+
+
+def contract_series(contract, curve=None):
+    """Daily last price of a single contract, indexed by date."""
+    curve = load_curve() if curve is None else curve
+    rows = curve[curve["contract"] == contract]
+    return rows.set_index("date")["last"].rename(contract)
+
+
+def front_december_series(curve=None):
+    """
+    Continuous front-December price: each date takes its own front December, chosen
+    among all contracts listed that day. Days where it has no price are left out
+    rather than rolled early to the next December.
+    """
+    curve = load_curve() if curve is None else curve
+
+    fronts = {
+        day: front_december(group["contract"].astype(str), as_of=day)
+        for day, group in curve.groupby("date")
+    }
+    front = curve[curve["contract"].astype(str) == curve["date"].map(fronts)]
+    return front.dropna(subset=["last"]).set_index("date")[["contract", "last"]]
@@ -0,0 +1,197 @@
+# indicators/market_update_corpus.py
+#
+# Every DOCX in data/market_updates/ converted once to markdown plus its sections,
+# with an inverted index over all of them for full-text search. The corpus is kept in
+# data/processed/market_updates_corpus.json; rebuilds only re-read documents whose
+# content hash changed, and only their postings are replaced in the index.
+
+import hashlib
+import json
+import re
+from datetime import datetime
+
+from config import DATA_DIR, PROCESSED_DATA_PATH
+from indicators.market_updates import blocks_to_markdown, docx_to_blocks
+from instrumentation import annotate, traced
+
+MARKET_UPDATES_DIR = DATA_DIR / "market_updates"
+CORPUS_PATH = PROCESSED_DATA_PATH / "market_updates_corpus.json"
+CORPUS_VERSION = 1
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'.%€£-]*[a-z0-9%]|[a-z0-9]")
+MONTH_RE = re.compile(
+    r"(january|february|march|april|may|june|july|august|september|october|november|december)[\W_]*(\d{4})",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def discover_documents(directory=MARKET_UPDATES_DIR):
+    # "~$..." files are Word's lock files for documents open in an editor
+    return sorted(p for p in directory.glob("*.docx") if not p.name.startswith("~$"))
+
+
+def file_hash(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def document_title(path):
+    """Month and year from the file name (e.g. "March 2025"), or the file stem."""
+    match = MONTH_RE.search(path.stem)
+    if match:
+        return f"{match.group(1).title()} {match.group(2)}"
+    return path.stem
+
+
+def _sort_key(title):
+    try:
+        return datetime.strptime(title, "%B %Y").strftime("%Y-%m")
+    except ValueError:
+        return title
+
+
+def convert_document(path, digest=None):
+    blocks = docx_to_blocks(path)
+
+    sections = {}
+    for block in blocks:
+        if block["section"] is not None and block["kind"] != "header":
+            sections.setdefault(block["section"], []).append(block["text"])
+
+    return {
+        "hash": digest or file_hash(path),
+        "title": document_title(path),
+        "blocks": blocks,
+        "markdown": blocks_to_markdown(blocks),
+        "sections": {name: "\n\n".join(texts) for name, texts in sections.items()},
+    }
+
+
+def _remove_postings(index, name):
+    for term in list(index):
+        index[term].pop(name, None)
+        if not index[term]:
+            del index[term]
+
+
+def _add_postings(index, name, document):
+    # term -> document -> [[block, position], ...]; headers aren't indexed, search()
+    # matches the query against each block's `section` instead
+    for block_id, block in enumerate(document["blocks"]):
+        if block["kind"] == "header":
+            continue
+        for position, term in enumerate(tokenize(block["text"])):
+            index.setdefault(term, {}).setdefault(name, []).append([block_id, position])
+
+
+def load_corpus(path=CORPUS_PATH):
+    if not path.exists():
+        return {"version": CORPUS_VERSION, "documents": {}, "index": {}}
+    corpus = json.loads(path.read_text(encoding="utf-8"))
+    if corpus.get("version") != CORPUS_VERSION:
+        return {"version": CORPUS_VERSION, "documents": {}, "index": {}}
+    return corpus
+
+
+@traced("market_updates.corpus")
+def build_corpus(directory=MARKET_UPDATES_DIR, path=CORPUS_PATH):
+    """
+    Bring the stored corpus in line with the documents on disk: new or changed files
+    (by SHA-256) are converted and re-indexed, deleted ones dropped, unchanged ones
+    reused as they are. Returns the corpus dict.
+    """
+    corpus = load_corpus(path)
+    documents, index = corpus["documents"], corpus["index"]
+    on_disk = {p.name: p for p in discover_documents(directory)}
+    changed = 0
+
+    for name in set(documents) - set(on_disk):
+        _remove_postings(index, name)
+        del documents[name]
+        changed += 1
+
+    for name, doc_path in on_disk.items():
+        digest = file_hash(doc_path)
+        if name in documents and documents[name]["hash"] == digest:
+            continue
+
+        print(f"📝 Indexing market update {name}")
+        _remove_postings(index, name)
+        documents[name] = convert_document(doc_path, digest)
+        _add_postings(index, name, documents[name])
+        changed += 1
+
+    annotate(rows=len(documents), changed=changed)
+    if changed:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(corpus), encoding="utf-8")
+        tmp_path.replace(path)
+
+    return corpus
+
+
+def list_documents(corpus):
+    """(name, title) pairs, newest month first."""
+    docs = [(name, doc["title"]) for name, doc in corpus["documents"].items()]
+    return sorted(docs, key=lambda item: _sort_key(item[1]), reverse=True)
+
+
+def _has_phrase(tokens, terms):
+    n = len(terms)
+    return any(tokens[i:i + n] == terms for i in range(len(tokens) - n + 1))
+
+
+def search(corpus, query, limit=50):
+    """
+    Blocks matching every term of `query` as a phrase (consecutive words in one
+    paragraph), plus every paragraph of a section whose heading contains the phrase,
+    ranked by number of matches (a heading match counts as one). Returns dicts with
+    document, title, section, text and hits.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    index = corpus["index"]
+    postings = [index.get(term, {}) for term in terms]
+    candidate_docs = set.intersection(*(set(p) for p in postings))
+
+    results = []
+    for name, document in corpus["documents"].items():
+        hits = {}
+        if name in candidate_docs:
+            # Positions of the first term that are followed by the rest of the phrase
+            following = [{tuple(hit) for hit in p[name]} for p in postings[1:]]
+            for block_id, position in postings[0][name]:
+                if all((block_id, position + offset) in positions for offset, positions in enumerate(following, start=1)):
+                    hits[block_id] = hits.get(block_id, 0) + 1
+
+        # Headings are few per document, so they're matched directly rather than indexed
+        matching = {section for section in document["sections"] if _has_phrase(tokenize(section), terms)}
+        for block_id, block in enumerate(document["blocks"]):
+            if block["section"] in matching and block["kind"] != "header":
+                hits[block_id] = hits.get(block_id, 0) + 1
+
+        for block_id, count in hits.items():
+            block = document["blocks"][block_id]
+            results.append({
+                "document": name,
+                "title": document["title"],
+                "section": block["section"],
+                "text": block["text"],
+                "hits": count,
+            })
+
+    # Most hits first, newest update first among ties
+    results.sort(key=lambda r: _sort_key(r["title"]), reverse=True)
+    results.sort(key=lambda r: r["hits"], reverse=True)
+    return results[:limit]
+
+
+if __name__ == "__main__":
+    corpus = build_corpus()
+    print(f"✅ {len(corpus['documents'])} market updates, {len(corpus['index'])} indexed terms")
@@ -1,14 +1,25 @@
-from docx import Document
+import os
 import re
 
-def load_market_update_markdown(path):
-    doc = Document(path)
-    md_output = []
+from instrumentation import annotate, traced
+
+SECTION_LABELS = [
+    "summary", "key uka price drivers", "uka price outlook", "market commentary",
+    "ets linkage", "trading activity", "auction supply"
+]
 
-    section_labels = [
-        "summary", "key uka price drivers", "uka price outlook", "market commentary",
-        "ets linkage", "trading activity", "auction supply"
-    ]
+
+def docx_to_blocks(path):
+    """
+    Walk the document once and return its blocks as dicts with `section` (the title
+    of the last section header seen, or None before the first), `kind` ("header",
+    "bullet" or "text") and `text`.
+    """
+    from docx import Document  # python-docx is only needed when a document is opened
+
+    doc = Document(path)
+    blocks = []
+    section = None
 
     for para in doc.paragraphs:
         text = para.text.strip()
@@ -17,20 +28,38 @@ def load_market_update_markdown(path):
 
         # Detect and split section headers
         lowered = text.lower()
-        matched_label = next((label for label in section_labels if lowered.startswith(label)), None)
+        matched_label = next((label for label in SECTION_LABELS if lowered.startswith(label)), None)
 
         if matched_label:
             # Extract the header portion
             header = re.match(rf"^({matched_label}):?", text, re.IGNORECASE)
             if header:
-                label_text = header.group(1).title()
+                section = header.group(1).title()
                 rest = text[len(header.group(0)):].strip()
-                md_output.append(f"### {label_text}:")
+                blocks.append({"section": section, "kind": "header", "text": section})
                 if rest:
-                    md_output.append(rest)
+                    blocks.append({"section": section, "kind": "text", "text": rest})
         elif para.style.name.startswith("List Bullet"):
-            md_output.append(f"- {text}")
+            blocks.append({"section": section, "kind": "bullet", "text": text})
         else:
-            md_output.append(text)
+            blocks.append({"section": section, "kind": "text", "text": text})
 
-    return "\n\n".join(md_output)
+    return blocks
+
+
+def blocks_to_markdown(blocks):
+    lines = []
+    for block in blocks:
+        if block["kind"] == "header":
+            lines.append(f"### {block['text']}:")
+        elif block["kind"] == "bullet":
+            lines.append(f"- {block['text']}")
+        else:
+            lines.append(block["text"])
+    return "\n\n".join(lines)
+
+
+@traced("market_updates.docx")
+def load_market_update_markdown(path):
+    annotate(bytes=os.path.getsize(path))
+    return blocks_to_markdown(docx_to_blocks(path))
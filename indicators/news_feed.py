@@ -1,37 +1,256 @@
+# indicators/news_feed.py
+#
+# News on the major UKA buyers and emitting sectors. One Google News RSS query per
+# tracked company / sector is fetched concurrently with conditional requests
+# (ETag / Last-Modified), stories are deduplicated across queries by normalised URL
+# and title, and everything is kept in a local SQLite store so history accumulates
+# and the dashboard reads from disk instead of refetching.
+
+import hashlib
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qsl, quote, quote_plus, urlencode, urlsplit, urlunsplit
+
 import pandas as pd
-from urllib.parse import urlparse, quote
-import feedparser  # Requires: pip install feedparser
-from datetime import datetime, timedelta
+import requests
 
+from config import PROCESSED_DATA_PATH
+from instrumentation import add_bytes, annotate, propagate, span, traced
+
+NEWS_DB_PATH = PROCESSED_DATA_PATH / "news.sqlite"
+
+# Tracked companies / sectors -> search query (also used for the Google search links)
+NEWS_QUERIES = {
+    "Tata Steel UK Limited": "Tata Steel UK",
+    "British Steel Limited": "British Steel",
+    "Phillips 66 Limited": "Phillips 66",
+    "Oil Refining News": "UK oil refining industry",
+    "Cement Industry News": "UK cement industry",
+    "Combustion of Fuels News": "UK combustion of fuels industry",
+}
+
+RSS_URL = "https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+MAX_WORKERS = 6
+REQUEST_TIMEOUT = 20
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ocid", "cmpid")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id TEXT PRIMARY KEY,
+    title_hash TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    source TEXT,
+    published TEXT,
+    description TEXT,
+    first_seen TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stories_title_hash ON stories (title_hash);
+CREATE INDEX IF NOT EXISTS stories_published ON stories (published);
+
+CREATE TABLE IF NOT EXISTS story_queries (
+    id TEXT NOT NULL,
+    query TEXT NOT NULL,
+    PRIMARY KEY (id, query)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    query TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at TEXT,
+    status INTEGER
+);
+"""
+
+
+def google_search_url(query):
+    return f"https://www.google.com/search?q={quote_plus(query + ' news')}"
 
-def fetch_uka_players_news():
-    # 🎯 Keywords focused on top UKA players and high-emitting industries
-    query = (
-        "Tata Steel OR British Steel OR Phillips 66 "
-        "OR UK oil refining OR UK cement production OR UK combustion of fuels "
-    )
 
-    encoded_query = quote(query)
-    rss_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-US&gl=US&ceid=US:en"
+def connect(db_path=NEWS_DB_PATH):
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
 
-    feed = feedparser.parse(rss_url)
 
-    if not feed.entries:
-        print("❌ No player-specific news found.")
-        return pd.DataFrame()
+def normalise_url(url):
+    """Lower-case scheme/host, drop tracking parameters, fragments and trailing slashes."""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urlencode(query), ""))
 
-    news_data = []
-    for entry in feed.entries[:8]:  # Fetch top 8 stories
-        news_data.append({
+
+def normalise_title(title, source=None):
+    # Google News appends " - Publisher" to every title
+    title = title.strip()
+    if source and title.endswith(f" - {source}"):
+        title = title[: -len(source) - 3]
+    return re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _published(entry):
+    parsed = entry.get("published_parsed")
+    if parsed:
+        return datetime(*parsed[:6], tzinfo=timezone.utc).isoformat()
+    return None
+
+
+def parse_entries(content):
+    import feedparser  # Requires: pip install feedparser
+
+    stories = []
+    for entry in feedparser.parse(content).entries:
+        source = entry.source.title if "source" in entry else "Unknown Source"
+        stories.append({
+            "id": _hash(normalise_url(entry.link)),
+            "title_hash": _hash(normalise_title(entry.title, source)),
             "title": entry.title,
             "link": entry.link,
-            "source": entry.source.title if "source" in entry else "Unknown Source",
-            "published": entry.published if "published" in entry else "Unknown Date",
-            "description": entry.summary if "summary" in entry else ""
+            "source": source,
+            "published": _published(entry),
+            "description": entry.summary if "summary" in entry else "",
         })
+    return stories
+
+
+def fetch_query(label, query, state, session=None):
+    """
+    Fetch one query's feed, sending the stored validators. Returns (label, status,
+    stories, validators); a 304 comes back with no stories.
+    """
+    session = session or requests
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    with span("news.feed", query=label):
+        response = session.get(RSS_URL.format(query=quote(query)), headers=headers, timeout=REQUEST_TIMEOUT)
+        add_bytes(len(response.content))
+        annotate(status=response.status_code)
+
+        if response.status_code == 304:
+            return label, 304, [], state
+        response.raise_for_status()
+
+        validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+        return label, response.status_code, parse_entries(response.content), validators
+
+
+def _store(conn, label, stories, now):
+    """Insert new stories (skipping ones already stored under another URL with the same title)."""
+    new = 0
+    for story in stories:
+        existing = conn.execute(
+            "SELECT id FROM stories WHERE id = ? OR title_hash = ? LIMIT 1",
+            (story["id"], story["title_hash"]),
+        ).fetchone()
+
+        story_id = existing[0] if existing else story["id"]
+        if not existing:
+            conn.execute(
+                """
+                INSERT INTO stories (id, title_hash, title, link, source, published, description, first_seen)
+                VALUES (:id, :title_hash, :title, :link, :source, :published, :description, :first_seen)
+                """,
+                {**story, "first_seen": now},
+            )
+            new += 1
+        conn.execute("INSERT OR IGNORE INTO story_queries (id, query) VALUES (?, ?)", (story_id, label))
+    return new
+
+
+@traced("news.ingest")
+def ingest_news(queries=None, db_path=NEWS_DB_PATH, max_workers=MAX_WORKERS):
+    """
+    Fetch every query concurrently and add unseen stories to the store.
+    Returns the number of new stories; a failing query is reported and skipped.
+    """
+    queries = queries or NEWS_QUERIES
+    now = datetime.now(timezone.utc).isoformat()
+
+    with closing(connect(db_path)) as conn:
+        state = {
+            row[0]: {"etag": row[1], "last_modified": row[2]}
+            for row in conn.execute("SELECT query, etag, last_modified FROM feed_state")
+        }
+
+        session = requests.Session()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(propagate(fetch_query), label, query, state.get(label, {}), session)
+                for label, query in queries.items()
+            ]
+
+            new = 0
+            with conn:
+                for label, future in zip(queries, futures):
+                    try:
+                        label, status, stories, validators = future.result()
+                    except Exception as e:
+                        print(f"⚠️ News query '{label}' failed: {e}")
+                        continue
+
+                    new += _store(conn, label, stories, now)
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO feed_state (query, etag, last_modified, fetched_at, status)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (label, validators.get("etag"), validators.get("last_modified"), now, status),
+                    )
+
+    print(f"📰 Stored {new} new stories from {len(queries)} queries")
+    return new
+
+
+def load_news(queries=None, since=None, db_path=NEWS_DB_PATH):
+    """
+    Stored stories, newest first, with the tracked queries each one matched
+    (comma-separated). `since` is anything pd.Timestamp accepts.
+    """
+    clauses, params = [], []
+    if since is not None:
+        clauses.append("s.published >= ?")
+        since = pd.Timestamp(since)
+        params.append((since.tz_localize("UTC") if since.tzinfo is None else since.tz_convert("UTC")).isoformat())
+    if queries:
+        clauses.append(f"q.query IN ({','.join('?' * len(queries))})")
+        params.extend(queries)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with closing(connect(db_path)) as conn:
+        df = pd.read_sql_query(
+            f"""
+            SELECT s.title, s.link, s.source, s.published, s.description, GROUP_CONCAT(q.query, ', ') AS queries
+            FROM stories s JOIN story_queries q ON q.id = s.id
+            {where}
+            GROUP BY s.id
+            ORDER BY s.published DESC
+            """,
+            conn,
+            params=params,
+        )
+    df["published"] = pd.to_datetime(df["published"], utc=True, errors="coerce")
+    return df
+
+
+def fetch_uka_players_news():
+    """Ingest the latest stories and return the past month's, newest first."""
+    ingest_news()
+    return load_news(since=datetime.now(timezone.utc) - timedelta(days=30))
+
 
-    df = pd.DataFrame(news_data)
-    df["published"] = pd.to_datetime(df["published"], errors="coerce")
-    one_month_ago = datetime.now() - timedelta(days=30)
-    df = df[df["published"] >= one_month_ago]
-    return df.sort_values("published", ascending=False)
+if __name__ == "__main__":
+    ingest_news()
+    print(load_news().head(10))
@@ -10,7 +10,11 @@ def get_policies():
             "9 April 2025 Consultation": "https://assets.publishing.service.gov.uk/media/67abe55a0f72884e1756aa6f/extending-the-ukets-cap-beyond-2030.pdf",
             "Other Notable Developments": "The UK ETS free allocation period has been extended beyond 2025 to 2026...",
             "last_updated": "2025-04-14",
-            "search_url": ["https://www.google.com/search?q=UK+ETS+Extension+news"]
+            "search_url": ["https://www.google.com/search?q=UK+ETS+Extension+news"],
+            # Dated events used by the event-study overlay (indicators/event_study.py)
+            "events": [
+                {"date": "2025-04-09", "label": "Cap extension consultation closes"},
+            ]
         },
         {
             "title": "Possible Linkage with EU ETS",
@@ -20,7 +24,14 @@ def get_policies():
             "Latest Developments": "The EU-UK Parliamentary Partnership Assembly (PPA) took place on 17 March 2025...",
             "PPA Meeting": "https://www.europarl.europa.eu/delegations/en/5th-eu-uk-parliamentary-partnership-asse/product-details/20250224DPU39839",
             "last_updated": "2025-04-14",
-            "search_url": ["https://www.google.com/search?q=UK+ETS+EU+linkage"]
+            "search_url": ["https://www.google.com/search?q=UK+ETS+EU+linkage"],
+            "events": [
+                # Source: https://www.reuters.com/sustainability/climate-energy/uk-carbon-prices-close-135-higher-eu-linking-talks-report-2025-01-28/
+                {"date": "2025-01-28", "label": "Possible linkage announced"},
+                {"date": "2025-03-17", "label": "EU-UK Parliamentary Partnership Assembly"},
+                # Source: https://carbon-pulse.com/380168/
+                {"date": "2025-03-20", "label": "EU linkage update"},
+            ]
         },
         {
             "title": "Inclusion of Waste Incineration Facilities & Maritime Sector in UK ETS",
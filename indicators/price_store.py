@@ -0,0 +1,219 @@
+# indicators/price_store.py
+#
+# Single store for daily UKA prices. Each source keeps its own rows keyed on
+# (date, source), and a `merged` table holds one price per date picked by source
+# precedence. Upserts touch only the rows (and merged dates) they change, so a daily
+# update is a couple of indexed writes instead of a full CSV rewrite, and readers get
+# the deduplicated series without re-doing the merge.
+#
+# The per-source CSVs in data/raw are the copy that lives in git (the daily workflow
+# commits them after export_csvs()); the database is a local index of them, created on
+# first use and re-imported from any CSV that changed since (e.g. after a git pull).
+
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from config import PROCESSED_DATA_PATH, RAW_DATA_PATH
+from instrumentation import traced
+
+PRICE_DB_PATH = PROCESSED_DATA_PATH / "uka_prices.sqlite"
+
+# Lower rank wins when two sources report the same date
+SOURCE_PRECEDENCE = {
+    "ice_front_december": 0,  # scraped front-December settlement (scrape_uka_prices.py)
+    "ice_chart": 1,           # ICE historical chart JSON (fetch_prices.py)
+}
+
+# Committed per-source exports of the store
+SOURCE_CSVS = {
+    "ice_chart": RAW_DATA_PATH / "uka_prices.csv",
+    "ice_front_december": RAW_DATA_PATH / "uka_timeseries.csv",
+}
+
+# Everything the store's contents depend on, for mtime-keyed caches
+PRICE_FILES = [PRICE_DB_PATH, *SOURCE_CSVS.values()]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    date TEXT NOT NULL,
+    source TEXT NOT NULL,
+    uka_price REAL NOT NULL,
+    PRIMARY KEY (date, source)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    rank INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS merged (
+    date TEXT PRIMARY KEY,
+    uka_price REAL NOT NULL,
+    source TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS csv_imports (
+    source TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+def connect(db_path=PRICE_DB_PATH, seed=True):
+    """Open the store, creating it on first use and importing any source CSV that changed."""
+    is_new = not db_path.exists()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    # Only write when a rank changed, so opening the store for a read leaves its mtime alone
+    conn.executemany(
+        """
+        INSERT INTO sources (source, rank) VALUES (?, ?)
+        ON CONFLICT (source) DO UPDATE SET rank = excluded.rank WHERE rank != excluded.rank
+        """,
+        SOURCE_PRECEDENCE.items(),
+    )
+    conn.commit()
+
+    if seed:
+        _import_changed_csvs(conn)
+    if is_new:
+        print(f"🗄️ Created price store at {db_path}")
+
+    return conn
+
+
+def _record_csv(conn, source, csv_path):
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO csv_imports (source, mtime) VALUES (?, ?)",
+            (source, csv_path.stat().st_mtime),
+        )
+
+
+def _import_changed_csvs(conn, csvs=SOURCE_CSVS):
+    # A CSV whose mtime matches the last import (or export) is already in the store
+    imported = dict(conn.execute("SELECT source, mtime FROM csv_imports"))
+    for source, csv_path in csvs.items():
+        if csv_path.exists() and imported.get(source) != csv_path.stat().st_mtime:
+            upsert(pd.read_csv(csv_path), source, conn=conn)
+            _record_csv(conn, source, csv_path)
+
+
+def _normalise_rows(rows):
+    df = pd.DataFrame(rows)
+    df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    df["uka_price"] = pd.to_numeric(df["uka_price"], errors="coerce")
+    df = df.dropna(subset=["date", "uka_price"])
+    return df.drop_duplicates(subset="date", keep="last")
+
+
+def _refresh_merged(conn, dates):
+    # Re-pick the winning source only for the dates that were just written
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO merged (date, uka_price, source)
+        SELECT p.date, p.uka_price, p.source
+        FROM prices p JOIN sources s ON s.source = p.source
+        WHERE p.date = ?
+        ORDER BY s.rank
+        LIMIT 1
+        """,
+        [(d,) for d in dates],
+    )
+
+
+@traced("prices.upsert")
+def upsert(rows, source, conn=None, db_path=PRICE_DB_PATH):
+    """
+    Insert or update daily prices for one source. `rows` is anything DataFrame-like
+    with `date` and `uka_price`. Returns the number of rows written.
+    """
+    if source not in SOURCE_PRECEDENCE:
+        raise ValueError(f"Unknown price source: {source}")
+
+    df = _normalise_rows(rows)
+    if df.empty:
+        return 0
+
+    records = list(zip(df["date"], [source] * len(df), df["uka_price"].astype(float)))
+
+    own_conn = conn is None
+    conn = conn or connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO prices (date, source, uka_price) VALUES (?, ?, ?)
+                ON CONFLICT (date, source) DO UPDATE SET uka_price = excluded.uka_price
+                """,
+                records,
+            )
+            _refresh_merged(conn, df["date"])
+    finally:
+        if own_conn:
+            conn.close()
+
+    return len(records)
+
+
+def _date_filter(start_date, end_date, extra=None):
+    clauses, params = list(extra or []), []
+    if start_date is not None:
+        clauses.append("date >= ?")
+        params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+    if end_date is not None:
+        clauses.append("date <= ?")
+        params.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def _read(sql, params, db_path):
+    with closing(connect(db_path)) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    df["date"] = pd.to_datetime(df["date"]).dt.date
+    return df
+
+
+@traced("prices.export")
+def export_csvs(db_path=PRICE_DB_PATH, csvs=SOURCE_CSVS):
+    """Write every source's rows back to its CSV (the copy the daily workflow commits)."""
+    with closing(connect(db_path)) as conn:
+        for source, csv_path in csvs.items():
+            df = pd.read_sql_query(
+                "SELECT date, uka_price FROM prices WHERE source = ? ORDER BY date", conn, params=[source]
+            )
+            csv_path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_csv(csv_path, index=False)
+            _record_csv(conn, source, csv_path)
+    print(f"💾 Exported {len(csvs)} price sources to CSV")
+
+
+@traced("prices.query")
+def query(source, start_date=None, end_date=None, db_path=PRICE_DB_PATH):
+    """Prices of a single source between two dates (inclusive)."""
+    where, params = _date_filter(start_date, end_date, extra=["source = ?"])
+    return _read(
+        f"SELECT date, uka_price FROM prices {where} ORDER BY date",
+        [source] + params,
+        db_path,
+    )
+
+
+@traced("prices.load_merged")
+def load_merged_prices(start_date=None, end_date=None, db_path=PRICE_DB_PATH):
+    """One price per date across all sources, highest-precedence source winning."""
+    where, params = _date_filter(start_date, end_date)
+    return _read(
+        f"SELECT date, uka_price, source FROM merged {where} ORDER BY date",
+        params,
+        db_path,
+    )
+
+
+if __name__ == "__main__":
+    print(load_merged_prices().tail(10))
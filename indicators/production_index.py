@@ -3,22 +3,103 @@
 import os
 import pandas as pd
 
+from instrumentation import annotate, traced
+
+ALLOCATIONS_WORKBOOK = os.path.join(
+    os.path.dirname(__file__), "..", "data", "raw", "Timeseries_for_uk_ets_allocations_non-aviation.xlsx"
+)
+COMPANY_SHEET = "Timeseries - Company Allocation"
+INDUSTRY_SHEET = "Timeseries-Industry Allocations"
+
+# Columnar copies of the two sheets, written next to the workbook by convert_allocations_workbook()
+ALLOCATIONS_PARQUET = {
+    COMPANY_SHEET: os.path.join(os.path.dirname(ALLOCATIONS_WORKBOOK), "allocations_company.parquet"),
+    INDUSTRY_SHEET: os.path.join(os.path.dirname(ALLOCATIONS_WORKBOOK), "allocations_industry.parquet"),
+}
+
+
+@traced("allocations.read_workbook")
+def convert_allocations_workbook(excel_path=ALLOCATIONS_WORKBOOK):
+    """
+    Parse the workbook once (both sheets in a single openpyxl pass) and write each
+    sheet to Parquet next to it. Parquet needs string column names, so the year
+    headers are stored as "2021", "2022", ...
+    """
+    annotate(bytes=os.path.getsize(excel_path))
+    sheets = pd.read_excel(excel_path, sheet_name=[COMPANY_SHEET, INDUSTRY_SHEET])
+
+    for sheet_name, df in sheets.items():
+        df.columns = [str(col) for col in df.columns]
+        try:
+            df.to_parquet(ALLOCATIONS_PARQUET[sheet_name], index=False)
+            print(f"💾 Cached '{sheet_name}' to {os.path.basename(ALLOCATIONS_PARQUET[sheet_name])}")
+        except OSError as e:
+            # Read-only deployments still get the parsed sheets, just without the cache
+            print(f"⚠️ Could not cache '{sheet_name}': {e}")
+
+    return sheets[COMPANY_SHEET], sheets[INDUSTRY_SHEET]
+
+
+def _parquet_cache_is_fresh(excel_path=ALLOCATIONS_WORKBOOK):
+    workbook_mtime = os.path.getmtime(excel_path)
+    return all(
+        os.path.exists(path) and os.path.getmtime(path) >= workbook_mtime
+        for path in ALLOCATIONS_PARQUET.values()
+    )
+
+
+@traced("allocations.load")
 def load_company_and_industry_allocations():
-    base_dir = os.path.dirname(__file__)
-    excel_path = os.path.join(base_dir, "..", "data", "raw", "Timeseries_for_uk_ets_allocations_non-aviation.xlsx")
+    # Serve from the Parquet copies unless the workbook has changed since they were written
+    if not _parquet_cache_is_fresh():
+        annotate(cache="miss")
+        return convert_allocations_workbook()
+
+    annotate(cache="hit")
 
-    company_allocations = pd.read_excel(excel_path, sheet_name="Timeseries - Company Allocation")
-    industry_allocations = pd.read_excel(excel_path, sheet_name="Timeseries-Industry Allocations")
+    company_allocations = pd.read_parquet(ALLOCATIONS_PARQUET[COMPANY_SHEET])
+    industry_allocations = pd.read_parquet(ALLOCATIONS_PARQUET[INDUSTRY_SHEET])
 
     return company_allocations, industry_allocations
 
+
+def _year_columns(df):
+    return [col for col in df.columns if str(col).isdigit()]
+
+
+def load_full_allocation_timeseries():
+    """
+    Every company and industry (not just the top 10) in long format, with the
+    "Grand Total" rows removed, names as categoricals and Year as an integer, so
+    the tables can be filtered cheaply by name and year.
+    """
+    company_df, industry_df = load_company_and_industry_allocations()
+
+    tables = []
+    for df, name_col in [(company_df, "Company"), (industry_df, "Industries")]:
+        df = df.dropna(subset=[name_col])
+        df = df[df[name_col] != "Grand Total"]
+
+        long_df = df.melt(
+            id_vars=name_col, value_vars=_year_columns(df),
+            var_name="Year", value_name="Allocation"
+        )
+        long_df[name_col] = long_df[name_col].astype("category")
+        long_df["Year"] = long_df["Year"].astype(int).astype("int16")
+        long_df["Allocation"] = long_df["Allocation"].astype("float64")
+        tables.append(long_df)
+
+    return tables[0], tables[1]
+
+
+@traced("allocations.reshape")
 def reshape_allocation_timeseries():
     company_df, industry_df = load_company_and_industry_allocations()
 
     top_companies_df = company_df.dropna(subset=["Company"]).iloc[:10]
     top_industries_df = industry_df.dropna(subset=["Industries"]).iloc[1:11]
 
-    year_columns = [col for col in top_companies_df.columns if str(col).isdigit()]
+    year_columns = _year_columns(top_companies_df)
 
     companies_long = top_companies_df.melt(
         id_vars="Company", value_vars=year_columns,
@@ -32,4 +113,8 @@ def reshape_allocation_timeseries():
     companies_long["Year"] = companies_long["Year"].astype(str)
     industries_long["Year"] = industries_long["Year"].astype(str)
 
-    return companies_long, industries_long
\ No newline at end of file
+    return companies_long, industries_long
+
+
+if __name__ == "__main__":
+    convert_allocations_workbook()
@@ -1,15 +1,41 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import date
+from pathlib import Path
 import os
 import time
 
+import requests
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import add_bytes, span, traced
+from indicators.futures_curve import CURVE_PATH, append_curve_rows, front_december
+from indicators.price_store import PRICE_DB_PATH, query, upsert
+
+ICE_PAGE_URL = "https://www.ice.com/products/80216150/UKA-Futures/data?marketId=7977905&span=1"
+
+# productId / hubId of UKA Futures, taken from the product guide embedded in the ICE page
+ICE_CONTRACTS_URL = (
+    "https://www.ice.com/marketdata/DelayedMarkets.shtml"
+    "?getContractsAsJson=&productId=26132&hubId=27889"
+)
+ICE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Accept": "application/json",
+    "Referer": ICE_PAGE_URL,
+}
+
+# Saved copy of the rendered ICE page, used by the offline "fixture" driver and the tests (read-only)
+ICE_FIXTURE_HTML = Path(__file__).resolve().parents[1] / "debug_ice.html"
+# Where fetch_contract_rows_selenium(debug=True) dumps the page it rendered
+ICE_DEBUG_HTML = PROCESSED_DATA_PATH / "ice_debug.html"
+
+# Drivers are tried in this order; override with e.g. UKA_SCRAPER_DRIVERS=http,selenium
+DEFAULT_DRIVERS = ("http", "selenium")
+
+
 def get_headless_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
@@ -31,73 +57,181 @@ def get_headless_driver():
 
     return driver
 
-def scrape_and_update_uka_timeseries(csv_path="data/raw/uka_timeseries.csv"):
-    driver = get_headless_driver()
 
-    url = "https://www.ice.com/products/80216150/UKA-Futures/data?marketId=7977905&span=1"
-    driver.get(url)
-    driver.execute_script("window.scrollBy(0, 300);")
+def _to_float(value):
+    try:
+        return float(str(value).replace(",", "").strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
 
+def parse_contract_table(html):
+    """
+    Parse the contract table of the rendered ICE page into one dict per contract:
+    contract, last, time, change, volume (None where the cell is blank).
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    if not table:
+        raise ValueError("⚠️ Contract table not found in page.")
+
+    header_cells = table.find("tr").find_all(["th", "td"])
+    headers = [cell.get_text(" ", strip=True).lower() for cell in header_cells]
+
+    def column(name, default):
+        return next((i for i, h in enumerate(headers) if name in h), default)
+
+    last_col, time_col = column("last", 1), column("time", 2)
+    change_col, volume_col = column("change", 3), column("volume", 4)
+
+    rows = []
+    for tr in table.find_all("tr")[1:]:
+        cells = [td.get_text(" ", strip=True) for td in tr.find_all("td")]
+        if len(cells) < 3:
+            continue
+
+        def cell(i):
+            return cells[i] if i < len(cells) else None
+
+        rows.append({
+            "contract": cells[0],
+            "last": _to_float(cell(last_col)),
+            "time": cell(time_col) or None,
+            "change": _to_float(cell(change_col)),
+            "volume": _to_int(cell(volume_col)),
+        })
+
+    return rows
+
+
+def fetch_contract_rows_http():
+    """Fast path: the JSON endpoint ICE's page loads its contract table from."""
+    response = requests.get(ICE_CONTRACTS_URL, headers=ICE_HEADERS, timeout=15)
+    add_bytes(len(response.content))
+    if response.status_code != 200:
+        raise ConnectionError(f"Failed to fetch contracts. Status code: {response.status_code}")
+
+    contracts = response.json()
+    if not isinstance(contracts, list) or not contracts:
+        raise ValueError("Unexpected format for the ICE contracts response.")
+
+    return [
+        {
+            "contract": item.get("marketStrip"),
+            "last": _to_float(item.get("lastPrice")),
+            "time": item.get("lastTime"),
+            "change": _to_float(item.get("change")),
+            "volume": _to_int(item.get("volume")),
+        }
+        for item in contracts
+        if item.get("marketStrip")
+    ]
+
+
+def fetch_contract_rows_selenium(debug=False):
+    """Fallback: render the product page in headless Chrome and parse the table."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    driver = get_headless_driver()
     try:
+        driver.get(ICE_PAGE_URL)
+        driver.execute_script("window.scrollBy(0, 300);")
         WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "table"))
         )
-    except:
-        print("⚠️ Table not found after waiting.")
+        html = driver.page_source
+        add_bytes(len(html.encode("utf-8")))
+    finally:
         driver.quit()
-        return
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    driver.quit()
+    if debug:
+        ICE_DEBUG_HTML.parent.mkdir(parents=True, exist_ok=True)
+        with open(ICE_DEBUG_HTML, "w", encoding="utf-8") as f:
+            f.write(html)
 
-    with open("debug_ice.html", "w", encoding="utf-8") as f:
-        f.write(soup.prettify())
+    return parse_contract_table(html)
 
-    table = soup.find("table")
-    if not table:
-        raise ValueError("⚠️ Contract table not found in page.")
 
-    rows = table.find_all("tr")[1:]
+def fetch_contract_rows_fixture(path=ICE_FIXTURE_HTML):
+    """Offline driver: parse a saved copy of the rendered page."""
+    with open(path, encoding="utf-8") as f:
+        return parse_contract_table(f.read())
+
+
+CONTRACT_DRIVERS = {
+    "http": fetch_contract_rows_http,
+    "selenium": fetch_contract_rows_selenium,
+    "fixture": fetch_contract_rows_fixture,
+}
+
+
+def fetch_contract_rows(drivers=None):
+    """
+    Try each driver in turn until one returns contract rows.
+    Returns (rows, timings) where timings records every attempt with its duration.
+    """
+    if drivers is None:
+        env_drivers = os.environ.get("UKA_SCRAPER_DRIVERS")
+        drivers = env_drivers.split(",") if env_drivers else DEFAULT_DRIVERS
+
+    timings = []
+    for name in drivers:
+        start = time.perf_counter()
+        try:
+            with span(f"ice.driver.{name.strip()}") as attempt:
+                rows = CONTRACT_DRIVERS[name.strip()]()
+                attempt.set(rows=len(rows))
+                if not rows:
+                    raise ValueError("no contract rows returned")
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            timings.append({"driver": name, "seconds": elapsed, "ok": False, "error": str(e)})
+            print(f"⚠️ {name} driver failed after {elapsed:.2f}s: {e}")
+            continue
+
+        elapsed = time.perf_counter() - start
+        timings.append({"driver": name, "seconds": elapsed, "ok": True, "error": None})
+        print(f"⏱️ {name} driver returned {len(rows)} contracts in {elapsed:.2f}s")
+        return rows, timings
+
+    raise ConnectionError(f"⚠️ All contract drivers failed: {[t['driver'] for t in timings]}")
+
+
+@traced("ice.scrape")
+def scrape_and_update_uka_timeseries(db_path=PRICE_DB_PATH, drivers=None, curve_path=CURVE_PATH):
+    rows, _ = fetch_contract_rows(drivers)
+
     print("\n🧪 Extracted contracts:")
     for row in rows:
-        cols = row.find_all("td")
-        if len(cols) >= 3:
-            contract = cols[0].text.strip()
-            price_str = cols[1].text.strip()
-
-            print("-", contract)
-
-            try:
-                last_price = float(price_str.replace(',', '').strip())
-            except ValueError:
-                continue
-
-            today = date.today()
-
-            if contract == "Dec25":
-                new_row = pd.DataFrame([{
-                    "date": today,
-                    "uka_price": last_price
-                }])
-
-                if not os.path.exists(csv_path):
-                    new_row.to_csv(csv_path, index=False)
-                    print(f"📈 Timeseries started using contract {contract}")
-                    return new_row
-
-                existing = pd.read_csv(csv_path)
-                existing["date"] = pd.to_datetime(existing["date"]).dt.date
-
-                if today not in existing["date"].values:
-                    updated = pd.concat([existing, new_row])
-                    updated.to_csv(csv_path, index=False)
-                    print(f"✅ New price appended for contract {contract}")
-                    return updated
-                else:
-                    print("⏸️ No update needed — already recorded.")
-                    return existing
-
-    raise ValueError("⚠️ No valid 'Dec25' contract found in table.")
+        print("-", row["contract"])
+
+    # Every contract goes into the curve store; the continuous series follows the front December
+    append_curve_rows(rows, path=curve_path)
+
+    # Pick the front December from every listed contract, priced or not, so a day without
+    # a Dec25 trade doesn't roll the series early to Dec26
+    prices = {row["contract"]: row["last"] for row in rows}
+    contract = front_december(prices)
+    if contract is None:
+        raise ValueError("⚠️ No valid front-December contract found in table.")
+    if prices[contract] is None:
+        print(f"⏸️ Front December {contract} has no price today; nothing stored.")
+        return query("ice_front_december", db_path=db_path)
+
+    # Upsert keyed on (date, source): re-running on the same day just refreshes today's price
+    upsert([{"date": date.today(), "uka_price": prices[contract]}], "ice_front_december", db_path=db_path)
+    print(f"✅ Stored today's price for contract {contract}")
+
+    return query("ice_front_december", db_path=db_path)
 
 if __name__ == "__main__":
     try:
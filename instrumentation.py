@@ -0,0 +1,207 @@
+# instrumentation.py
+#
+# Lightweight timing spans for the hot paths (scrapes, API calls, file reads, chart
+# construction). A span records its duration plus whatever the code tells it about
+# the work: bytes fetched, rows produced, cache hit / miss. Finished spans are kept
+# in memory for the dashboard's Diagnostics tab and can also be appended to a local
+# JSON-lines log for offline analysis (UKA_SPAN_LOG=path, or enable_export()).
+#
+# The open span and the run id live in context variables. Work handed to a thread
+# pool should be wrapped with propagate() so its spans keep the submitter's run id
+# and nest under the span that submitted it.
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from config import PROCESSED_DATA_PATH
+
+SPAN_LOG_PATH = PROCESSED_DATA_PATH / "spans.jsonl"
+MAX_RECENT_SPANS = 5000
+
+_run_id = contextvars.ContextVar("uka_run_id", default=None)
+_current = contextvars.ContextVar("uka_span", default=None)
+_lock = threading.Lock()
+_recent = deque(maxlen=MAX_RECENT_SPANS)
+_export_path = Path(os.environ["UKA_SPAN_LOG"]) if os.environ.get("UKA_SPAN_LOG") else None
+
+
+class Span:
+    def __init__(self, name, parent=None, **attrs):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.run_id = _run_id.get()
+        self.thread = threading.current_thread().name
+        self.attrs = attrs
+        self.status = "ok"
+        self.error = None
+        self.started_at = datetime.now(timezone.utc)
+        self.seconds = None
+        self._start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add_bytes(self, n_bytes):
+        self.attrs["bytes"] = self.attrs.get("bytes", 0) + int(n_bytes)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "depth": self.depth,
+            "run_id": self.run_id,
+            "thread": self.thread,
+            "started_at": self.started_at.isoformat(),
+            "seconds": self.seconds,
+            "status": self.status,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+def current_span():
+    return _current.get()
+
+
+def annotate(**attrs):
+    """Attach attributes (rows=, cache=, ...) to the innermost open span, if any."""
+    span_ = current_span()
+    if span_ is not None:
+        span_.set(**attrs)
+
+
+def add_bytes(n_bytes):
+    span_ = current_span()
+    if span_ is not None:
+        span_.add_bytes(n_bytes)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block. Exceptions are recorded on the span and re-raised."""
+    span_ = Span(name, parent=_current.get(), **attrs)
+    token = _current.set(span_)
+    try:
+        yield span_
+    except BaseException as e:
+        span_.status, span_.error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span_.seconds = round(time.perf_counter() - span_._start, 6)
+        _current.reset(token)
+        _finish(span_)
+
+
+def _row_count(result):
+    if isinstance(result, bool):
+        return None
+    if isinstance(result, int):
+        return result
+    if hasattr(result, "shape") or isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and all(hasattr(r, "shape") for r in result):
+        return sum(len(r) for r in result)
+    return None
+
+
+def traced(name=None, **attrs):
+    """
+    Decorator form of span(). `rows` is filled in from the return value when it is a
+    DataFrame, a list, a tuple of DataFrames or a row count.
+    """
+    def decorate(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attrs) as span_:
+                result = func(*args, **kwargs)
+                if "rows" not in span_.attrs:
+                    rows = _row_count(result)
+                    if rows is not None:
+                        span_.set(rows=rows)
+                return result
+        return wrapper
+    return decorate
+
+
+def start_run(label=None):
+    """
+    Start a new run (e.g. one Streamlit rerun) on this thread; spans opened on it
+    (and in work it hands off through propagate()) until the next start_run() share
+    the returned id.
+    """
+    run_id = f"{label or 'run'}-{uuid.uuid4().hex[:8]}"
+    _run_id.set(run_id)
+    return run_id
+
+
+def propagate(func):
+    """
+    Wrap `func` for a thread pool: each call runs in a copy of the context it was
+    wrapped in, so spans opened by the worker keep that run id and parent span.
+    Wrap on the submitting thread, e.g. pool.submit(propagate(fetch), ...).
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A fresh copy per call: one Context can't be entered by two threads at once
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def _finish(span_):
+    record = span_.to_dict()
+    with _lock:
+        _recent.append(record)
+        if _export_path is not None:
+            _export_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(_export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+def recent_spans(run_id=None):
+    """Finished spans, oldest first, optionally only those of one run."""
+    with _lock:
+        spans = list(_recent)
+    if run_id is not None:
+        spans = [s for s in spans if s["run_id"] == run_id]
+    return spans
+
+
+def clear_spans():
+    with _lock:
+        _recent.clear()
+
+
+def enable_export(path=SPAN_LOG_PATH):
+    global _export_path
+    _export_path = Path(path)
+    return _export_path
+
+
+def disable_export():
+    global _export_path
+    _export_path = None
+
+
+def export_path():
+    return _export_path
+
+
+def read_span_log(path=SPAN_LOG_PATH):
+    """Load an exported JSON-lines log as a DataFrame for offline analysis."""
+    import pandas as pd
+
+    return pd.read_json(path, lines=True)
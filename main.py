@@ -1,17 +1,17 @@
 # main.py
-from indicators.fetch_prices import get_real_uka_prices
-from config import RAW_DATA_PATH
+from pipeline import run_pipeline
+from indicators.price_store import export_csvs
 
 def main():
     print("Starting UKA data pipeline...")
 
-    # Fetch real UKA prices
-    df = get_real_uka_prices()
-    RAW_DATA_PATH.mkdir(parents=True, exist_ok=True)  # Ensure path exists
-    df.to_csv(RAW_DATA_PATH / "uka_prices.csv", index=False)
+    # Fetch real UKA prices into the price store
+    report = run_pipeline(["ice_prices"])
 
-    print("Saved UKA price data to CSV.")
-    print("Pipeline completed successfully.")
+    if report["ok"]:
+        export_csvs()
+        print("Pipeline completed successfully.")
+    return report
 
 if __name__ == "__main__":
     main()
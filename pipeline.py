@@ -0,0 +1,237 @@
+# pipeline.py
+#
+# In-process runner for the data pipeline. Each indicator is a registered task with
+# optional dependencies; independent tasks run concurrently on a thread pool (the
+# work is network / disk bound), a failing task only skips the tasks that depend on
+# it, and every run writes a JSON report with per-task timings.
+#
+#   python pipeline.py                     # run everything
+#   python pipeline.py ice_curve news      # run a subset (dependencies are pulled in)
+#
+# Task functions may take keyword arguments; callers pass them per task through
+# run_pipeline(params={task: kwargs}) (the refresh worker uses this to keep its runs light).
+
+import argparse
+import json
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from config import PROCESSED_DATA_PATH
+from instrumentation import propagate, span
+
+REPORT_PATH = PROCESSED_DATA_PATH / "pipeline_report.json"
+
+TASKS = {}
+
+
+def task(name, depends_on=()):
+    """Register a pipeline task. Heavy imports belong inside the task body."""
+    def register(func):
+        TASKS[name] = {"func": func, "depends_on": tuple(depends_on)}
+        return func
+    return register
+
+
+@task("ice_prices")
+def ice_prices():
+    from indicators.fetch_prices import get_real_uka_prices
+    from indicators.price_store import upsert
+
+    return {"rows": upsert(get_real_uka_prices(), "ice_chart")}
+
+
+@task("ice_curve")
+def ice_curve(drivers=None):
+    from indicators.scrape_uka_prices import scrape_and_update_uka_timeseries
+
+    return {"rows": len(scrape_and_update_uka_timeseries(drivers=drivers))}
+
+
+@task("price_analytics", depends_on=["ice_prices", "ice_curve"])
+def price_analytics():
+    from analysis.price_analytics import contract_price_analytics, merged_price_analytics
+
+    return {"rows": len(merged_price_analytics()), "contracts": len(contract_price_analytics())}
+
+
+@task("price_forecast", depends_on=["ice_prices", "ice_curve"])
+def price_forecast(run_backtest=True):
+    from analysis.price_forecast import update_forecast
+
+    _, meta = update_forecast(run_backtest=run_backtest)
+    return {"rows": meta["rows"], "data_hash": meta["data_hash"]}
+
+
+@task("carbon_intensity")
+def carbon_intensity(backfill=True):
+    from indicators.carbon_store import sync_carbon_history
+
+    return {"rows": sync_carbon_history(backfill=backfill)}
+
+
+@task("carbon_rollups", depends_on=["carbon_intensity"])
+def carbon_rollups():
+    from indicators.carbon_rollups import update_rollups
+
+    return {"rows": update_rollups()}
+
+
+@task("carbon_regional")
+def carbon_regional(backfill=True):
+    from indicators.carbon_mix_store import sync_regional_history
+
+    return {"rows": sync_regional_history(backfill=backfill)}
+
+
+@task("carbon_generation_mix")
+def carbon_generation_mix(backfill=True):
+    from indicators.carbon_mix_store import sync_generation_mix
+
+    return {"rows": sync_generation_mix(backfill=backfill)}
+
+
+# After the syncs, so the two never rewrite the same monthly partition concurrently
+@task("carbon_gaps", depends_on=["carbon_intensity", "carbon_regional", "carbon_generation_mix"])
+def carbon_gaps():
+    from indicators.carbon_gaps import repair_all
+
+    reports = repair_all()
+    return {
+        "rows": sum(r["rows"] for r in reports.values()),
+        "requests": sum(r["requests"] for r in reports.values()),
+    }
+
+
+@task("news")
+def news():
+    from indicators.news_feed import ingest_news
+
+    return {"rows": ingest_news()}
+
+
+@task("market_updates")
+def market_updates():
+    from indicators.market_update_corpus import build_corpus
+
+    return {"rows": len(build_corpus()["documents"])}
+
+
+@task("feature_panel", depends_on=["ice_prices", "ice_curve", "carbon_rollups", "allocations", "news"])
+def feature_panel():
+    from analysis.feature_panel import build_feature_panel
+
+    return {"columns": build_feature_panel()}
+
+
+@task("allocations")
+def allocations():
+    from indicators.production_index import load_company_and_industry_allocations
+
+    company_df, industry_df = load_company_and_industry_allocations()
+    return {"rows": len(company_df) + len(industry_df)}
+
+
+def _with_dependencies(names):
+    selected, stack = set(), list(names)
+    while stack:
+        name = stack.pop()
+        if name not in TASKS:
+            raise KeyError(f"Unknown pipeline task: {name}")
+        if name not in selected:
+            selected.add(name)
+            stack.extend(TASKS[name]["depends_on"])
+    return selected
+
+
+def _run_task(name, kwargs=None):
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    try:
+        with span(f"pipeline.{name}"):
+            result = TASKS[name]["func"](**(kwargs or {}))
+        status, error = "ok", None
+    except Exception as e:
+        traceback.print_exc()
+        result, status, error = None, "failed", f"{type(e).__name__}: {e}"
+
+    return {
+        "task": name,
+        "status": status,
+        "started_at": started.isoformat(),
+        "seconds": round(time.perf_counter() - start, 3),
+        "result": result,
+        "error": error,
+    }
+
+
+def run_pipeline(names=None, max_workers=4, report_path=REPORT_PATH, params=None):
+    """
+    Run the selected tasks (all by default) as soon as their dependencies succeed.
+    `params` maps task names to keyword arguments for their functions. Returns the
+    run report and writes it to `report_path` as JSON.
+    """
+    params = params or {}
+    pending = _with_dependencies(names or TASKS)
+    results = {}
+    run_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while pending or running:
+            for name in sorted(pending):
+                deps = TASKS[name]["depends_on"]
+                if any(results.get(d, {}).get("status") in ("failed", "skipped") for d in deps):
+                    results[name] = {"task": name, "status": "skipped", "seconds": 0.0,
+                                     "result": None, "error": "dependency did not succeed"}
+                    pending.discard(name)
+                elif all(results.get(d, {}).get("status") == "ok" for d in deps):
+                    print(f"▶️ {name}")
+                    running[pool.submit(propagate(_run_task), name, params.get(name))] = name
+                    pending.discard(name)
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Circular task dependencies: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome = future.result()
+                results[running.pop(future)] = outcome
+                icon = "✅" if outcome["status"] == "ok" else "❌"
+                print(f"{icon} {outcome['task']} ({outcome['seconds']:.2f}s)")
+
+    report = {
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "seconds": round(time.perf_counter() - run_start, 3),
+        "ok": all(r["status"] == "ok" for r in results.values()),
+        "tasks": [results[name] for name in sorted(results)],
+    }
+
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2))
+        print(f"📝 Run report written to {report_path}")
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the UKA data pipeline.")
+    parser.add_argument("tasks", nargs="*", help=f"tasks to run (default: all of {', '.join(TASKS)})")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--report", type=Path, default=REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    report = run_pipeline(args.tasks or None, max_workers=args.workers, report_path=args.report)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
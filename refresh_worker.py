@@ -0,0 +1,191 @@
+# refresh_worker.py
+#
+# Background refresher for the local stores. Each pipeline task runs on its own
+# cadence (see REFRESH_INTERVALS) and the outcome of every attempt is written to
+# data/processed/refresh_state.json, which the dashboard reads to show how fresh each
+# source is. The dashboard never fetches from ICE or the carbon API itself: it starts
+# this worker as a daemon thread (unless UKA_REFRESH_WORKER=0) and only reads the
+# stores. That in-app thread only runs the light, incremental tasks (IN_APP_TASKS):
+# ICE over plain HTTP, no headless Chrome, no history backfills and no model fits
+# inside the app server. Everything else runs from the standalone worker:
+#
+#   python refresh_worker.py           # loop forever
+#   python refresh_worker.py --once    # run whatever is due, then exit
+
+import argparse
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from config import PROCESSED_DATA_PATH
+from pipeline import run_pipeline
+
+REFRESH_STATE_PATH = PROCESSED_DATA_PATH / "refresh_state.json"
+REFRESH_REQUESTS_DIR = PROCESSED_DATA_PATH / "refresh_requests"
+
+# How often each task is re-run. carbon_rollups pulls in carbon_intensity as a dependency.
+# The standalone worker runs all of them.
+REFRESH_INTERVALS = {
+    "ice_curve": timedelta(hours=1),
+    "ice_prices": timedelta(hours=6),
+    "price_forecast": timedelta(hours=6),  # refits only when the prices changed
+    "carbon_rollups": timedelta(minutes=30),
+    "carbon_regional": timedelta(hours=1),
+    "carbon_generation_mix": timedelta(hours=1),
+    "carbon_gaps": timedelta(days=1),
+    "news": timedelta(hours=1),
+    "allocations": timedelta(days=1),
+    "feature_panel": timedelta(hours=6),
+}
+
+# Task arguments for the worker's runs: refits only, backtests stay with the pipeline / CLI
+WORKER_PARAMS = {
+    "price_forecast": {"run_backtest": False},
+}
+
+# What the dashboard's own thread runs, and the task arguments that keep it light
+IN_APP_TASKS = ("ice_curve", "ice_prices", "carbon_rollups", "carbon_regional", "carbon_generation_mix",
+                "news", "allocations")
+IN_APP_PARAMS = {
+    **WORKER_PARAMS,
+    "ice_curve": {"drivers": ("http",)},
+    "carbon_intensity": {"backfill": False},
+    "carbon_regional": {"backfill": False},
+    "carbon_generation_mix": {"backfill": False},
+}
+TICK_SECONDS = 30
+
+_state_lock = threading.Lock()
+_worker = None
+
+
+def load_refresh_state(path=REFRESH_STATE_PATH):
+    """{task: {"last_attempt", "last_success", "status", "error", "seconds"}} (ISO timestamps)."""
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _record_results(report, path=REFRESH_STATE_PATH):
+    with _state_lock:
+        state = load_refresh_state(path)
+        for result in report["tasks"]:
+            entry = state.setdefault(result["task"], {})
+            entry["last_attempt"] = report["finished_at"]
+            entry["status"] = result["status"]
+            entry["error"] = result["error"]
+            entry["seconds"] = result["seconds"]
+            if result["status"] == "ok":
+                entry["last_success"] = report["finished_at"]
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(state, indent=2))
+        tmp_path.replace(path)
+
+
+def request_refresh(task, requests_dir=REFRESH_REQUESTS_DIR):
+    """Ask the worker to run `task` on its next tick, regardless of its interval."""
+    if task not in REFRESH_INTERVALS:
+        raise KeyError(f"Task is not scheduled for refresh: {task}")
+    requests_dir.mkdir(parents=True, exist_ok=True)
+    (requests_dir / task).touch()
+
+
+def _pop_requests(requests_dir=REFRESH_REQUESTS_DIR, tasks=REFRESH_INTERVALS):
+    # Requests for tasks outside `tasks` stay queued for the standalone worker
+    if not requests_dir.exists():
+        return set()
+    requested = set()
+    for path in requests_dir.iterdir():
+        if path.name in tasks:
+            requested.add(path.name)
+            path.unlink(missing_ok=True)
+        elif path.name not in REFRESH_INTERVALS:
+            path.unlink(missing_ok=True)
+    return requested
+
+
+def due_tasks(state, now=None, tasks=REFRESH_INTERVALS):
+    """Tasks (of `tasks`) whose last attempt is older than their interval (or that never ran)."""
+    now = now or datetime.now(timezone.utc)
+    due = []
+    for task in tasks:
+        last = state.get(task, {}).get("last_attempt")
+        if last is None or now - datetime.fromisoformat(last) >= REFRESH_INTERVALS[task]:
+            due.append(task)
+    return due
+
+
+def refresh_due(now=None, state_path=REFRESH_STATE_PATH, requests_dir=REFRESH_REQUESTS_DIR, in_app=False):
+    """
+    Run every due or requested task once (concurrently, via the pipeline runner);
+    only IN_APP_TASKS, with IN_APP_PARAMS, when running inside the dashboard.
+    """
+    scheduled = IN_APP_TASKS if in_app else REFRESH_INTERVALS
+    tasks = sorted(set(due_tasks(load_refresh_state(state_path), now, scheduled)) | _pop_requests(requests_dir, scheduled))
+    if not tasks:
+        return None
+
+    report = run_pipeline(tasks, report_path=None, params=IN_APP_PARAMS if in_app else WORKER_PARAMS)
+    _record_results(report, state_path)
+    return report
+
+
+def run_forever(stop_event=None, tick=TICK_SECONDS, in_app=False, on_report=None):
+    """Refresh on every tick; `on_report(report)` is called after each run that did something."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        try:
+            report = refresh_due(in_app=in_app)
+            if report is not None and on_report is not None:
+                on_report(report)
+        except Exception as e:
+            # Keep the loop alive; the failure is also recorded per task in the state file
+            print(f"❌ Refresh tick failed: {e}")
+        stop_event.wait(tick)
+
+
+def start_background_worker(tick=TICK_SECONDS, on_report=None):
+    """
+    Start the in-app refresh loop (IN_APP_TASKS only) on a daemon thread, once per
+    process; `on_report` is called with each run's report (the dashboard drops the
+    caches of what was refreshed). Returns the thread, or None when disabled with
+    UKA_REFRESH_WORKER=0 (e.g. when `python refresh_worker.py` runs alongside and
+    covers everything).
+    """
+    global _worker
+    if os.environ.get("UKA_REFRESH_WORKER") == "0":
+        return None
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=run_forever, kwargs={"tick": tick, "in_app": True, "on_report": on_report},
+                                   name="uka-refresh", daemon=True)
+        _worker.start()
+        print("🔁 Background refresh worker started")
+    return _worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the local data stores on a schedule.")
+    parser.add_argument("--once", action="store_true", help="run what is due and exit")
+    parser.add_argument("--tick", type=int, default=TICK_SECONDS)
+    args = parser.parse_args(argv)
+
+    if args.once:
+        report = refresh_due()
+        return 0 if report is None or report["ok"] else 1
+
+    run_forever(tick=args.tick)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+# tests/conftest.py
+#
+# The modules import each other from the repository root (e.g. `from instrumentation
+# import ...`), so the tests run with the root on sys.path like the scripts do.
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
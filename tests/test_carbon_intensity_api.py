@@ -0,0 +1,80 @@
+# tests/test_carbon_intensity_api.py
+#
+# The windowed fetcher against a local stub of the carbon intensity API: one record
+# per day of each requested window, with a single 503 on one window to exercise the
+# session's retries.
+
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from indicators.carbon_intensity_api import API_TIME_FORMAT, fetch_intensity_range, plan_windows
+
+START = datetime(2025, 1, 1)
+END = datetime(2025, 3, 12)  # 70 days: windows of 30, 30 and 10 days
+FLAKY_WINDOW = "/intensity/2025-01-31T00:00Z/2025-03-02T00:00Z"
+
+
+class StubAPI(BaseHTTPRequestHandler):
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.hits[self.path] = self.hits.get(self.path, 0) + 1
+            attempt = self.hits[self.path]
+
+        if self.path == FLAKY_WINDOW and attempt == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        _, _, start, end = self.path.split("/")
+        day, end = datetime.strptime(start, API_TIME_FORMAT), datetime.strptime(end, API_TIME_FORMAT)
+        records = []
+        while day < end:
+            records.append({
+                "from": day.strftime(API_TIME_FORMAT),
+                "to": (day + timedelta(minutes=30)).strftime(API_TIME_FORMAT),
+                "intensity": {"forecast": 150, "actual": 140, "index": "moderate"},
+            })
+            day += timedelta(days=1)
+
+        body = json.dumps({"data": records}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    StubAPI.hits = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_intensity_range_retries_and_keeps_order(stub_api):
+    records = fetch_intensity_range(START, END, max_workers=3, base_url=stub_api)
+
+    # Every day of every window, in chronological order, despite the failed first attempt
+    froms = [record["from"] for record in records]
+    assert len(records) == (END - START).days
+    assert froms == sorted(froms)
+    assert froms[0] == "2025-01-01T00:00Z"
+    assert froms[-1] == "2025-03-11T00:00Z"
+
+    assert len(StubAPI.hits) == len(plan_windows(START, END))
+    assert StubAPI.hits[FLAKY_WINDOW] == 2
@@ -0,0 +1,30 @@
+# tests/test_scrape_uka_prices.py
+#
+# The ICE contract table parser against the saved copy of the rendered page
+# (debug_ice.html), so it can be checked without network access or Chrome.
+
+from indicators.scrape_uka_prices import ICE_FIXTURE_HTML, fetch_contract_rows, fetch_contract_rows_fixture
+
+
+def test_fixture_contracts():
+    rows = fetch_contract_rows_fixture()
+
+    assert [row["contract"] for row in rows] == ["Dec25", "Mar26", "Dec26"]
+    assert rows[0] == {"contract": "Dec25", "last": 42.26, "time": "4/8/2025 3:59 PM", "change": 1.125, "volume": 1987}
+    assert rows[1]["last"] == 42.27
+    assert rows[1]["time"] == "4/8/2025 10:15 AM"
+
+
+def test_fixture_blank_cells_are_none():
+    dec26 = fetch_contract_rows_fixture(ICE_FIXTURE_HTML)[2]
+
+    assert dec26["last"] is None
+    assert dec26["time"] is None
+    assert dec26["volume"] == 158
+
+
+def test_fixture_driver():
+    rows, timings = fetch_contract_rows(drivers=("fixture",))
+
+    assert len(rows) == 3
+    assert timings[0]["driver"] == "fixture" and timings[0]["ok"]
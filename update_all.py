@@ -1,18 +1,7 @@
-# to run this script, you must be working from uka_tracker subfolder. To do this, you must use the code cd uka_tracker
-import subprocess
+# Runs every pipeline task in-process (see pipeline.py); run from the project root.
 import sys
-import os
 
-base_path = os.path.dirname(__file__)
-venv_python = sys.executable  # This gets the current Python interpreter (your .venv one)
+from pipeline import main
 
-scripts = [
-    "indicators/fetch_prices.py",
-    "indicators/gas_prices.py",
-    "indicators/weather.py",
-    "indicators/news_feed.py"
-]
-
-for script in scripts:
-    print(f"Running {script}...")
-    subprocess.run([venv_python, os.path.join(base_path, script)], check=False)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,11 @@
-from indicators.scrape_uka_prices import scrape_and_update_uka_timeseries
+from pipeline import run_pipeline
+from indicators.price_store import export_csvs
 
 def run_daily_scrape():
-    try:
-        df = scrape_and_update_uka_timeseries("data/raw/uka_timeseries.csv")
-        print(df.tail())
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    report = run_pipeline(["ice_curve"])
+    if not report["ok"]:
         exit(1)  # Let GitHub Actions know this failed
+    export_csvs()  # the workflow commits the CSVs, not the database
 
 if __name__ == "__main__":
     run_daily_scrape()